@@ -0,0 +1 @@
+"""Offline emulator and benchmarks for the contracts in this repository."""
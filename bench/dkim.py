@@ -0,0 +1,178 @@
+"""
+DKIM test signer and key publisher for the EmailAuth scenarios.
+
+Keys are derived from a seed, so every run signs with the same RSA or Ed25519
+key without shipping key material. `Signer.sign` prepends a DKIM-Signature
+header using the contract's own canonicalization helpers; `Signer.pages` is
+the DNS-over-HTTPS answer a `StaticWeb` serves for the selector record.
+
+    from bench.dkim import Signer
+    signer = Signer("example.com", "sel1")
+    message = signer.sign("From: a@example.com\\nSubject: hi\\n\\nbody\\n")
+
+Signatures were checked against OpenSSL's RSA and Ed25519 verifiers when
+this module was written; the contract is the only verifier at run time.
+"""
+
+import base64
+import functools
+import hashlib
+import json
+import random
+
+from bench.emulator import load_contract
+
+DEFAULT_RESOLVER = "https://dns.google/resolve?name={name}&type=TXT"
+
+
+@functools.cache
+def _contract() -> dict:
+    return load_contract("email_auth.py").get_stats.__globals__
+
+
+def _is_probable_prime(n: int, rng: random.Random, rounds: int = 24) -> bool:
+    if n < 4:
+        return n in (2, 3)
+    for p in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37):
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d, s = d // 2, s + 1
+    for _ in range(rounds):
+        x = pow(rng.randrange(2, n - 1), d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+@functools.cache
+def rsa_key(bits: int = 1024, seed: int = 0) -> tuple[int, int, int]:
+    """(modulus, public exponent, private exponent), derived from `seed`."""
+    rng = random.Random(f"rsa-{bits}-{seed}")
+    e = 65537
+    while True:
+        p, q = (_prime(bits // 2, rng) for _ in range(2))
+        phi = (p - 1) * (q - 1)
+        if p != q and phi % e:
+            return p * q, e, pow(e, -1, phi)
+
+
+def _prime(bits: int, rng: random.Random) -> int:
+    while True:
+        candidate = rng.getrandbits(bits) | (1 << (bits - 1)) | (1 << (bits - 2)) | 1
+        if _is_probable_prime(candidate, rng):
+            return candidate
+
+
+def _der(tag: int, content: bytes) -> bytes:
+    size = len(content)
+    if size < 0x80:
+        return bytes([tag, size]) + content
+    length = size.to_bytes((size.bit_length() + 7) // 8, "big")
+    return bytes([tag, 0x80 | len(length)]) + length + content
+
+
+def _der_int(value: int) -> bytes:
+    return _der(0x02, value.to_bytes(value.bit_length() // 8 + 1, "big"))
+
+
+def rsa_public_der(modulus: int, exponent: int) -> bytes:
+    """SubjectPublicKeyInfo for an rsaEncryption key, as published in p=."""
+    algorithm = _der(0x30, _der(0x06, bytes.fromhex("2a864886f70d010101")) + _der(0x05, b""))
+    key = _der(0x30, _der_int(modulus) + _der_int(exponent))
+    return _der(0x30, algorithm + _der(0x03, b"\x00" + key))
+
+
+def _ed_encode(point: tuple) -> bytes:
+    g = _contract()
+    inverse = pow(point[2], g["_ED_P"] - 2, g["_ED_P"])
+    x, y = point[0] * inverse % g["_ED_P"], point[1] * inverse % g["_ED_P"]
+    return (y | (x & 1) << 255).to_bytes(32, "little")
+
+
+def ed25519_key(seed: int = 0) -> tuple[bytes, int, bytes]:
+    """(public key, secret scalar, nonce prefix) per RFC 8032, derived from `seed`."""
+    g = _contract()
+    digest = hashlib.sha512(hashlib.sha256(f"ed25519-{seed}".encode()).digest()).digest()
+    scalar = int.from_bytes(digest[:32], "little")
+    scalar = (scalar & ((1 << 254) - 8)) | (1 << 254)
+    return _ed_encode(g["_ed_multiply"](scalar, g["_ED_BASE"])), scalar, digest[32:]
+
+
+def ed25519_sign(seed: int, message: bytes) -> bytes:
+    g = _contract()
+    public, scalar, prefix = ed25519_key(seed)
+    order = g["_ED_L"]
+    r = int.from_bytes(hashlib.sha512(prefix + message).digest(), "little") % order
+    encoded_r = _ed_encode(g["_ed_multiply"](r, g["_ED_BASE"]))
+    h = int.from_bytes(hashlib.sha512(encoded_r + public + message).digest(), "little") % order
+    return encoded_r + ((r + h * scalar) % order).to_bytes(32, "little")
+
+
+def doh_answer(name: str, record: str) -> str:
+    """DNS JSON answer carrying `record` as a TXT RRset split into 255-byte strings."""
+    chunks = " ".join(f'"{record[i:i + 255]}"' for i in range(0, len(record), 255))
+    return json.dumps({
+        "Status": 0,
+        "Question": [{"name": f"{name}.", "type": 16}],
+        "Answer": [{"name": f"{name}.", "type": 16, "TTL": 300, "data": chunks}],
+    })
+
+
+class Signer:
+    """Signs messages for one d=/s= pair with a seeded rsa-sha256 or ed25519-sha256 key."""
+
+    def __init__(self, domain: str, selector: str, algorithm: str = "rsa-sha256", seed: int = 0):
+        self.domain = domain
+        self.selector = selector
+        self.algorithm = algorithm
+        self.seed = seed
+
+    @property
+    def name(self) -> str:
+        return f"{self.selector}._domainkey.{self.domain}"
+
+    @property
+    def record(self) -> str:
+        if self.algorithm == "ed25519-sha256":
+            public = ed25519_key(self.seed)[0]
+            return f"v=DKIM1; k=ed25519; p={base64.b64encode(public).decode()}"
+        modulus, exponent, _ = rsa_key(seed=self.seed)
+        der = rsa_public_der(modulus, exponent)
+        return f"v=DKIM1; k=rsa; p={base64.b64encode(der).decode()}"
+
+    def pages(self, resolver: str = DEFAULT_RESOLVER) -> dict[str, str]:
+        return {resolver.format(name=self.name): doh_answer(self.name, self.record)}
+
+    def sign(self, message: str, headers: str = "from:to:subject:date",
+             canonicalization: str = "relaxed/relaxed") -> str:
+        """`message` with a DKIM-Signature field prepended, CRLF line endings."""
+        g = _contract()
+        message = "\r\n".join(g["_LINE_BREAK"].split(message))
+        fields, body = g["_parse_message"](message)
+        header_method, _, body_method = canonicalization.partition("/")
+        body_hash = hashlib.sha256(g["_canon_body"](body, body_method or "simple")).digest()
+        value = (
+            f" v=1; a={self.algorithm}; c={canonicalization}; d={self.domain};"
+            f" s={self.selector};\r\n\th={headers};\r\n"
+            f"\tbh={base64.b64encode(body_hash).decode()};\r\n\tb="
+        )
+        raw = f"DKIM-Signature:{value}"
+        tags = g["_dkim_tags"](value)
+        digest = hashlib.sha256(g["_signed_headers"](tags, raw, fields, header_method)).digest()
+        if self.algorithm == "ed25519-sha256":
+            signature = ed25519_sign(self.seed, digest)
+        else:
+            modulus, _, private = rsa_key(seed=self.seed)
+            size = (modulus.bit_length() + 7) // 8
+            suffix = g["_SHA256_DIGEST_INFO"] + digest
+            padded = b"\x00\x01" + b"\xff" * (size - 3 - len(suffix)) + b"\x00" + suffix
+            signature = pow(int.from_bytes(padded, "big"), private, modulus).to_bytes(size, "big")
+        return f"{raw}{base64.b64encode(signature).decode()}\r\n{message}"
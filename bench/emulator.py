@@ -0,0 +1,432 @@
+"""
+Local stand-in for the `genlayer` runtime.
+
+Contracts are loaded straight from their source files with a fake `genlayer`
+module injected into `sys.modules`, so `from genlayer import *` resolves to the
+types defined here. Write calls run a leader plus N simulated validators
+through the equivalence principles, with web and LLM traffic served by
+pluggable stubs (see `bench.stubs`), and every call is measured.
+
+The deterministic part of a transaction runs once; only the non-deterministic
+blocks are replayed per node. That is enough to count what a call costs
+without modelling the full GenVM.
+"""
+
+import contextlib
+import dataclasses
+import datetime
+import importlib.util
+import io
+import json
+import sys
+import time
+import types
+import typing
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+class ConsensusError(Exception):
+    """Raised when no leader rotation reaches a validator majority."""
+
+
+class NondetError(Exception):
+    """Raised when a nondet primitive is used outside a nondet block."""
+
+
+@dataclasses.dataclass
+class CallStats:
+    contract: str
+    method: str
+    wall_ms: float = 0.0
+    llm_calls: int = 0
+    prompt_bytes: int = 0
+    web_calls: int = 0
+    fetched_bytes: int = 0
+    storage_writes: int = 0
+    rounds: int = 0
+
+
+class _Runtime:
+    """Per-call bookkeeping shared by the fake `genlayer` primitives."""
+
+    def __init__(self):
+        self.network: "Network | None" = None
+        self.stats: CallStats | None = None
+        self.node: int | None = None
+        # `gl.message_raw`; refreshed per call with the transaction time
+        self.message: dict[str, typing.Any] = {}
+
+    def count_write(self, n: int = 1) -> None:
+        if self.stats is None:
+            return
+        if self.node is not None:
+            raise NondetError("storage written from inside a nondet block")
+        self.stats.storage_writes += n
+
+
+_rt = _Runtime()
+
+
+# ---------------------------------------------------------------------------
+# Storage types
+# ---------------------------------------------------------------------------
+
+class u256(int):
+    def __new__(cls, value=0):
+        value = int(value)
+        if not 0 <= value < 2**256:
+            raise OverflowError(f"u256 out of range: {value}")
+        return super().__new__(cls, value)
+
+
+class TreeMap(dict):
+    """Key-ordered map; iteration follows key order like the on-chain tree."""
+
+    def __setitem__(self, key, value):
+        _rt.count_write()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        _rt.count_write()
+        super().__delitem__(key)
+
+    def __iter__(self):
+        return iter(sorted(super().keys()))
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        return (dict.__getitem__(self, k) for k in self)
+
+    def items(self):
+        return ((k, dict.__getitem__(self, k)) for k in self)
+
+
+class DynArray(list):
+    def __setitem__(self, index, value):
+        _rt.count_write()
+        super().__setitem__(index, value)
+
+    def append(self, value):
+        _rt.count_write()
+        super().append(value)
+
+    def pop(self, *args):
+        _rt.count_write()
+        return super().pop(*args)
+
+
+def _storage_fields(cls) -> dict[str, typing.Any]:
+    fields = {}
+    for klass in reversed(cls.__mro__):
+        fields.update(getattr(klass, "__annotations__", {}))
+    return fields
+
+
+def _zero_value(annotation):
+    origin = typing.get_origin(annotation) or annotation
+    if isinstance(origin, type):
+        if issubclass(origin, (TreeMap, DynArray)):
+            return origin()
+        if issubclass(origin, u256):
+            return u256(0)
+        if origin in (str, bool, int, float, bytes):
+            return origin()
+    return None
+
+
+# ---------------------------------------------------------------------------
+# `gl` namespace
+# ---------------------------------------------------------------------------
+
+class Contract:
+    def __setattr__(self, name, value):
+        if name in _storage_fields(type(self)):
+            _rt.count_write()
+        object.__setattr__(self, name, value)
+
+
+class _Public:
+    @staticmethod
+    def write(fn):
+        fn.__gl_public__ = "write"
+        return fn
+
+    @staticmethod
+    def view(fn):
+        fn.__gl_public__ = "view"
+        return fn
+
+
+def _require_nondet(primitive: str) -> "Network":
+    if _rt.node is None or _rt.network is None:
+        raise NondetError(f"{primitive} called outside a nondet block")
+    return _rt.network
+
+
+class _Web:
+    @staticmethod
+    def render(url: str, mode: str = "text") -> str:
+        net = _require_nondet("gl.nondet.web.render")
+        _rt.stats.web_calls += 1
+        body = net.web(url, mode, _rt.node)
+        _rt.stats.fetched_bytes += len(body.encode("utf-8"))
+        return body
+
+
+class _Nondet:
+    web = _Web()
+
+    @staticmethod
+    def exec_prompt(prompt: str) -> str:
+        net = _require_nondet("gl.nondet.exec_prompt")
+        _rt.stats.llm_calls += 1
+        _rt.stats.prompt_bytes += len(prompt.encode("utf-8"))
+        return net.llm(prompt, _rt.node)
+
+
+COMPARATIVE_TEMPLATE = """
+Given the equivalence principle, decide whether the two outputs are equivalent.
+
+Equivalence principle:
+{principle}
+
+Output A:
+{leader}
+
+Output B:
+{validator}
+
+Respond using ONLY JSON: {{ "result": true | false }}
+"""
+
+
+class _EqPrinciple:
+    @staticmethod
+    def strict_eq(fn):
+        net = _require_network()
+        return net.consensus(fn, lambda node, leader: net.run_on(node, fn) == leader)
+
+    @staticmethod
+    def prompt_comparative(fn, principle: str):
+        net = _require_network()
+
+        def validate(node, leader):
+            own = net.run_on(node, fn)
+
+            def judge():
+                prompt = COMPARATIVE_TEMPLATE.format(
+                    principle=principle, leader=leader, validator=own
+                )
+                _rt.stats.llm_calls += 1
+                _rt.stats.prompt_bytes += len(prompt.encode("utf-8"))
+                return net.judge(principle, leader, own, node)
+
+            return net.run_on(node, judge)
+
+        return net.consensus(fn, validate)
+
+
+class Return:
+    """Leader result handed to a `run_nondet` validator."""
+
+    def __init__(self, calldata):
+        self.calldata = calldata
+
+
+class UserError(Exception):
+    def __init__(self, message: str = ""):
+        super().__init__(message)
+        self.message = message
+
+
+class VMError(Exception):
+    pass
+
+
+class _VM:
+    Return = Return
+    UserError = UserError
+    VMError = VMError
+    Result = Return | UserError | VMError
+
+    @staticmethod
+    def run_nondet(leader_fn, validator_fn):
+        net = _require_network()
+
+        def validate(node, leader):
+            try:
+                return bool(net.run_on(node, lambda: validator_fn(Return(leader))))
+            except Exception:
+                return False
+
+        return net.consensus(leader_fn, validate)
+
+    run_nondet_unsafe = run_nondet
+
+
+def _require_network() -> "Network":
+    if _rt.network is None:
+        raise NondetError("consensus requested outside a running transaction")
+    if _rt.node is not None:
+        raise NondetError("nested nondet blocks are not allowed")
+    return _rt.network
+
+
+def _build_module() -> types.ModuleType:
+    gl = types.ModuleType("genlayer.gl")
+    gl.Contract = Contract
+    gl.public = _Public()
+    gl.nondet = _Nondet()
+    gl.eq_principle = _EqPrinciple()
+    gl.vm = _VM()
+    gl.message_raw = _rt.message
+
+    mod = types.ModuleType("genlayer")
+    mod.gl = gl
+    mod.TreeMap = TreeMap
+    mod.DynArray = DynArray
+    mod.u256 = u256
+    mod.__all__ = ["gl", "TreeMap", "DynArray", "u256"]
+    return mod
+
+
+def install() -> types.ModuleType:
+    """Register the fake `genlayer` module (idempotent)."""
+    mod = sys.modules.get("genlayer")
+    if mod is None or not getattr(mod, "__gl_emulator__", False):
+        mod = _build_module()
+        mod.__gl_emulator__ = True
+        sys.modules["genlayer"] = mod
+        sys.modules["genlayer.gl"] = mod.gl
+    return mod
+
+
+def load_contract(path: str | Path) -> type:
+    """Import a contract file and return its `gl.Contract` subclass."""
+    install()
+    path = Path(path)
+    if not path.is_absolute():
+        path = REPO_ROOT / path
+    spec = importlib.util.spec_from_file_location(f"glcontract_{path.stem}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    for value in vars(module).values():
+        if isinstance(value, type) and issubclass(value, Contract) and value is not Contract:
+            if value.__module__ == module.__name__:
+                return value
+    raise LookupError(f"no contract class in {path}")
+
+
+# ---------------------------------------------------------------------------
+# Network
+# ---------------------------------------------------------------------------
+
+class Network:
+    """
+    A leader plus `validators` simulated nodes sharing one contract state.
+
+    `web(url, mode, node)`, `llm(prompt, node)` and
+    `judge(principle, leader, validator, node)` are the pluggable stubs;
+    `clock()` gives the transaction time in Unix seconds.
+    Node 0 leads the first round; on disagreement leadership rotates up to
+    `max_rotations` times before `ConsensusError` is raised.
+    """
+
+    def __init__(self, web, llm, judge=None, validators: int = 4,
+                 max_rotations: int = 2, quiet: bool = True, clock=None):
+        from bench import stubs
+
+        self.web = web
+        self.llm = llm
+        self.judge = judge or stubs.exact_judge
+        self.validators = validators
+        self.max_rotations = max_rotations
+        self.quiet = quiet
+        self.clock = clock or time.time
+        self.history: list[CallStats] = []
+
+    @property
+    def nodes(self) -> int:
+        return self.validators + 1
+
+    def deploy(self, contract: str | Path | type, *args) -> "Deployment":
+        cls = contract if isinstance(contract, type) else load_contract(contract)
+        instance = cls.__new__(cls)
+        for name, annotation in _storage_fields(cls).items():
+            object.__setattr__(instance, name, _zero_value(annotation))
+        deployment = Deployment(self, instance)
+        deployment._invoke("__init__", cls.__init__, args)
+        return deployment
+
+    def run_on(self, node: int, fn):
+        previous = _rt.node
+        _rt.node = node
+        try:
+            return fn()
+        finally:
+            _rt.node = previous
+
+    def consensus(self, leader_fn, validate):
+        for rotation in range(self.max_rotations + 1):
+            _rt.stats.rounds += 1
+            leader = rotation % self.nodes
+            value = self.run_on(leader, leader_fn)
+            others = [n for n in range(self.nodes) if n != leader]
+            agree = sum(1 for node in others if validate(node, value))
+            if agree * 2 > len(others):
+                return value
+        raise ConsensusError(f"no majority after {self.max_rotations + 1} rounds")
+
+
+class Deployment:
+    """A deployed contract instance plus its call log."""
+
+    def __init__(self, network: Network, instance: Contract):
+        self.network = network
+        self.instance = instance
+        self.name = type(instance).__name__
+        self.last_stats: CallStats | None = None
+
+    def write(self, method: str, *args):
+        return self._call(method, "write", args)
+
+    def view(self, method: str, *args):
+        return self._call(method, "view", args)
+
+    def _call(self, method: str, kind: str, args):
+        fn = getattr(type(self.instance), method, None)
+        if getattr(fn, "__gl_public__", None) != kind:
+            raise AttributeError(f"{self.name}.{method} is not a public {kind} method")
+        return self._invoke(method, fn, args)
+
+    def _invoke(self, method: str, fn, args):
+        stats = CallStats(self.name, method)
+        _rt.network, _rt.stats, _rt.node = self.network, stats, None
+        moment = datetime.datetime.fromtimestamp(self.network.clock(), datetime.timezone.utc)
+        _rt.message["datetime"] = moment.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+        sink = io.StringIO() if self.network.quiet else None
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(sink) if sink else contextlib.nullcontext():
+                return fn(self.instance, *args)
+        finally:
+            stats.wall_ms = (time.perf_counter() - start) * 1000
+            _rt.network, _rt.stats, _rt.node = None, None, None
+            self.last_stats = stats
+            self.network.history.append(stats)
+
+    def state(self) -> dict[str, typing.Any]:
+        """Plain-Python snapshot of the storage fields, for inspection."""
+        snapshot = {}
+        for name in _storage_fields(type(self.instance)):
+            value = getattr(self.instance, name, None)
+            if isinstance(value, TreeMap):
+                value = dict(value.items())
+            elif isinstance(value, DynArray):
+                value = list(value)
+            snapshot[name] = value
+        return json.loads(json.dumps(snapshot, default=int))
@@ -0,0 +1,106 @@
+"""
+Record/replay fixtures for `gl.nondet.web.render`, `gl.nondet.exec_prompt`
+and the comparative judge.
+
+A `Corpus` holds every request seen per node and the response it got. Bodies
+are stored once in a content-addressed blob table, and the whole thing is
+written as gzipped JSON, so a corpus of repeated pages stays small:
+
+    corpus = Corpus()
+    net = Network(corpus.recorder("web", live_web), corpus.recorder("llm", live_llm),
+                  judge=corpus.recorder("judge", live_judge))
+    ...
+    corpus.save("fixtures/GitHealth.json.gz")
+
+    corpus = Corpus.load("fixtures/GitHealth.json.gz")
+    net = Network(corpus.replayer("web"), corpus.replayer("llm"),
+                  judge=corpus.replayer("judge"))
+"""
+
+import gzip
+import hashlib
+import json
+from pathlib import Path
+
+KINDS = ("web", "llm", "judge")
+VERSION = 1
+
+
+class FixtureMissing(LookupError):
+    """Replay hit a request that was never recorded."""
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:24]
+
+
+def _request_text(kind: str, args: tuple) -> str:
+    if kind == "web":
+        url, mode = args
+        return f"{mode} {url}"
+    if kind == "llm":
+        return args[0]
+    principle, leader, validator = args
+    return json.dumps([principle, leader, validator], default=str)
+
+
+class Corpus:
+    def __init__(self):
+        self.blobs: dict[str, str] = {}
+        self.entries: dict[str, dict[str, dict]] = {kind: {} for kind in KINDS}
+
+    def _put_blob(self, text: str) -> str:
+        key = _digest(text)
+        self.blobs.setdefault(key, text)
+        return key
+
+    def record(self, kind: str, request: str, node: int, response) -> None:
+        key = _digest(request)
+        entry = self.entries[kind].setdefault(
+            key, {"request": self._put_blob(request), "responses": {}}
+        )
+        entry["responses"][str(node)] = self._put_blob(json.dumps(response))
+
+    def lookup(self, kind: str, request: str, node: int):
+        entry = self.entries[kind].get(_digest(request))
+        if entry is None:
+            raise FixtureMissing(f"{kind} request not in corpus: {request[:80]!r}")
+        responses = entry["responses"]
+        # Replays with more validators than were recorded fall back to node 0.
+        ref = responses.get(str(node)) or responses.get("0") or next(iter(responses.values()))
+        return json.loads(self.blobs[ref])
+
+    def recorder(self, kind: str, inner):
+        def call(*args):
+            *request_args, node = args
+            response = inner(*args)
+            self.record(kind, _request_text(kind, tuple(request_args)), node, response)
+            return response
+        return call
+
+    def replayer(self, kind: str):
+        def call(*args):
+            *request_args, node = args
+            return self.lookup(kind, _request_text(kind, tuple(request_args)), node)
+        return call
+
+    def to_json(self) -> dict:
+        return {"version": VERSION, "blobs": self.blobs, **self.entries}
+
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = json.dumps(self.to_json(), separators=(",", ":"), sort_keys=True)
+        # mtime=0 keeps the file byte-identical across re-recordings.
+        path.write_bytes(gzip.compress(payload.encode("utf-8"), mtime=0))
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Corpus":
+        data = json.loads(gzip.decompress(Path(path).read_bytes()))
+        if data.get("version") != VERSION:
+            raise ValueError(f"unsupported corpus version {data.get('version')}")
+        corpus = cls()
+        corpus.blobs = data["blobs"]
+        for kind in KINDS:
+            corpus.entries[kind] = data.get(kind, {})
+        return corpus
@@ -0,0 +1,131 @@
+"""
+Local stand-in for the GitHub REST endpoints GitHealth reads in "api" mode
+and in sweeps: repository records, org listings and branch heads.
+
+Serves canned repository records over real HTTP on 127.0.0.1, so the
+contract can be exercised end to end through `HttpWeb` without network
+access or rate limits:
+
+    from bench.github_api import GitHubStandIn, repo_record
+    with GitHubStandIn({"psf/requests": repo_record("psf/requests", pushed_days_ago=21,
+                                                     open_issues=273)}) as api:
+        net = Network(HttpWeb(), ScriptedLLM([]))
+        net.deploy("git_health.py", "api", api.url).write(
+            "analyze_repo", "https://github.com/psf/requests")
+
+    python -m bench.github_api --port 8765    # serve the GitHealthApi scenario repos
+
+Unknown paths answer 404 with GitHub's error body. `repos` may be changed
+while the server runs; a branch head SHA is derived from the repository name
+and push time unless the record carries a "head_sha" override, so a new push
+moves the head.
+"""
+
+import argparse
+import datetime
+import hashlib
+import http.server
+import json
+import sys
+import threading
+import urllib.parse
+
+
+def repo_record(full_name: str, pushed_days_ago: float = 0.0, open_issues: int = 0,
+                now: datetime.datetime | None = None) -> dict:
+    """A /repos/{owner}/{repo} record carrying the fields GitHub returns for them."""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    pushed = now - datetime.timedelta(days=pushed_days_ago)
+    owner, name = full_name.split("/")
+    return {
+        "name": name,
+        "full_name": full_name,
+        "owner": {"login": owner},
+        "html_url": f"https://github.com/{full_name}",
+        "default_branch": "main",
+        "pushed_at": pushed.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "open_issues_count": open_issues,
+        "archived": False,
+    }
+
+
+def respond(repos: dict[str, dict], path: str) -> tuple[int, object]:
+    """(HTTP status, JSON body) for a GET of `path` (with query) against `repos`."""
+    parsed = urllib.parse.urlsplit(path)
+    parts = [p for p in parsed.path.split("/") if p]
+    query = urllib.parse.parse_qs(parsed.query)
+    if len(parts) == 3 and parts[0] == "orgs" and parts[2] == "repos":
+        per_page = min(int(query.get("per_page", ["30"])[0]), 100)
+        page = max(int(query.get("page", ["1"])[0]), 1)
+        owned = [repos[name] for name in sorted(repos) if name.split("/")[0] == parts[1]]
+        if owned:
+            listing = owned[(page - 1) * per_page:page * per_page]
+            return 200, [{k: v for k, v in r.items() if k != "head_sha"} for r in listing]
+    elif len(parts) >= 3 and parts[0] == "repos":
+        record = repos.get(f"{parts[1]}/{parts[2]}")
+        if record is not None and len(parts) == 3:
+            return 200, {k: v for k, v in record.items() if k != "head_sha"}
+        if record is not None and len(parts) == 5 and parts[3] == "branches" \
+                and parts[4] == record["default_branch"]:
+            seed = f"{record['full_name']}@{record['pushed_at']}".encode()
+            sha = record.get("head_sha") or hashlib.sha1(seed).hexdigest()
+            return 200, {"name": parts[4], "commit": {"sha": sha}, "protected": False}
+    return 404, {"message": "Not Found", "documentation_url": "https://docs.github.com/rest"}
+
+
+class GitHubStandIn:
+    """Threaded HTTP server answering the `respond` routes from `repos`."""
+
+    def __init__(self, repos: dict[str, dict] | None = None, port: int = 0):
+        self.repos = repos if repos is not None else {}
+        repos_ref = self.repos
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, body = respond(repos_ref, self.path)
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "GitHubStandIn":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main(argv=None) -> int:
+    from bench.scenarios import GITHUB_REPOS
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    repos = {name: repo_record(name, days, issues) for name, (days, issues) in GITHUB_REPOS.items()}
+    with GitHubStandIn(repos, args.port) as api:
+        print(f"serving {len(repos)} repositories at {api.url}/repos/<owner>/<repo>")
+        try:
+            api.thread.join()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+"""
+Static prompt-cost profiler.
+
+Walks every contract's AST, finds each `gl.nondet.exec_prompt(...)` call site
+and bounds the prompt it sends: the fixed template text, every interpolation
+with its size bound, and the worst case in characters and estimated tokens.
+Slices such as `web_content[:6000]` give exact bounds; raw user arguments and
+unsliced fetches have none, so they are charged `--unbounded-cap` characters
+and flagged. Comparator prompts passed to `prompt_comparative` are sized from
+the principle text plus two outputs of `--output-cap` characters.
+
+    python -m bench.prompt_cost              # ranking table
+    python -m bench.prompt_cost --detail     # per call site breakdown
+"""
+
+import argparse
+import ast
+import dataclasses
+import json
+import sys
+from pathlib import Path
+
+from bench.emulator import COMPARATIVE_TEMPLATE, REPO_ROOT
+
+# Rendered width of scalar arguments, which need no cap.
+SCALAR_CHARS = {"bool": 5, "int": 20, "float": 24}
+
+
+@dataclasses.dataclass
+class Bound:
+    chars: int = 0
+    unbounded: list[str] = dataclasses.field(default_factory=list)
+
+    def __add__(self, other: "Bound") -> "Bound":
+        return Bound(self.chars + other.chars, self.unbounded + other.unbounded)
+
+
+@dataclasses.dataclass
+class Interpolation:
+    expr: str
+    chars: int
+    unbounded: bool
+
+
+@dataclasses.dataclass
+class PromptSite:
+    line: int
+    method: str
+    function: str
+    template_chars: int
+    interpolations: list[Interpolation]
+    worst_chars: int
+
+    @property
+    def unbounded(self) -> list[str]:
+        return [i.expr for i in self.interpolations if i.unbounded]
+
+
+@dataclasses.dataclass
+class ContractCost:
+    contract: str
+    path: str
+    prompts: list[PromptSite]
+    comparators: list[tuple[int, str, int]]  # (line, method, principle chars)
+
+    @property
+    def methods(self) -> list[str]:
+        seen = [p.method for p in self.prompts] + [c[1] for c in self.comparators]
+        return list(dict.fromkeys(seen))
+
+
+def _dotted(node) -> str:
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name):
+        parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+class _Scope:
+    """Assignments and parameters of one function, innermost first in a chain."""
+
+    def __init__(self, fn: ast.FunctionDef, parent: "_Scope | None"):
+        self.fn = fn
+        self.parent = parent
+        self.method = parent.method if parent is not None else fn.name
+        self.params = {a.arg: a.annotation for a in fn.args.args + fn.args.kwonlyargs}
+        self.assigns: dict[str, list[ast.expr]] = {}
+        for node in ast.walk(fn):
+            if node is not fn and isinstance(node, (ast.FunctionDef, ast.Lambda)):
+                continue
+            if isinstance(node, ast.Assign):
+                for target in node.targets:
+                    if isinstance(target, ast.Name):
+                        self.assigns.setdefault(target.id, []).append(node.value)
+
+    def lookup(self, name: str):
+        scope = self
+        while scope is not None:
+            if name in scope.assigns:
+                return "assign", scope.assigns[name], scope
+            if name in scope.params:
+                return "param", scope.params[name], scope
+            scope = scope.parent
+        return None, None, None
+
+
+class Profiler:
+    def __init__(self, unbounded_cap: int, module: ast.Module):
+        self.cap = unbounded_cap
+        self.constants = {}
+        for node in module.body:
+            if isinstance(node, ast.Assign) and len(node.targets) == 1:
+                target = node.targets[0]
+                if isinstance(target, ast.Name):
+                    self.constants[target.id] = node.value
+
+    def bound(self, expr, scope: _Scope, seen=frozenset()) -> Bound:
+        if isinstance(expr, ast.Constant):
+            return Bound(len(str(expr.value)))
+        if isinstance(expr, ast.JoinedStr):
+            total = Bound()
+            for part in expr.values:
+                if isinstance(part, ast.Constant):
+                    total += Bound(len(part.value))
+                else:
+                    total += self.bound(part.value, scope, seen)
+            return total
+        if isinstance(expr, ast.FormattedValue):
+            return self.bound(expr.value, scope, seen)
+        if isinstance(expr, ast.BinOp) and isinstance(expr.op, ast.Add):
+            return self.bound(expr.left, scope, seen) + self.bound(expr.right, scope, seen)
+        if isinstance(expr, ast.Subscript) and isinstance(expr.slice, ast.Slice):
+            upper = expr.slice.upper
+            if expr.slice.lower is None and isinstance(upper, ast.Constant) and isinstance(upper.value, int):
+                inner = self.bound(expr.value, scope, seen)
+                if inner.unbounded or inner.chars > upper.value:
+                    return Bound(upper.value)
+                return inner
+        if isinstance(expr, ast.Name) and expr.id not in seen:
+            kind, values, owner = scope.lookup(expr.id)
+            if kind == "assign":
+                options = [self.bound(v, owner, seen | {expr.id}) for v in values]
+                return max(options, key=lambda b: (bool(b.unbounded), b.chars))
+            if kind == "param" and isinstance(values, ast.Name) and values.id in SCALAR_CHARS:
+                return Bound(SCALAR_CHARS[values.id])
+            if kind is None and expr.id in self.constants:
+                return self.bound(self.constants[expr.id], scope, seen | {expr.id})
+        if isinstance(expr, (ast.List, ast.Tuple)):
+            try:
+                return Bound(len(json.dumps(ast.literal_eval(expr))))
+            except ValueError:
+                pass
+        if isinstance(expr, ast.Call) and _dotted(expr.func) == "json.dumps" and expr.args:
+            inner = expr.args[0]
+            if isinstance(inner, ast.Name):
+                kind, values, owner = scope.lookup(inner.id)
+                if kind == "assign" and len(values) == 1:
+                    return self.bound(values[0], owner, seen | {inner.id})
+            return self.bound(inner, scope, seen)
+        return Bound(self.cap, [ast.unparse(expr)])
+
+    def interpolations(self, expr, scope: _Scope) -> tuple[int, list[Interpolation]]:
+        """Split a prompt expression into fixed text and bounded interpolations."""
+        if isinstance(expr, ast.Name):
+            kind, values, owner = scope.lookup(expr.id)
+            if kind == "assign" and len(values) == 1:
+                return self.interpolations(values[0], owner)
+        if isinstance(expr, ast.JoinedStr):
+            fixed, parts = 0, []
+            for part in expr.values:
+                if isinstance(part, ast.Constant):
+                    fixed += len(part.value)
+                else:
+                    b = self.bound(part.value, scope)
+                    parts.append(Interpolation(ast.unparse(part.value), b.chars, bool(b.unbounded)))
+            return fixed, parts
+        b = self.bound(expr, scope)
+        if isinstance(expr, ast.Constant):
+            return b.chars, []
+        return 0, [Interpolation(ast.unparse(expr), b.chars, bool(b.unbounded))]
+
+
+def profile_file(path: Path, unbounded_cap: int) -> ContractCost | None:
+    module = ast.parse(path.read_text(), filename=str(path))
+    contract = next(
+        (n.name for n in module.body if isinstance(n, ast.ClassDef)
+         and any(_dotted(b).endswith("Contract") for b in n.bases)),
+        None,
+    )
+    if contract is None:
+        return None
+    profiler = Profiler(unbounded_cap, module)
+    prompts, comparators = [], []
+
+    def visit(node, scope):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                visit(child, _Scope(child, scope))
+                continue
+            if isinstance(child, ast.Call) and scope is not None:
+                name = _dotted(child.func)
+                if name == "gl.nondet.exec_prompt" and child.args:
+                    fixed, parts = profiler.interpolations(child.args[0], scope)
+                    prompts.append(PromptSite(
+                        line=child.lineno,
+                        method=scope.method,
+                        function=scope.fn.name,
+                        template_chars=fixed,
+                        interpolations=parts,
+                        worst_chars=fixed + sum(p.chars for p in parts),
+                    ))
+                elif name == "gl.eq_principle.prompt_comparative" and len(child.args) > 1:
+                    principle = profiler.bound(child.args[1], scope)
+                    comparators.append((child.lineno, scope.method, principle.chars))
+            visit(child, scope)
+
+    visit(module, None)
+    return ContractCost(contract, path.name, prompts, comparators)
+
+
+def profile_repo(unbounded_cap: int = 4000, root: Path = REPO_ROOT) -> list[ContractCost]:
+    costs = []
+    for path in sorted(root.glob("*.py")):
+        cost = profile_file(path, unbounded_cap)
+        if cost is not None:
+            costs.append(cost)
+    return costs
+
+
+def transaction_tokens(cost: ContractCost, method: str, validators: int, output_cap: int,
+                       chars_per_token: float) -> tuple[int, int]:
+    """Worst-case (prompt chars per node, tokens per transaction across all nodes) of one method."""
+    node_chars = sum(p.worst_chars for p in cost.prompts if p.method == method)
+    comparator_chars = sum(
+        len(COMPARATIVE_TEMPLATE) + principle + 2 * output_cap
+        for _, owner, principle in cost.comparators if owner == method
+    )
+    tx_chars = node_chars * (validators + 1) + comparator_chars * validators
+    return node_chars, round(tx_chars / chars_per_token)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--validators", type=int, default=4)
+    parser.add_argument("--unbounded-cap", type=int, default=4000,
+                        help="chars charged for an interpolation with no static bound")
+    parser.add_argument("--output-cap", type=int, default=500,
+                        help="chars assumed per output shown to a comparator")
+    parser.add_argument("--chars-per-token", type=float, default=4.0)
+    parser.add_argument("--detail", action="store_true")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    costs = profile_repo(args.unbounded_cap)
+    rows = []
+    for cost in costs:
+        # A transaction runs one method, so the contract is ranked by its costliest one.
+        per_method = {
+            method: transaction_tokens(cost, method, args.validators, args.output_cap,
+                                       args.chars_per_token)
+            for method in cost.methods
+        }
+        worst_method, (node_chars, tx_tokens) = max(
+            per_method.items(), key=lambda item: item[1][1], default=("-", (0, 0))
+        )
+        rows.append({
+            "contract": cost.contract,
+            "worst_method": worst_method,
+            "prompt_sites": len(cost.prompts),
+            "template_chars": sum(p.template_chars for p in cost.prompts),
+            "worst_chars": node_chars,
+            "worst_tokens": round(node_chars / args.chars_per_token),
+            "unbounded": sum(len(p.unbounded) for p in cost.prompts),
+            "comparator_chars": sum(c for _, _, c in cost.comparators),
+            "tx_tokens": tx_tokens,
+            "sites": [dataclasses.asdict(p) for p in cost.prompts],
+        })
+    rows.sort(key=lambda r: r["tx_tokens"], reverse=True)
+
+    if args.json:
+        json.dump(rows, sys.stdout, indent=2)
+        print()
+        return 0
+
+    columns = ("worst_method", "prompt_sites", "template_chars", "worst_chars", "worst_tokens",
+               "unbounded", "comparator_chars", "tx_tokens")
+    print(_table(rows, ("contract",) + columns))
+    if args.detail:
+        for row in rows:
+            for site in row["sites"]:
+                print(f"\n{row['contract']} line {site['line']} ({site['function']}): "
+                      f"template {site['template_chars']} chars, worst {site['worst_chars']}")
+                for part in site["interpolations"]:
+                    flag = "  UNBOUNDED" if part["unbounded"] else ""
+                    print(f"    {{{part['expr']}}}  <= {part['chars']}{flag}")
+    return 0
+
+
+def _table(rows: list[dict], columns: tuple) -> str:
+    cells = [columns] + [tuple(str(r[c]) for c in columns) for r in rows]
+    widths = [max(len(line[i]) for line in cells) for i in range(len(columns))]
+    lines = ["  ".join(cell.ljust(w) for cell, w in zip(line, widths)) for line in cells]
+    lines.insert(1, "  ".join("-" * w for w in widths))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Regression benchmarks against a stored baseline.
+
+    python -m bench.regress                           # stub backends vs baseline
+    python -m bench.regress --record fixtures/ --live # capture live traffic
+    python -m bench.regress --replay fixtures/        # deterministic replay vs baseline
+    python -m bench.regress --update-baseline
+
+`--live` reads BENCH_LLM_URL, BENCH_LLM_MODEL and BENCH_LLM_KEY for an
+OpenAI-compatible endpoint. Call counts, rounds and storage writes may not
+grow; byte totals may grow by at most `--bytes-tolerance`; median wall time
+fails only when it is both `--time-factor` times and `--time-slack-ms` above
+the baseline, since it is the noisiest column.
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+from bench.emulator import Network
+from bench.fixtures import Corpus
+from bench.run import COLUMNS, format_table, run_scenario, stub_backends
+from bench.scenarios import SCENARIOS
+from bench.stubs import ChatLLM, HttpWeb, LLMJudge, exact_judge
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+EXACT_COLUMNS = ("llm_calls", "web_calls", "storage_writes", "rounds")
+BYTE_COLUMNS = ("prompt_bytes", "fetched_bytes")
+
+
+def live_backends() -> dict:
+    llm = ChatLLM(
+        os.environ["BENCH_LLM_URL"],
+        os.environ.get("BENCH_LLM_MODEL", "gpt-4o-mini"),
+        os.environ.get("BENCH_LLM_KEY", ""),
+    )
+    return {"web": HttpWeb(), "llm": llm, "judge": LLMJudge(llm)}
+
+
+def collect(args) -> list[dict]:
+    rows = []
+    for name, scenario in SCENARIOS.items():
+        if args.only and name not in args.only:
+            continue
+        corpus_path = Path(args.replay or args.record or ".") / f"{name}.json.gz"
+        if args.replay:
+            corpus = Corpus.load(corpus_path)
+            backends = {kind: corpus.replayer(kind) for kind in ("web", "llm", "judge")}
+        else:
+            backends = live_backends() if args.live else stub_backends(scenario)
+            backends.setdefault("judge", exact_judge)
+            if args.record:
+                corpus = Corpus()
+                backends = {kind: corpus.recorder(kind, fn) for kind, fn in backends.items()}
+        network = Network(validators=args.validators, **backends)
+        rows.extend(run_scenario(name, scenario, network, args.repeat))
+        if args.record:
+            corpus.save(corpus_path)
+    return rows
+
+
+def compare(rows: list[dict], baseline: list[dict], args) -> list[str]:
+    """
+    Return one human-readable line per regression. A row with no baseline
+    entry is one too, and so, on a full run, is a baseline entry that no
+    longer runs, so new and renamed scenarios cannot pass unchecked.
+    """
+    indexed = {(r["contract"], r["method"]): r for r in baseline}
+    problems = []
+    for row in rows:
+        where = f"{row['contract']}.{row['method']}"
+        base = indexed.get((row["contract"], row["method"]))
+        if base is None:
+            problems.append(f"{where}: missing from baseline (run --update-baseline)")
+            continue
+        for column in EXACT_COLUMNS:
+            if row[column] > base[column]:
+                problems.append(f"{where}: {column} {base[column]} -> {row[column]}")
+        for column in BYTE_COLUMNS:
+            if row[column] > base[column] * (1 + args.bytes_tolerance):
+                problems.append(f"{where}: {column} {base[column]} -> {row[column]}")
+        if (row["wall_ms"] > base["wall_ms"] * args.time_factor
+                and row["wall_ms"] - base["wall_ms"] > args.time_slack_ms):
+            problems.append(f"{where}: wall_ms {base['wall_ms']:.2f} -> {row['wall_ms']:.2f}")
+    if not args.only:
+        ran = {(r["contract"], r["method"]) for r in rows}
+        problems.extend(f"{contract}.{method}: in baseline but not run"
+                        for contract, method in indexed if (contract, method) not in ran)
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--record", metavar="DIR", help="write one corpus per contract to DIR")
+    source.add_argument("--replay", metavar="DIR", help="serve web/LLM traffic from DIR")
+    parser.add_argument("--live", action="store_true", help="use live HTTP and LLM backends")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("-n", "--validators", type=int, default=4)
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    parser.add_argument("--only", action="append")
+    parser.add_argument("--bytes-tolerance", type=float, default=0.02)
+    parser.add_argument("--time-factor", type=float, default=3.0)
+    parser.add_argument("--time-slack-ms", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    rows = collect(args)
+    print(format_table(rows))
+
+    if args.update_baseline:
+        trimmed = [{k: row[k] for k in ("contract", "method") + COLUMNS} for row in rows]
+        for row in trimmed:
+            row["wall_ms"] = round(row["wall_ms"], 3)
+        args.baseline.write_text(json.dumps(trimmed, indent=1) + "\n")
+        print(f"\nbaseline written to {args.baseline}")
+        return 0
+
+    problems = compare(rows, json.loads(args.baseline.read_text()), args)
+    if problems:
+        print("\nREGRESSIONS:")
+        print("\n".join(f"  {line}" for line in problems))
+        return 1
+    print("\nno regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
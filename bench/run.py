@@ -0,0 +1,89 @@
+"""
+Benchmark every contract's public methods on the local emulator.
+
+    python -m bench.run                 # all contracts, 4 validators
+    python -m bench.run -n 9 -r 5       # 9 validators, 5 repetitions
+    python -m bench.run --only GitHealth --json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+
+from bench.emulator import Network
+from bench.scenarios import SCENARIOS, Scenario
+from bench.stubs import ScriptedLLM, StaticWeb
+
+COLUMNS = ("wall_ms", "llm_calls", "prompt_bytes", "web_calls",
+           "fetched_bytes", "storage_writes", "rounds")
+
+
+def stub_backends(scenario: Scenario) -> dict:
+    return {"web": StaticWeb(scenario.pages, scenario.prefixes), "llm": ScriptedLLM(scenario.llm)}
+
+
+def build_network(scenario: Scenario, validators: int) -> Network:
+    return Network(validators=validators, **stub_backends(scenario))
+
+
+def run_scenario(name: str, scenario: Scenario, network: Network, repeat: int = 1) -> list[dict]:
+    """Run the scenario `repeat` times on `network`; one row per public method."""
+    samples: dict[str, list] = {}
+    for _ in range(repeat):
+        deployment = network.deploy(scenario.contract, *scenario.deploy_args)
+        for kind, method, args in scenario.calls:
+            getattr(deployment, kind)(method, *args)
+            samples.setdefault(method, []).append(deployment.last_stats)
+
+    rows = []
+    for method, stats in samples.items():
+        row = {"contract": name, "method": method}
+        for column in COLUMNS:
+            values = [getattr(s, column) for s in stats]
+            row[column] = statistics.median(values) if column == "wall_ms" else max(values)
+        rows.append(row)
+    return rows
+
+
+def run_all(validators: int = 4, repeat: int = 1, only: list[str] | None = None) -> list[dict]:
+    rows = []
+    for name, scenario in SCENARIOS.items():
+        if only and name not in only:
+            continue
+        rows.extend(run_scenario(name, scenario, build_network(scenario, validators), repeat))
+    return rows
+
+
+def format_table(rows: list[dict]) -> str:
+    header = ("contract", "method") + COLUMNS
+    cells = [header]
+    for row in rows:
+        cells.append(tuple(
+            f"{row[c]:.2f}" if c == "wall_ms" else str(row[c]) for c in header
+        ))
+    widths = [max(len(line[i]) for line in cells) for i in range(len(header))]
+    lines = ["  ".join(cell.ljust(w) for cell, w in zip(line, widths)) for line in cells]
+    lines.insert(1, "  ".join("-" * w for w in widths))
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--validators", type=int, default=4)
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    parser.add_argument("--only", action="append", help="contract class name (repeatable)")
+    parser.add_argument("--json", action="store_true", help="emit JSON rows instead of a table")
+    args = parser.parse_args(argv)
+
+    rows = run_all(args.validators, args.repeat, args.only)
+    if args.json:
+        json.dump(rows, sys.stdout, indent=2)
+        print()
+    else:
+        print(format_table(rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
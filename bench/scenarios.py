@@ -0,0 +1,465 @@
+"""
+Representative offline workloads, one per contract.
+
+Each scenario pairs a contract file with the pages its fetches resolve to,
+the LLM replies its prompts get, and the sequence of public calls to run.
+Pages are padded with filler so the truncation slices in the contracts
+(`[:4000]`, `[:6000]`, `[:10000]`) are actually exercised.
+"""
+
+import dataclasses
+import datetime
+import json
+
+from bench.dkim import Signer
+from bench.github_api import repo_record, respond
+from bench.stubs import WebError, fenced
+
+_WORDS = (
+    "the agreement party shall notice term service data provider section "
+    "clause user rights obligations liability payment schedule update release"
+).split()
+
+
+def filler(size: int, seed: int = 0) -> str:
+    """Deterministic prose-like text of exactly `size` characters."""
+    out, i = [], seed
+    length = 0
+    while length < size:
+        word = _WORDS[(i * 7 + seed) % len(_WORDS)]
+        out.append(word)
+        length += len(word) + 1
+        i += 1
+    text = " ".join(out)
+    return text[:size]
+
+
+@dataclasses.dataclass
+class Scenario:
+    contract: str
+    calls: list[tuple[str, str, tuple]]
+    pages: dict = dataclasses.field(default_factory=dict)
+    prefixes: dict = dataclasses.field(default_factory=dict)
+    llm: list = dataclasses.field(default_factory=list)
+    deploy_args: tuple = ()
+
+
+# GitHub repositories served in "api" mode: full name -> (days since push, open issues)
+GITHUB_REPOS = {
+    "psf/requests": (21, 273),
+    "psf/black": (2, 1210),
+    "psf/pyperformance": (45, 48),
+    "pallets/flask": (3, 9),
+    "pypa/sampleproject": (240, 31),
+    "kennethreitz/records": (900, 412),
+}
+
+# Built once, so push times and derived head SHAs hold still between sweeps
+_GITHUB_RECORDS = {name: repo_record(name, days, issues) for name, (days, issues) in GITHUB_REPOS.items()}
+
+
+def _github_api(url: str, node: int) -> str:
+    status, body = respond(_GITHUB_RECORDS, url[len("https://api.github.com"):])
+    if status != 200:
+        raise WebError(f"HTTP {status} for {url}")
+    return json.dumps(body)
+
+
+SNAPSHOT_JSON = json.dumps({"data": {"proposal": {
+    "choices": ["For", "Against", "Abstain"],
+    "scores": [1250000.5, 310000.25, 12000.0],
+    "scores_total": 1572000.75,
+    "state": "closed",
+    "body": filler(3000, 3),
+    "space": {"id": "ens.eth", "name": "ENS"},
+}}})
+
+DKIM_SIGNERS = {
+    "example.com": Signer("example.com", "sel1"),
+    "example.org": Signer("example.org", "ed1", "ed25519-sha256", seed=1),
+    "relay.example.net": Signer("relay.example.net", "relay", seed=2),
+}
+
+
+def _mail(i: int, user: str, domain: str, signer: str | None) -> str:
+    message = (f"From: {user.title()} <{user}@{domain}>\nTo: team@example.net\n"
+               f"Subject: message {i}\n\n{filler(400, i)}\n")
+    return DKIM_SIGNERS[signer].sign(message) if signer else message
+
+
+# Small archive: signed, relayed (unaligned), unsigned and tampered messages
+MAILBOX = "".join(
+    f"From {user}@{domain} Mon Oct 12 10:00:00 2026\n"
+    + _mail(i, user, domain, signer).replace("\r\n", "\n").replace("shall", "may" if i == 4 else "shall")
+    + "\n"
+    for i, (user, domain, signer) in enumerate([
+        ("alice", "example.com", "example.com"),
+        ("bob", "example.org", "example.org"),
+        ("carol", "example.org", "relay.example.net"),
+        ("dave", "example.org", None),
+    ] * 5)
+)
+
+# The ECB reference currencies priced in USD, as Frankfurter publishes them
+FX_RATES = {
+    "AUD": 1.5123, "BGN": 1.8019, "BRL": 5.4312, "CAD": 1.3781, "CHF": 0.8612,
+    "CNY": 7.1204, "CZK": 23.311, "DKK": 6.8722, "EUR": 0.9213, "GBP": 0.7864,
+    "HKD": 7.7712, "HUF": 367.45, "IDR": 15612.0, "ILS": 3.7521, "INR": 83.912,
+    "ISK": 137.21, "JPY": 149.62, "KRW": 1362.5, "MXN": 19.612, "MYR": 4.2931,
+    "NOK": 10.912, "NZD": 1.6521, "PHP": 57.812, "PLN": 3.9912, "RON": 4.5821,
+    "SEK": 10.512, "SGD": 1.3121, "THB": 33.612, "TRY": 34.221, "ZAR": 18.123,
+}
+
+
+
+class _DailyRates:
+    """
+    Frankfurter page that moves to the next business day, with slightly
+    drifted rates, each time the round-0 leader (node 0) fetches it, so
+    every update_rates call in a scenario lands on a new snapshot.
+    """
+
+    def __init__(self, start: str = "2026-10-12"):
+        self.day = datetime.date.fromisoformat(start) - datetime.timedelta(days=1)
+        self.step = -1
+
+    def __call__(self, url: str, node: int) -> str:
+        if node == 0:
+            self.step += 1
+            self.day += datetime.timedelta(days=3 if self.day.weekday() == 4 else 1)
+        drift = 1 + ((self.step * 7) % 5 - 2) / 1000
+        rates = {code: round(rate * drift, 4) for code, rate in FX_RATES.items()}
+        return json.dumps({"amount": 1.0, "base": "USD", "date": self.day.isoformat(), "rates": rates})
+
+
+LEGAL_CLAUSE = (
+    "12. Indemnification. The Provider shall indemnify and hold harmless the "
+    "Customer from any third-party claim arising out of the Provider's breach."
+)
+
+def _varied_per_node(prompt: str, node: int) -> str:
+    """Same behaviour written differently per node, as models vary naming and structure."""
+    if node % 2 == 0:
+        name, arg = ("reverse_list", "items") if node % 4 == 0 else ("reverse_items", "values")
+        return f"```python\ndef {name}({arg}):\n    return list(reversed({arg}))\n```"
+    return (
+        "```python\ndef reverse_list(items):\n    out = []\n    for item in items:\n"
+        "        out.insert(0, item)\n    return out\n```"
+    )
+
+
+_EXPLANATIONS = (
+    "The provider pays if someone else sues you because the provider broke the deal.",
+    "The provider pays if someone else sues you because the provider broke the deal",
+    "If a third party sues you over the provider breaking the contract, the provider covers it.",
+)
+
+
+def _explained_per_node(prompt: str, node: int) -> str:
+    """Exact, near-identical and paraphrased explanations, as nodes would word them."""
+    return fenced({"explanation": _EXPLANATIONS[min(node, 2)]})
+
+
+# Known sentence translations; anything else comes back tagged "[en]"
+_GLOSSARY = {"Guten Morgen.": "Good morning.", "Muchas gracias.": "Thank you very much."}
+
+# Eight paragraphs of twelve sentences: several chunks at the default token budget
+LONG_DOCUMENT = "\n\n".join(
+    " ".join(f"Absatz {p} Satz {s} {filler(60 + 9 * s, p + s)}." for s in range(12))
+    for p in range(8)
+)
+
+
+def _translate_list(prompt: str, node: int) -> str:
+    """Batch reply with one translation per entry of the prompt's JSON list."""
+    start = prompt.index("[", prompt.index("standard English:"))
+    texts, _ = json.JSONDecoder().raw_decode(prompt, start)
+    return fenced({"translations": [_GLOSSARY.get(t, f"[en] {t}") for t in texts]})
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "CodeGen": Scenario(
+        contract="code_gen.py",
+        llm=[
+            ("decide whether the two code snippets are equivalent", fenced({"equivalent": True})),
+            ("Act as a Python Developer", _varied_per_node),
+        ],
+        calls=[
+            ("write", "generate_python", ("reverse a list",)),
+            ("write", "generate_python", ("Please reverse the list.",)),
+            ("view", "get_code", ("Reverse the lists",)),
+        ],
+    ),
+    "EmailAuth": Scenario(
+        contract="email_auth.py",
+        pages={k: v for s in DKIM_SIGNERS.values() for k, v in s.pages().items()},
+        prefixes={"https://dns.google/resolve": json.dumps({"Status": 3})},
+        llm=[("Email Security Analyst", fenced({"is_aligned": True}))],
+        calls=[
+            ("write", "verify_dkim", (_mail(100, "bob", "example.com", "example.com"),)),
+            # Not a header block: falls back to the LLM
+            ("write", "verify_dkim", ("signed by example.com, sent as bob at example.com",)),
+            ("write", "verify_mailbox", (MAILBOX,)),
+            ("view", "get_mailbox_summary", ()),
+        ],
+    ),
+    "FrankfurterOracle": Scenario(
+        contract="forex_oracle.py",
+        deploy_args=(",".join(FX_RATES),),
+        pages={f"https://api.frankfurter.app/latest?from=USD&to={','.join(FX_RATES)}": _DailyRates()},
+        calls=[
+            *[("write", "update_rates", ())] * 5,
+            ("view", "get_rates", ()),
+            ("view", "get_raw_rates", ()),
+            ("view", "get_rates", ("EUR,GBP,JPY",)),
+            ("view", "get_currencies", ()),
+            ("view", "get_history_bounds", ()),
+            ("view", "get_rate_on", ("2026-10-17", "EUR,JPY")),
+            ("view", "get_twap", ("2026-10-12", "2026-10-19")),
+            ("view", "get_range", ("2026-10-12", "2026-10-18")),
+            ("view", "get_cross_rate", ("EUR", "JPY")),
+            ("view", "get_cross_rate", ("gbp", "usd")),
+            ("view", "get_cross_matrix", ()),
+        ],
+    ),
+    "GitHealth": Scenario(
+        contract="git_health.py",
+        pages={"https://github.com/psf/requests": (
+            "psf/requests Code Issues 212 Pull requests 61 Actions "
+            "Latest commit 3 weeks ago " + filler(12000, 1)
+        )},
+        llm=[("Code Repository Auditor", fenced({
+            "reasoning": "Commit within a month, 212 issues -> -20", "health_score": 80,
+        }))],
+        calls=[
+            ("write", "analyze_repo", ("https://github.com/psf/requests",)),
+            ("view", "get_score", ("https://github.com/psf/requests",)),
+        ],
+    ),
+    "GitHealthApi": Scenario(
+        contract="git_health.py",
+        deploy_args=("api",),
+        prefixes={"https://api.github.com/": _github_api},
+        calls=[
+            *[("write", "analyze_repo", (f"https://github.com/{name}",)) for name in GITHUB_REPOS],
+            ("write", "analyze_repo", ("https://github.com/psf/requests.git",)),
+            ("write", "analyze_repo", ("https://github.com/psf/requests",)),
+            ("write", "analyze_repo", ("https://github.com/example/missing",)),
+            ("view", "get_score", ("https://github.com/psf/requests",)),
+            ("write", "sweep", ("psf",)),
+            ("write", "sweep", ("pallets/flask, https://github.com/pypa/sampleproject kennethreitz/records",)),
+            ("write", "sweep", ("psf",)),
+            ("view", "top_k", (3,)),
+            ("view", "bottom_k", (3,)),
+        ],
+    ),
+    "GlobalText": Scenario(
+        contract="global_text.py",
+        llm=[
+            ("decide whether the two outputs are equivalent", fenced({"equivalent": True})),
+            ("Translate each text", _translate_list),
+            ("Wie spät ist es", fenced({"translation": "What time is it?"})),
+            ("Professional Translator", fenced({"translation": "Hello, how are you today?"})),
+        ],
+        calls=[
+            ("write", "translate_to_english", ("Bonjour, comment allez-vous aujourd'hui ?",)),
+            ("write", "submit", ("Guten Morgen.",)),
+            ("write", "submit", ("Muchas gracias.",)),
+            ("write", "submit", ("Bonjour, comment allez-vous aujourd'hui ?",)),
+            ("write", "process_queue", (20,)),
+            ("view", "get_translation", ("Bonjour, comment allez-vous aujourd'hui ?",)),
+            # Templated messages: every sentence but one is already in memory
+            ("write", "translate_to_english", ("Muchas gracias. Bonjour, comment allez-vous aujourd'hui ?",)),
+            ("write", "translate_to_english", ("Guten Morgen. Wie spät ist es?\n\nMuchas gracias.",)),
+            ("view", "get_translation", ("Guten Morgen. Wie spät ist es?\n\nMuchas gracias.",)),
+            ("write", "translate_to_english", (LONG_DOCUMENT,)),
+            ("view", "get_memory_stats", ()),
+        ],
+    ),
+    "LegalReader": Scenario(
+        contract="legal_reader.py",
+        pages={"https://example.com/msa.html": filler(24000, 2) + " " + LEGAL_CLAUSE + " " + filler(6000, 4)},
+        llm=[("Act as a Legal Assistant", fenced({"clause": LEGAL_CLAUSE}))],
+        calls=[
+            ("write", "extract_clause", ("https://example.com/msa.html", "indemnify")),
+            ("view", "get_extracted_clause", ("https://example.com/msa.html", "indemnify")),
+            ("view", "get_clause_windows", ("https://example.com/msa.html", "indemnify")),
+        ],
+    ),
+    "MetricSwap": Scenario(
+        contract="metric_swap.py",
+        llm=[("Act as a Unit Converter", fenced({"result": 16093.44}))],
+        calls=[
+            ("write", "convert", (10, "miles", "meters")),
+            ("view", "get_result", (10, "miles", "meters")),
+        ],
+    ),
+    "MoneyCleaner": Scenario(
+        contract="money_cleaner.py",
+        llm=[
+            ("Input Prices (JSON list)", fenced({"cents": [5400, 9000, None]})),
+            ("Act as a Currency Converter", fenced({"cents": 6350})),
+        ],
+        calls=[
+            ("write", "normalize_to_usd", ("£50",)),
+            ("write", "submit", ("€50",)),
+            ("write", "submit", ("¥13,400",)),
+            ("write", "submit", ("a lot of money",)),
+            ("write", "process_queue", (20,)),
+            ("view", "get_usd_cents", ("£50",)),
+        ],
+    ),
+    "PegWatch": Scenario(
+        contract="peg_watch.py",
+        prefixes={"https://html.duckduckgo.com/html?q=USDC": (
+            "USDC price today: 1 USDC = $0.9998 USD. " + filler(9000, 5)
+        )},
+        llm=[("Act as a Financial Analyst", fenced({"price": 0.9998}))],
+        calls=[
+            ("write", "check_peg_health", ()),
+            ("view", "get_status", ()),
+            ("view", "get_latest_price", ()),
+        ],
+    ),
+    "PhishGuard": Scenario(
+        contract="phish_guard.py",
+        llm=[
+            ("Target URLs (JSON list)", fenced({"is_safe": [True, False]})),
+            ("Act as a Cyber Security Expert", fenced({"is_safe": True})),
+        ],
+        calls=[
+            ("write", "is_safe", ("https://accounts.google.com/signin",)),
+            ("write", "submit", ("https://github.com/psf/requests",)),
+            ("write", "submit", ("https://goog1e.com/login",)),
+            ("write", "process_queue", (20,)),
+            ("view", "check_status", ("https://accounts.google.com/signin",)),
+        ],
+    ),
+    "PrivacyFilter": Scenario(
+        contract="privacy_filter.py",
+        llm=[
+            ("Input Texts (JSON list)", fenced({"redacted": ["Reach [REDACTED].", "No contact details here."]})),
+            ("Act as a Data Privacy Engine", "Call me at [REDACTED] or write to [REDACTED]."),
+        ],
+        calls=[
+            ("write", "redact_text", ("Call me at 555-0199 or write to bob@example.com.",)),
+            ("write", "submit", ("Reach alice@example.org.",)),
+            ("write", "submit", ("No contact details here.",)),
+            ("write", "process_queue", (20,)),
+            ("view", "get_redacted", ("Call me at 555-0199 or write to bob@example.com.",)),
+        ],
+    ),
+    "RepScore": Scenario(
+        contract="rep_score.py",
+        calls=[
+            ("write", "log_dissent", ("0x00000000000000000000000000000000000000aa",)),
+            ("view", "get_score", ("0x00000000000000000000000000000000000000aa",)),
+        ],
+    ),
+    "RuleExplain": Scenario(
+        contract="rule_explain.py",
+        llm=[
+            ("decide whether the two outputs are equivalent", fenced({"equivalent": True})),
+            ("Translate the following legal clause", _explained_per_node),
+        ],
+        calls=[
+            ("write", "explain_clause", (LEGAL_CLAUSE,)),
+            ("view", "get_explanation", (LEGAL_CLAUSE,)),
+        ],
+    ),
+    "SimValidator": Scenario(
+        contract="sim_validator.py",
+        llm=[("Cast a vote", fenced({"vote": "Reject", "reason": "Unverified yield claim."}))],
+        calls=[
+            ("write", "predict_vote", ("conservative", "Guaranteed 40% APY, audit pending, team anonymous.")),
+            ("view", "get_prediction", ("conservative", "Guaranteed 40% APY, audit pending, team anonymous.")),
+        ],
+    ),
+    "SnapLink": Scenario(
+        contract="snap_link.py",
+        prefixes={"https://hub.snapshot.org/graphql": SNAPSHOT_JSON},
+        llm=[("Act as a Governance Analyst", fenced({"passed": True}))],
+        calls=[
+            ("write", "check_proposal", ("0x5f3c7d",)),
+            ("view", "did_pass", ("0x5f3c7d",)),
+        ],
+    ),
+    "TimeFixer": Scenario(
+        contract="time_fixer.py",
+        pages={"http://worldtimeapi.org/api/timezone/Etc/UTC": json.dumps({
+            "datetime": "2026-10-16T12:00:00.000000+00:00", "unixtime": 1792152000,
+        })},
+        llm=[("Act as a Time Resolver", fenced({"timestamp": 1792144800}))],
+        calls=[
+            ("write", "to_unix_timestamp", ("2 hours ago",)),
+            ("view", "get_timestamp", ("2 hours ago",)),
+        ],
+    ),
+    "VoteMetrics": Scenario(
+        contract="vote_metrics.py",
+        prefixes={"https://hub.snapshot.org/graphql": SNAPSHOT_JSON},
+        llm=[("Act as a DAO Analyst", fenced({
+            "total_votes": 1572000.75, "total_supply_used": 100000000.0, "percentage": 1.57,
+        }))],
+        calls=[
+            ("write", "get_turnout", ("https://snapshot.org/#/ens.eth/proposal/0x5f3c7d",)),
+            ("view", "read_turnout", ("https://snapshot.org/#/ens.eth/proposal/0x5f3c7d",)),
+        ],
+    ),
+    "WeatherOracle": Scenario(
+        contract="weather_oracle.py",
+        pages={"https://wttr.in/New+York?format=3": "New York: +15°C"},
+        llm=[("Analyze this weather report", fenced({"temp_val": 15}))],
+        calls=[
+            ("write", "fetch_temp", ("New York",)),
+            ("view", "get_last_temp", ("New York",)),
+        ],
+    ),
+    "WebParser": Scenario(
+        contract="web_parser.py",
+        pages={"https://example.com/product/42": (
+            "Acme Widget - $19.99 - In stock. " + filler(15000, 6)
+        )},
+        llm=[("You are a Data Scraper", fenced({"name": "Acme Widget", "price": 19.99, "in_stock": True}))],
+        calls=[
+            ("write", "extract_schema", (
+                "https://example.com/product/42",
+                '{"name": "string", "price": "number", "in_stock": "boolean"}',
+            )),
+            ("view", "get_parsed_result", ("https://example.com/product/42",)),
+        ],
+    ),
+    "WikiTruth": Scenario(
+        contract="wiki_truth.py",
+        pages={"https://en.wikipedia.org/wiki/Albert_Einstein": (
+            "Albert Einstein was a theoretical physicist who developed the theory of relativity. "
+            + filler(40000, 7)
+        )},
+        calls=[
+            ("write", "verify_fact", ("Albert Einstein", "theory of relativity")),
+            ("view", "is_fact_true", ("Albert Einstein", "theory of relativity")),
+        ],
+    ),
+    "YTSentiment": Scenario(
+        contract="yt_sentiment.py",
+        pages={"https://yewtu.be/watch?v=dQw4w9WgXcQ": (
+            "Comments: this is a classic, love it! never gonna give you up " + filler(20000, 8)
+        )},
+        llm=[("You are a Sentiment Analyst", fenced({"mood": "Positive"}))],
+        calls=[
+            ("write", "determine_mood", ("dQw4w9WgXcQ",)),
+            ("view", "get_video_mood", ("dQw4w9WgXcQ",)),
+        ],
+    ),
+}
+
+# Contracts whose state is scalars only, with no map to page through.
+_UNPAGED = {"FrankfurterOracle", "PegWatch"}
+
+# Every contract exposes its hot-path counters, and every map-backed one its
+# range-scan views; read them after the workload.
+for _name, _scenario in SCENARIOS.items():
+    if _name not in _UNPAGED:
+        _scenario.calls.append(("view", "list_entries", ("", 50)))
+        _scenario.calls.append(("view", "export_entries", ()))
+    _scenario.calls.append(("view", "get_stats", ()))
@@ -0,0 +1,161 @@
+"""
+Storage benchmark for the compressed value encoding.
+
+Fills each contract that packs its results (see `_pack` in the contract files)
+with a representative corpus through its real write method, then compares the
+bytes held in the result map against the raw values it decodes to.
+
+    python -m bench.storage
+    python -m bench.storage --threshold 128 --json
+
+Corpora are drawn from this repository so they are real text, not filler:
+prose from docstrings, prompts and the README; code from function bodies;
+JSON documents from the bench baseline and scenario pages.
+"""
+
+import argparse
+import ast
+import json
+import re
+import sys
+
+from bench.emulator import REPO_ROOT, Network, load_contract
+from bench.scenarios import SNAPSHOT_JSON
+from bench.stubs import ScriptedLLM, StaticWeb, fenced
+
+COLUMNS = ("entries", "packed", "raw_bytes", "stored_bytes", "saved_bytes", "saved_pct")
+
+
+def prose_corpus() -> list[str]:
+    """Docstrings and prompt templates from the contracts, plus README paragraphs."""
+    texts = []
+    for path in sorted(REPO_ROOT.glob("*.py")):
+        for node in ast.walk(ast.parse(path.read_text())):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str):
+                text = " ".join(node.value.split())
+                if len(text) >= 40:
+                    texts.append(text)
+    readme = (REPO_ROOT / "README.md").read_text()
+    texts.extend(p.strip() for p in readme.split("\n\n") if len(p.strip()) >= 40)
+    return list(dict.fromkeys(texts))
+
+
+def code_corpus() -> list[str]:
+    """Source of every function defined in the bench package."""
+    snippets = []
+    for path in sorted((REPO_ROOT / "bench").glob("*.py")):
+        source = path.read_text()
+        for node in ast.walk(ast.parse(source)):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                snippets.append(ast.get_source_segment(source, node))
+    return snippets
+
+
+def json_corpus() -> list[dict]:
+    """Benchmark rows in pages of ten, plus the scenario API payloads."""
+    rows = json.loads((REPO_ROOT / "bench" / "baseline.json").read_text())
+    docs = [{"rows": rows[i:i + 10]} for i in range(0, len(rows), 10)]
+    docs.append(json.loads(SNAPSHOT_JSON))
+    return docs
+
+
+def _by_item(corpus: list, render):
+    """LLM reply that looks up `item-<n>` in the prompt and renders corpus[n]."""
+    def reply(prompt: str, node: int) -> str:
+        match = re.search(r"item-(\d+)\b", prompt)
+        return render(corpus[int(match.group(1))]) if match else "{}"
+    return reply
+
+
+def workloads() -> dict[str, tuple]:
+    """contract class -> (file, map field, corpus size, llm reply, call builder)"""
+    prose, code, docs = prose_corpus(), code_corpus(), json_corpus()
+    return {
+        "CodeGen": (
+            "code_gen.py", "snippets", len(code),
+            _by_item(code, lambda s: f"```python\n{s}\n```"),
+            lambda i: ("generate_python", f"item-{i}"),
+        ),
+        "GlobalText": (
+            "global_text.py", "translations", len(prose),
+            _by_item(prose, lambda s: fenced({"translation": s})),
+            lambda i: ("translate_to_english", f"item-{i}"),
+        ),
+        "LegalReader": (
+            "legal_reader.py", "clauses", len(prose),
+            _by_item(prose, lambda s: fenced({"clause": s})),
+            lambda i: ("extract_clause", "https://example.com/terms", f"item-{i}"),
+        ),
+        "PrivacyFilter": (
+            "privacy_filter.py", "redacted_logs", len(prose),
+            _by_item(prose, lambda s: s),
+            lambda i: ("redact_text", f"item-{i}"),
+        ),
+        "WebParser": (
+            "web_parser.py", "parsed_data", len(docs),
+            _by_item(docs, fenced),
+            lambda i: ("extract_schema", f"https://example.com/doc/{i}", f'{{"id": "item-{i}"}}'),
+        ),
+    }
+
+
+def measure(name: str, workload: tuple, threshold: int | None = None) -> dict:
+    path, field, size, reply, call = workload
+    cls = load_contract(path)
+    module_globals = cls.get_stats.__globals__
+    if threshold is not None:
+        module_globals["COMPRESS_MIN_BYTES"] = threshold
+    unpack = module_globals["_unpack"]
+
+    web = StaticWeb({}, {"https://example.com/": "Terms of service. " * 40})
+    deployment = Network(web, ScriptedLLM([("", reply)]), validators=1).deploy(cls)
+    for i in range(size):
+        method, *args = call(i)
+        deployment.write(method, *args)
+
+    stored = list(getattr(deployment.instance, field).values())
+    raw_bytes = sum(len(unpack(v).encode("utf-8")) for v in stored)
+    stored_bytes = sum(len(v.encode("utf-8")) for v in stored)
+    return {
+        "contract": name,
+        "entries": len(stored),
+        "packed": sum(1 for v in stored if unpack(v) != v),
+        "raw_bytes": raw_bytes,
+        "stored_bytes": stored_bytes,
+        "saved_bytes": raw_bytes - stored_bytes,
+        "saved_pct": round(100 * (raw_bytes - stored_bytes) / raw_bytes, 1) if raw_bytes else 0.0,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threshold", type=int, default=None,
+                        help="override COMPRESS_MIN_BYTES in every contract")
+    parser.add_argument("--only", action="append", help="contract class name (repeatable)")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    rows = [
+        measure(name, workload, args.threshold)
+        for name, workload in workloads().items()
+        if not args.only or name in args.only
+    ]
+    if args.json:
+        json.dump(rows, sys.stdout, indent=2)
+        print()
+        return 0
+
+    print(_table(rows, ("contract",) + COLUMNS))
+    return 0
+
+
+def _table(rows: list[dict], columns: tuple) -> str:
+    cells = [columns] + [tuple(str(r[c]) for c in columns) for r in rows]
+    widths = [max(len(line[i]) for line in cells) for i in range(len(columns))]
+    lines = ["  ".join(cell.ljust(w) for cell, w in zip(line, widths)) for line in cells]
+    lines.insert(1, "  ".join("-" * w for w in widths))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
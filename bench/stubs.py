@@ -0,0 +1,135 @@
+"""
+Pluggable web, LLM and judge stubs for `bench.emulator.Network`.
+
+Every stub is a plain callable, so a scenario can pass a lambda where the
+helpers below do not fit:
+
+    web(url, mode, node) -> str
+    llm(prompt, node) -> str
+    judge(principle, leader_output, validator_output, node) -> bool
+"""
+
+import json
+
+
+class WebError(Exception):
+    """Raised by `StaticWeb` for URLs it has no page for."""
+
+
+class StaticWeb:
+    """Serves canned pages; a value may be a callable `(url, node) -> str`."""
+
+    def __init__(self, pages: dict | None = None, prefixes: dict | None = None):
+        self.pages = pages or {}
+        self.prefixes = prefixes or {}
+
+    def __call__(self, url: str, mode: str, node: int) -> str:
+        page = self.pages.get(url)
+        if page is None:
+            for prefix, candidate in self.prefixes.items():
+                if url.startswith(prefix):
+                    page = candidate
+                    break
+        if page is None:
+            raise WebError(f"no stub page for {url}")
+        return page(url, node) if callable(page) else page
+
+
+class ScriptedLLM:
+    """
+    Answers prompts by the first rule whose needle occurs in the prompt.
+
+    A reply may be a string or a callable `(prompt, node) -> str`.
+    """
+
+    def __init__(self, rules: list[tuple[str, object]], default: str = "{}"):
+        self.rules = rules
+        self.default = default
+
+    def __call__(self, prompt: str, node: int) -> str:
+        for needle, reply in self.rules:
+            if needle in prompt:
+                return reply(prompt, node) if callable(reply) else reply
+        return self.default
+
+
+def fenced(payload) -> str:
+    """Wrap a JSON payload in a markdown fence, as models tend to do."""
+    return "```json\n" + json.dumps(payload) + "\n```"
+
+
+def _normalize(output) -> str:
+    if isinstance(output, str):
+        try:
+            return json.dumps(json.loads(output), sort_keys=True)
+        except ValueError:
+            return " ".join(output.split())
+    return json.dumps(output, sort_keys=True, default=str)
+
+
+def exact_judge(principle: str, leader, validator, node: int) -> bool:
+    """Equal when both outputs normalize to the same JSON or whitespace-folded text."""
+    return _normalize(leader) == _normalize(validator)
+
+
+def lenient_judge(principle: str, leader, validator, node: int) -> bool:
+    return True
+
+
+class HttpWeb:
+    """Live fetches over plain HTTP(S); meant to be wrapped by a fixture recorder."""
+
+    def __init__(self, timeout: float = 30.0):
+        self.timeout = timeout
+
+    def __call__(self, url: str, mode: str, node: int) -> str:
+        import urllib.request
+
+        request = urllib.request.Request(url, headers={"User-Agent": "genlayer-bench"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.read().decode("utf-8", errors="replace")
+
+
+class ChatLLM:
+    """Live completions from an OpenAI-compatible `/chat/completions` endpoint."""
+
+    def __init__(self, base_url: str, model: str, api_key: str = "", timeout: float = 120.0):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def __call__(self, prompt: str, node: int) -> str:
+        import urllib.request
+
+        body = json.dumps({
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+        }).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(
+            f"{self.base_url}/chat/completions", data=body, headers=headers
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            payload = json.loads(response.read())
+        return payload["choices"][0]["message"]["content"]
+
+
+class LLMJudge:
+    """Comparative judge backed by an `llm(prompt, node)` callable."""
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    def __call__(self, principle: str, leader, validator, node: int) -> bool:
+        from bench.emulator import COMPARATIVE_TEMPLATE
+
+        prompt = COMPARATIVE_TEMPLATE.format(principle=principle, leader=leader, validator=validator)
+        reply = self.llm(prompt, node)
+        try:
+            cleaned = reply.replace("```json", "").replace("```", "").strip()
+            return bool(json.loads(cleaned).get("result", False))
+        except (ValueError, AttributeError):
+            return False
@@ -2,29 +2,833 @@
 # { "Depends": "py-genlayer:latest" }
 
 from genlayer import *
+import ast
+import base64
+import builtins
+import hashlib
 import json
+import math
+import re
+import string
+import time
+import tracemalloc
 import typing
+import unicodedata
+import zlib
+
+
+# Repairs applied outside string literals when a reply is not strict JSON:
+# single-quoted strings, Python True/False/None, trailing commas, // comments.
+_JSON_REPAIR = re.compile(
+    r'("(?:[^"\\]|\\.)*")'
+    r"|'((?:[^'\\]|\\.)*)'"
+    r"|\b(True|False|None)\b"
+    r"|,(\s*[}\]])"
+    r"|\s//[^\n]*"
+)
+_INVALID = object()
+
+
+def _repair_token(match: re.Match) -> str:
+    quoted, single, literal, closer = match.groups()
+    if quoted:
+        return quoted
+    if single is not None:
+        return json.dumps(single.replace("\\'", "'"))
+    if literal:
+        return {"True": "true", "False": "false", "None": "null"}[literal]
+    if closer is not None:
+        return closer
+    return ""
+
+
+def _first_object(raw: str) -> str | None:
+    # First balanced {...}, ignoring braces inside quoted strings
+    start = raw.find("{")
+    while start != -1:
+        depth, quote, escaped = 0, "", False
+        for i in range(start, len(raw)):
+            ch = raw[i]
+            if quote:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == quote:
+                    quote = ""
+            elif ch in "\"'":
+                quote = ch
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return raw[start:i + 1]
+        start = raw.find("{", start + 1)
+    return None
+
+
+def _coerce(value, spec):
+    if isinstance(spec, list):
+        for option in spec:
+            if str(value).strip().lower() == str(option).lower():
+                return option
+        return _INVALID
+    for kind in spec if isinstance(spec, tuple) else (spec,):
+        if kind is type(None) and value is None:
+            return None
+        if kind is bool:
+            if isinstance(value, bool):
+                return value
+            if str(value).strip().lower() in ("true", "false"):
+                return str(value).strip().lower() == "true"
+        if kind in (int, float) and value is not None and not isinstance(value, bool):
+            if kind is int and isinstance(value, int):
+                return value
+            try:
+                number = float(str(value).strip().replace(",", ""))
+            except ValueError:
+                continue
+            if not math.isfinite(number):
+                continue
+            if kind is float:
+                return number
+            if number.is_integer():
+                return int(number)
+        if kind is str and isinstance(value, str):
+            return value
+    return _INVALID
+
+
+def _decode_llm_json(raw: str, schema: dict) -> dict | None:
+    """
+    Decodes an LLM reply into a dict that satisfies `schema`, or returns None.
+    Finds the first balanced JSON object, so fences and surrounding prose are
+    ignored, and repairs common formatting quirks before giving up.
+    Schema values are a type, a tuple of accepted types, or a list of allowed
+    literals (matched case-insensitively and returned in canonical form).
+    """
+    text = _first_object(raw) if isinstance(raw, str) else None
+    if text is None:
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        try:
+            data = json.loads(_JSON_REPAIR.sub(_repair_token, text))
+        except ValueError:
+            return None
+    if not isinstance(data, dict):
+        return None
+    for field, spec in schema.items():
+        value = _coerce(data[field], spec) if field in data else _INVALID
+        if value is _INVALID:
+            return None
+        data[field] = value
+    return data
+
+
+def _walk_source_order(node: ast.AST) -> typing.Iterator[ast.AST]:
+    yield node
+    for child in ast.iter_child_nodes(node):
+        yield from _walk_source_order(child)
+
+
+def _binding_name(node: ast.AST) -> str | None:
+    if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+        return node.id
+    if isinstance(node, ast.arg):
+        return node.arg
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return node.name
+    if isinstance(node, ast.ExceptHandler):
+        return node.name
+    if isinstance(node, ast.alias):
+        return node.asname
+    return None
+
+
+def _canonical_code(source: str) -> str | None:
+    """
+    Normalized AST dump of a snippet, or None if it does not parse.
+    Comments and formatting vanish in parsing; docstrings are dropped, and
+    every name the snippet binds is renamed v0, v1, ... in first-binding
+    order. Free names (builtins, module globals, attributes, keywords) are
+    kept, so `len(x)` never matches `sum(x)`.
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Module, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            first = node.body[0] if node.body else None
+            if (isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant)
+                    and isinstance(first.value.value, str)):
+                node.body = node.body[1:] or [ast.Pass()]
+
+    rename = {}
+    for node in _walk_source_order(tree):
+        name = _binding_name(node)
+        if name and name not in rename:
+            rename[name] = f"v{len(rename)}"
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            node.id = rename.get(node.id, node.id)
+        elif isinstance(node, ast.arg):
+            node.arg = rename.get(node.arg, node.arg)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            node.name = rename[node.name]
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            node.name = rename[node.name]
+        elif isinstance(node, ast.alias) and node.asname:
+            node.asname = rename[node.asname]
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            node.names = [rename.get(name, name) for name in node.names]
+    return ast.dump(tree, annotate_fields=False)
+
+
+# Differential execution budgets, per snippet
+EXEC_MAX_STEPS = 50_000      # loop iterations, function calls and items summed
+EXEC_MAX_ITEMS = 100_000     # length of a range, or of a sequence or string built
+EXEC_MAX_INT_BITS = 4096     # size of an int built with *, **, pow() or <<
+EXEC_MAX_OUTPUT = 8192       # characters printed or returned per case
+EXEC_MAX_SECONDS = 1.0       # wall clock across all probes, checked at every step
+EXEC_MAX_BYTES = 64 << 20    # memory allocated and still live, checked at every step
+
+# Modules whose functions all run in time bounded by their (bounded) inputs;
+# re (backtracking), itertools (count/repeat/product) and string (Formatter)
+# are not. Names are imported one by one, never with *, and math only
+# offers the functions below, not its big-int builders (factorial, comb...)
+_EXEC_MODULES = frozenset({"bisect", "collections", "functools", "heapq", "math"})
+_EXEC_MATH_NAMES = frozenset(
+    "acos acosh asin asinh atan atan2 atanh cbrt ceil copysign cos cosh degrees dist e "
+    "erf erfc exp exp2 expm1 fabs floor fmod frexp fsum gamma gcd hypot inf isclose "
+    "isfinite isinf isnan isqrt ldexp lgamma log log10 log1p log2 modf nan nextafter pi "
+    "radians remainder sin sinh sqrt tan tanh tau trunc ulp".split()
+)
+_EXEC_BUILTINS = (
+    "abs all any bool chr dict divmod enumerate filter float frozenset int isinstance "
+    "len list map max min ord reversed round set slice sorted str "
+    "tuple zip ArithmeticError AssertionError Exception IndexError KeyError "
+    "LookupError StopIteration TypeError ValueError ZeroDivisionError"
+).split()
+# Frame and code objects lead back to the contract's globals. The rest build
+# arbitrarily large results from small arguments in a single uncounted call:
+# padding and format widths, int.to_bytes lengths, Counter.elements counts,
+# str.translate expansions and math's factorial-like builders.
+_EXEC_BLOCKED_ATTRS = frozenset({
+    "ag_code", "ag_frame", "cr_code", "cr_frame", "f_back", "f_builtins", "f_code",
+    "f_globals", "f_locals", "gi_code", "gi_frame", "gi_yieldfrom", "tb_frame",
+    "tb_next", "center", "expandtabs", "ljust", "rjust", "zfill", "to_bytes",
+    "elements", "translate", "comb", "factorial", "lcm", "perm", "prod",
+})
+_EXEC_FORBIDDEN = (
+    ast.AsyncFor, ast.AsyncFunctionDef, ast.AsyncWith, ast.Await, ast.Global,
+    ast.Nonlocal, ast.With, ast.Yield, ast.YieldFrom,
+)
+_EXEC_GUARDED = {
+    ast.Add: "add", ast.Mult: "mul", ast.Pow: "pow", ast.LShift: "lshift", ast.Mod: "mod",
+}
+# String methods whose output size is checked before the call; only allowed
+# as direct calls, so the check cannot be sidestepped through a bound method
+_EXEC_SIZED_METHODS = frozenset({"format", "format_map", "join", "replace"})
+_PERCENT_SPEC = re.compile(r"%(?:\([^)]*\))?[#0 +-]*(\*|\d*)(?:\.(\*|\d*))?")
+
+# Probe arguments by kind, kept as JSON so every call gets fresh, unshared
+# objects. A function is called once per probe index for every assignment of
+# kinds to its parameters, so `rotate(items, k)` is exercised as (list, int).
+_PROBE_VALUES = json.dumps({
+    "int": [0, 1, -7, 42],
+    "str": ["", "abc", "Hello, World", "racecar"],
+    "list": [[], [3, 1, 2], [1, 1, 2, 3, 5], [-4, 0, 9]],
+})
+
+
+class _ExecLimit(Exception):
+    """A snippet used a forbidden construct or ran over a budget."""
+
+
+class _Sandbox:
+    """Budget counters and guarded operations injected into a snippet's globals."""
+
+    def __init__(self):
+        self.steps = 0
+        self.output: list[str] = []
+        self.output_chars = 0
+        self.deadline = time.monotonic() + EXEC_MAX_SECONDS
+        self.memory_ceiling = tracemalloc.get_traced_memory()[0] + EXEC_MAX_BYTES
+
+    def tick(self) -> None:
+        self.steps += 1
+        if self.steps > EXEC_MAX_STEPS:
+            raise _ExecLimit("step budget")
+        if time.monotonic() > self.deadline:
+            raise _ExecLimit("time budget")
+        if tracemalloc.get_traced_memory()[0] > self.memory_ceiling:
+            raise _ExecLimit("memory budget")
+
+    def iterate(self, iterable):
+        for item in iterable:
+            self.tick()
+            yield item
+
+    def emit(self, *values, sep=" ", end="\n") -> None:
+        text = str(sep).join(str(v) for v in values) + str(end)
+        self.output_chars += len(text)
+        if self.output_chars > EXEC_MAX_OUTPUT:
+            raise _ExecLimit("output budget")
+        self.output.append(text)
+
+    def load(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name not in _EXEC_MODULES:
+            raise _ExecLimit(f"import {name}")
+        return __import__(name)
+
+    @staticmethod
+    def _size(value) -> int:
+        return len(value) if isinstance(value, (str, bytes, list, tuple)) else 0
+
+    @staticmethod
+    def _bits(value) -> int:
+        return value.bit_length() if isinstance(value, int) else 0
+
+    def add(self, a, b):
+        if self._size(a) + self._size(b) > EXEC_MAX_ITEMS:
+            raise _ExecLimit("sequence size")
+        return a + b
+
+    def mul(self, a, b):
+        for seq, n in ((a, b), (b, a)):
+            if self._size(seq) and isinstance(n, int) and self._size(seq) * n > EXEC_MAX_ITEMS:
+                raise _ExecLimit("sequence size")
+        if self._bits(a) + self._bits(b) > EXEC_MAX_INT_BITS:
+            raise _ExecLimit("int size")
+        return a * b
+
+    def pow(self, a, b, mod=None):
+        # A modulus keeps the result below it, whatever the exponent
+        if mod is not None:
+            return builtins.pow(a, b, mod)
+        if isinstance(b, int) and b > 0 and self._bits(a) * b > EXEC_MAX_INT_BITS:
+            raise _ExecLimit("int size")
+        return a ** b
+
+    def lshift(self, a, b):
+        if isinstance(b, int) and self._bits(a) + b > EXEC_MAX_INT_BITS:
+            raise _ExecLimit("int size")
+        return a << b
+
+    def mod(self, a, b):
+        # printf-style formatting: a width or precision is a result size
+        if isinstance(a, str):
+            for width, precision in _PERCENT_SPEC.findall(a):
+                self.check_spec(f"{width}.{precision}")
+        return a % b
+
+    @staticmethod
+    def check_spec(spec: str) -> None:
+        # Rejects widths and precisions over the item budget, and nested or
+        # starred ones that are only known at format time
+        if "{" in spec or "*" in spec or any(
+                int(n) > EXEC_MAX_ITEMS for n in re.findall(r"\d+", spec)):
+            raise _ExecLimit("format size")
+
+    def format(self, value, conversion: int, spec: str) -> str:
+        # An f-string field with a format spec, conversion applied first
+        if conversion != -1:
+            value = {ord("s"): str, ord("r"): repr, ord("a"): ascii}[conversion](value)
+        self.check_spec(spec)
+        return format(value, spec)
+
+    def round(self, number, ndigits=None):
+        # A large negative ndigits on an int builds 10 ** -ndigits in one call
+        if isinstance(ndigits, int) and abs(ndigits) > EXEC_MAX_INT_BITS:
+            raise _ExecLimit("round digits")
+        return round(number, ndigits)
+
+    def range(self, *args):
+        try:
+            span = range(*args)
+            size = len(span)
+        except OverflowError:
+            raise _ExecLimit("range size") from None
+        if size > EXEC_MAX_ITEMS:
+            raise _ExecLimit("range size")
+        return span
+
+    def sum(self, iterable, start=0):
+        # Every item costs a step; sequences are concatenated under the size guard
+        items = list(self.iterate(iterable))
+        if not any(self._size(item) for item in [start, *items]):
+            return sum(items, start)
+        total = start
+        for item in items:
+            total = self.add(total, item)
+        return total
+
+    def method(self, obj, name: str, /, *args, **kwargs):
+        # The _EXEC_SIZED_METHODS of str, checked before they allocate;
+        # str.join(sep, parts) is checked as sep.join(parts)
+        if obj is str and args and isinstance(args[0], str):
+            obj, args = args[0], args[1:]
+        if isinstance(obj, str):
+            if name in ("format", "format_map"):
+                for _, _, spec, _ in string.Formatter().parse(obj):
+                    self.check_spec(spec or "")
+            elif name == "join" and args:
+                parts = list(self.iterate(args[0]))
+                size = sum(self._size(p) for p in parts) + len(obj) * max(len(parts) - 1, 0)
+                if size > EXEC_MAX_ITEMS:
+                    raise _ExecLimit("string size")
+                args = (parts, *args[1:])
+            elif name == "replace" and len(args) >= 2 and all(isinstance(a, str) for a in args[:2]):
+                old, new = args[:2]
+                count = obj.count(old) if old else len(obj) + 1
+                limit = args[2] if len(args) > 2 else kwargs.get("count", -1)
+                if isinstance(limit, int) and limit >= 0:
+                    count = min(count, limit)
+                if len(obj) + count * (len(new) - len(old)) > EXEC_MAX_ITEMS:
+                    raise _ExecLimit("string size")
+        return getattr(obj, name)(*args, **kwargs)
+
+
+class _Instrument(ast.NodeTransformer):
+    """Routes loops, calls and size-growing operators through `_Sandbox`."""
+
+    @staticmethod
+    def _hook(name: str, *args: ast.expr) -> ast.Call:
+        return ast.Call(ast.Name(f"__gl_{name}", ast.Load()), list(args), [])
+
+    def _tick_body(self, node):
+        self.generic_visit(node)
+        node.body.insert(0, ast.Expr(self._hook("tick")))
+        return node
+
+    visit_FunctionDef = visit_While = _tick_body
+
+    def visit_For(self, node):
+        self.generic_visit(node)
+        node.iter = self._hook("iterate", node.iter)
+        return node
+
+    def visit_comprehension(self, node):
+        self.generic_visit(node)
+        node.iter = self._hook("iterate", node.iter)
+        return node
+
+    def visit_Lambda(self, node):
+        self.generic_visit(node)
+        node.body = ast.Subscript(
+            ast.Tuple([self._hook("tick"), node.body], ast.Load()), ast.Constant(1), ast.Load()
+        )
+        return node
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        name = _EXEC_GUARDED.get(type(node.op))
+        return self._hook(name, node.left, node.right) if name else node
+
+    def visit_AugAssign(self, node):
+        self.generic_visit(node)
+        name = _EXEC_GUARDED.get(type(node.op))
+        if name is None:
+            return node
+        current = ast.parse(ast.unparse(node.target), mode="eval").body
+        return ast.Assign([node.target], self._hook(name, current, node.value))
+
+    def visit_FormattedValue(self, node):
+        self.generic_visit(node)
+        if node.format_spec is None:
+            return node
+        value = self._hook("format", node.value, ast.Constant(node.conversion), node.format_spec)
+        return ast.FormattedValue(value, -1, None)
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        func = node.func
+        if isinstance(func, ast.Attribute) and func.attr in _EXEC_SIZED_METHODS:
+            hook = self._hook("method", func.value, ast.Constant(func.attr), *node.args)
+            hook.keywords = node.keywords
+            return hook
+        return node
+
+
+def _check_sandboxable(tree: ast.AST) -> None:
+    called = {id(n.func) for n in ast.walk(tree) if isinstance(n, ast.Call)}
+    math_aliases = {
+        a.asname or a.name for n in ast.walk(tree) if isinstance(n, ast.Import)
+        for a in n.names if a.name == "math"
+    }
+    for node in ast.walk(tree):
+        if isinstance(node, _EXEC_FORBIDDEN):
+            raise _ExecLimit(type(node).__name__)
+        if isinstance(node, ast.Import) and any(a.name not in _EXEC_MODULES for a in node.names):
+            raise _ExecLimit("import")
+        if isinstance(node, ast.ImportFrom) and (
+                node.level or node.module not in _EXEC_MODULES
+                or any(a.name == "*" or a.name in _EXEC_BLOCKED_ATTRS for a in node.names)
+                or (node.module == "math" and any(a.name not in _EXEC_MATH_NAMES for a in node.names))):
+            raise _ExecLimit("import")
+        if isinstance(node, ast.Name) and node.id.startswith("__"):
+            raise _ExecLimit(node.id)
+        if isinstance(node, ast.Attribute) and (
+                node.attr.startswith("_") or node.attr in _EXEC_BLOCKED_ATTRS
+                or (node.attr in _EXEC_SIZED_METHODS and id(node) not in called)
+                or (isinstance(node.value, ast.Name) and node.value.id in math_aliases
+                    and node.attr not in _EXEC_MATH_NAMES)):
+            raise _ExecLimit(node.attr)
+
+
+def _stable_repr(value, sandbox: _Sandbox, depth: int = 0) -> str:
+    # Order-insensitive for sets and dicts, rounded floats, iterators drained
+    sandbox.tick()
+    if depth > 20:
+        raise _ExecLimit("nesting")
+    if isinstance(value, float):
+        return repr(round(value, 9))
+    if isinstance(value, (bool, int, str, bytes, type(None))):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        inner = ",".join(_stable_repr(v, sandbox, depth + 1) for v in value)
+        return f"[{inner}]" if isinstance(value, list) else f"({inner})"
+    if isinstance(value, (set, frozenset)):
+        return "{" + ",".join(sorted(_stable_repr(v, sandbox, depth + 1) for v in value)) + "}"
+    if isinstance(value, dict):
+        items = sorted(
+            f"{_stable_repr(k, sandbox, depth + 1)}:{_stable_repr(v, sandbox, depth + 1)}"
+            for k, v in value.items()
+        )
+        return "{" + ",".join(items) + "}"
+    if hasattr(value, "__next__"):
+        return "iter" + _stable_repr(list(sandbox.iterate(value)), sandbox, depth + 1)
+    return f"<{type(value).__name__}>"
+
+
+def _execution_fingerprint(source: str) -> dict[str, list[str]] | None:
+    """
+    Runs a snippet in a restricted namespace and returns its observed
+    behaviour per probe signature, or None when it cannot be executed to a
+    conclusion.
+    A snippet that defines functions is judged by its last top-level one,
+    called on every kind signature of up to three parameters (module-level
+    demo output is ignored); signatures the function rejects with an
+    exception are outside its domain and left out. A plain script is judged
+    by what it prints. Imports are limited to pure stdlib modules, dunder and
+    frame access is rejected, and loops, calls, sequence growth and output
+    are metered against the EXEC_* budgets. Builtins, modules and methods
+    that could run unmetered for long are wrapped, size-checked or refused.
+    """
+    try:
+        tree = ast.parse(source)
+        _check_sandboxable(tree)
+    except (SyntaxError, ValueError, _ExecLimit):
+        return None
+    functions = [n for n in tree.body if isinstance(n, ast.FunctionDef)]
+    tree = ast.fix_missing_locations(_Instrument().visit(tree))
+
+    # Allocations are traced only while the snippet runs
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        return _run_probes(tree, functions)
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+
+def _run_probes(tree: ast.Module, functions: list[ast.FunctionDef]) -> dict[str, list[str]] | None:
+    sandbox = _Sandbox()
+    allowed = {name: getattr(builtins, name) for name in _EXEC_BUILTINS}
+    allowed.update(print=sandbox.emit, __import__=sandbox.load, pow=sandbox.pow,
+                   range=sandbox.range, round=sandbox.round, sum=sandbox.sum)
+    namespace = {"__builtins__": allowed, "__name__": "snippet"}
+    for hook in ("tick", "iterate", "add", "mul", "pow", "lshift", "mod", "format", "method"):
+        namespace[f"__gl_{hook}"] = getattr(sandbox, hook)
+
+    try:
+        exec(compile(tree, "<snippet>", "exec"), namespace)
+        script_error = ""
+    except (_ExecLimit, RecursionError, MemoryError):
+        return None
+    except Exception as exc:
+        script_error = type(exc).__name__
+
+    if not functions:
+        output = "".join(sandbox.output)
+        return {"script": [f"out:{output}|err:{script_error}"]} if output or script_error else None
+
+    fn = namespace.get(functions[-1].name)
+    args = functions[-1].args
+    arity = len(args.posonlyargs) + len(args.args) - len(args.defaults)
+    if not callable(fn) or arity > 3 or any(d is None for d in args.kw_defaults):
+        return None
+
+    kinds = json.loads(_PROBE_VALUES)
+    signatures = [()]
+    for _ in range(arity):
+        signatures = [s + (k,) for s in signatures for k in kinds]
+    observed = {}
+    for signature in signatures:
+        results = []
+        for probe in range(len(kinds["int"])):
+            pool = json.loads(_PROBE_VALUES)
+            call_args = [pool[k][(probe + i) % len(pool[k])] for i, k in enumerate(signature)]
+            sandbox.steps, sandbox.output, sandbox.output_chars = 0, [], 0
+            try:
+                result = _stable_repr(fn(*call_args), sandbox)
+            except (_ExecLimit, RecursionError, MemoryError):
+                return None
+            except Exception:
+                break
+            if len(result) > EXEC_MAX_OUTPUT:
+                return None
+            results.append(f"ret:{result}|out:{''.join(sandbox.output)}")
+        else:
+            observed[",".join(signature)] = results
+    return observed or None
+
+
+def _execution_equivalent(a: str, b: str) -> bool | None:
+    """
+    True/False from differential execution over the probe signatures both
+    snippets accept, None when that is inconclusive.
+    """
+    left = _execution_fingerprint(a)
+    if left is None:
+        return None
+    right = _execution_fingerprint(b)
+    shared = left.keys() & right.keys() if right is not None else ()
+    if not shared:
+        return None
+    return all(left[s] == right[s] for s in shared)
+
+
+def _content_key(*parts: str) -> str:
+    """
+    Fixed-size storage key for unbounded user text: the SHA-256 hex digest of
+    the NFC-normalized, whitespace-collapsed parts joined by a unit separator.
+    """
+    normalized = "\x1f".join(" ".join(unicodedata.normalize("NFC", p).split()) for p in parts)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+# Words that carry no meaning in a coding intent: articles, fillers and
+# request boilerplate ("please write a python function that ...")
+_INTENT_STOP_WORDS = frozenset("""
+    a an the this that these those it its of for at
+    then also is are be as if whether which please can could would you
+    write create make implement give me some code python function snippet
+    program script given provided
+""".split())
+
+# Direction, relation and negation words are kept, since they decide what
+# the code does: "celsius to fahrenheit" is not "to celsius from fahrenheit"
+_INTENT_RELATION_WORDS = frozenset("""
+    to from into onto in on by with and or not no than without except
+""".split())
+
+# MinHash over intent shingles, split into LSH bands of MINHASH_ROWS values
+MINHASH_BANDS = 8
+MINHASH_ROWS = 2
+
+
+def _canonical_intent(intent: str) -> str:
+    """
+    Case-, punctuation- and whitespace-insensitive form of an intent with
+    stop-words removed and plural "s" trimmed, word order kept.
+    "Please reverse the lists." and "reverse a list" both become "reverse list";
+    "a" is kept where it names a variable, as in "copy list a into list b".
+    """
+    text = unicodedata.normalize("NFKC", intent).lower()
+    tokens = re.findall(r"[^\W_]+", text)
+    words = []
+    for i, word in enumerate(tokens):
+        if word == "a":
+            # An article only when a content word follows it
+            following = tokens[i + 1] if i + 1 < len(tokens) else ""
+            if len(following) < 2 or following in _INTENT_STOP_WORDS or following in _INTENT_RELATION_WORDS:
+                words.append(word)
+            continue
+        if word in _INTENT_STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+            word = word[:-1]
+        words.append(word)
+    return " ".join(words)
+
+
+def _intent_shingles(canonical: str) -> set[str]:
+    # Words and adjacent word pairs, so order still counts for something
+    words = canonical.split()
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def _intent_roles(canonical: str) -> list[object]:
+    # Relation words in order, each between the sets of words around it: a
+    # paraphrase may reorder words within an operand but not swap operands
+    roles: list[object] = []
+    operand: set[str] = set()
+    for word in canonical.split():
+        if word in _INTENT_RELATION_WORDS:
+            roles += [frozenset(operand), word]
+            operand = set()
+        else:
+            operand.add(word)
+    roles.append(frozenset(operand))
+    return roles
+
+
+def _jaccard(a: set[str], b: set[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def _lsh_buckets(shingles: set[str]) -> list[str]:
+    """
+    MinHash signature of the shingle set, one bucket id per band. Intents
+    with Jaccard similarity s share at least one bucket with probability
+    1 - (1 - s**MINHASH_ROWS) ** MINHASH_BANDS.
+    """
+    if not shingles:
+        return []
+    size = MINHASH_BANDS * MINHASH_ROWS
+    signature = [0xFFFFFFFF] * size
+    for shingle in shingles:
+        digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=4 * size).digest()
+        for i in range(size):
+            value = int.from_bytes(digest[4 * i:4 * i + 4], "big")
+            if value < signature[i]:
+                signature[i] = value
+    return [
+        f"{band}:" + "".join(f"{v:08x}" for v in signature[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS])
+        for band in range(MINHASH_BANDS)
+    ]
+
+
+# Page size caps for list_entries / export_entries. Each page re-walks the
+# keys before its cursor (see _page), so mirrors should sync through
+# export_entries, whose larger pages keep a full pass to N / EXPORT_LIMIT walks.
+LIST_LIMIT = 200
+EXPORT_LIMIT = 1000
+
+
+def _page(entries: TreeMap, start_after: str, limit: int, cap: int,
+          convert: typing.Callable | None = None) -> tuple[list, str]:
+    """
+    Up to `limit` (key, value) pairs with keys strictly after `start_after`,
+    in key order, and the cursor for the next page ("" after the last one).
+    TreeMap iterates from its first key and cannot seek, so every page walks
+    the keys before its cursor: O(position + limit) key reads per page and
+    O(N^2 / limit) for a full pass. Only the returned entries' values are read.
+    """
+    limit = max(1, min(limit, cap))
+    page = []
+    for key in entries:
+        if start_after and key <= start_after:
+            continue
+        if len(page) == limit:
+            return page, page[-1][0]
+        value = entries[key]
+        page.append([key, convert(value) if convert else value])
+    return page, ""
+
+
+def _list_view(entries: TreeMap, start_after: str, limit: int,
+               convert: typing.Callable | None = None) -> dict[str, typing.Any]:
+    page, cursor = _page(entries, start_after, limit, LIST_LIMIT, convert)
+    return {"entries": page, "next": cursor}
+
+
+def _export_view(entries: TreeMap, start_after: str, limit: int,
+                 convert: typing.Callable | None = None) -> str:
+    # Columnar, whitespace-free JSON: {"k": [...], "v": [...], "n": cursor}
+    page, cursor = _page(entries, start_after, limit, EXPORT_LIMIT, convert)
+    payload = {"k": [k for k, _ in page], "v": [v for _, v in page], "n": cursor}
+    return json.dumps(payload, separators=(",", ":"))
+
+
+# Stored values at least this many UTF-8 bytes are zlib-compressed; shorter
+# ones stay raw, where the encoding overhead would outweigh the saving
+COMPRESS_MIN_BYTES = 256
+_PACKED_PREFIX = "z85:"
+
+
+def _pack(text: str) -> str:
+    """
+    Storage encoding for large text values: the zlib stream in base85 behind
+    a marker prefix. Kept raw when short or when compression does not pay,
+    unless the raw text itself starts with the marker.
+    """
+    raw = text.encode("utf-8")
+    escape = text.startswith(_PACKED_PREFIX)
+    if len(raw) < COMPRESS_MIN_BYTES and not escape:
+        return text
+    packed = _PACKED_PREFIX + base64.b85encode(zlib.compress(raw, 9)).decode("ascii")
+    return packed if escape or len(packed) < len(raw) else text
+
+
+def _unpack(value: str) -> str:
+    if value.startswith(_PACKED_PREFIX):
+        return zlib.decompress(base64.b85decode(value[len(_PACKED_PREFIX):])).decode("utf-8")
+    return value
+
 
 class CodeGen(gl.Contract):
     """
     Converts natural language intents into Python code snippets.
     Uses Functional Consensus to accept code that works the same way
-    even if variable names or formatting differ.
+    even if variable names or formatting differ: snippets equal up to
+    renaming are accepted in code, and only the rest reach an LLM judge.
     """
 
-    # Stores: Intent -> Python Code
+    # Stores: Canonical Intent Content Key -> Python Code
+    # Large values are stored packed (see _pack); read them through _unpack
     snippets: TreeMap[str, str]
 
-    def __init__(self):
-        pass
+    # Content key -> original input, kept only when deployed with keep_originals
+    originals: TreeMap[str, str]
+    keep_originals: bool
+
+    # Near-duplicate index: key -> canonical intent, and LSH bucket -> space-separated
+    # keys. A stored intent is reused when it has exactly the same content words and
+    # its shingle Jaccard similarity is at least near_duplicate_pct / 100 (0 disables
+    # the index).
+    intents: TreeMap[str, str]
+    intent_buckets: TreeMap[str, str]
+    near_duplicate_pct: u256
+
+    # Hot-path counters: "<method>.<counter>" -> total (see get_stats)
+    stats: TreeMap[str, u256]
+
+    def __init__(self, keep_originals: bool = False, near_duplicate_pct: int = 65):
+        self.keep_originals = keep_originals
+        self.near_duplicate_pct = u256(near_duplicate_pct)
 
     @gl.public.write
-    def generate_python(self, intent: str) -> None:
+    def generate_python(self, intent: str, force: bool = False) -> None:
         """
         Generates Python code based on the user's intent.
+        An intent equal to a stored one after canonicalization, or a near
+        duplicate of one, is served from storage without a new generation;
+        `force` generates anew and replaces the stored snippet.
         Returns NONE to avoid simulator serialization crashes.
         """
-        
+        canonical = _canonical_intent(intent)
+        key = _content_key(canonical)
+        cached_key = "" if force else key if key in self.snippets else self._near_duplicate(canonical)
+        if cached_key:
+            self._record(
+                "generate_python",
+                calls=1,
+                input_bytes=len(intent.encode("utf-8")),
+                cache_hits=1,
+                near_duplicates=int(cached_key != key),
+            )
+            return None
+
         def generate_nondet() -> str:
             task = f"""
             Act as a Python Developer.
@@ -46,7 +850,8 @@ class CodeGen(gl.Contract):
             return cleaned
 
         # Consensus: Functional Equivalence
-        # We ask the LLM to judge if two code snippets do the same thing.
+        # Snippets equal up to naming/formatting pass deterministically; the LLM
+        # judges only the ones that still differ.
         comparison_criteria = """
         Compare the two Python code snippets.
         
@@ -57,21 +862,153 @@ class CodeGen(gl.Contract):
         4. If both snippets implement the exact same intent, they are EQUAL.
         """
 
-        consensus_code = gl.eq_principle.prompt_comparative(
-            generate_nondet, 
-            comparison_criteria
-        )
+        def validator_fn(leader_result) -> bool:
+            if not isinstance(leader_result, gl.vm.Return):
+                return False
+            leader_code = leader_result.calldata
+            own_code = generate_nondet()
+
+            # Fast path: identical after alpha-renaming, no judge call
+            leader_canon = _canonical_code(leader_code)
+            if leader_code == own_code or (
+                    leader_canon is not None and leader_canon == _canonical_code(own_code)):
+                return True
+
+            # Run both snippets on the same probes; the judge only sees
+            # snippets that cannot be executed to a conclusion
+            verdict = _execution_equivalent(leader_code, own_code)
+            if verdict is not None:
+                return verdict
+
+            # Slow path: ask the LLM judge
+            task = f"""
+            Given the equivalence principle, decide whether the two code snippets are equivalent.
 
-        # Store the result
-        self.snippets[intent] = consensus_code
+            Equivalence principle:
+            {comparison_criteria}
+
+            Snippet A:
+            {leader_code}
+
+            Snippet B:
+            {own_code}
+
+            Respond using ONLY JSON: {{ "equivalent": true | false }}
+            """
+            parsed = _decode_llm_json(gl.nondet.exec_prompt(task), {"equivalent": bool})
+            return parsed is not None and parsed["equivalent"]
+
+        consensus_code = gl.vm.run_nondet(generate_nondet, validator_fn)
+
+        # Store the result and index the intent for near-duplicate lookups
+        self.snippets[key] = _pack(consensus_code)
+        if self.keep_originals:
+            self.originals[key] = intent
+        self.intents[key] = canonical
+        for bucket in _lsh_buckets(_intent_shingles(canonical)):
+            members = self.intent_buckets[bucket] if bucket in self.intent_buckets else ""
+            if key not in members.split():
+                self.intent_buckets[bucket] = f"{members} {key}".strip()
+
+        self._record(
+            "generate_python",
+            calls=1,
+            consensus_rounds=1,
+            llm_prompts=1,
+            input_bytes=len(intent.encode("utf-8")),
+            fallbacks=int(not consensus_code),
+        )
         
         return None
 
     @gl.public.view
     def get_code(self, intent: str) -> str:
         """
-        Returns the generated Python code.
+        Returns the generated Python code for the intent or a paraphrase of it.
         """
-        if intent in self.snippets:
-            return self.snippets[intent]
+        key = _content_key(_canonical_intent(intent))
+        if key not in self.snippets:
+            key = self._near_duplicate(_canonical_intent(intent))
+        if not key:
+            # Entries stored before canonicalization are keyed on the raw intent
+            key = _content_key(intent)
+        if key in self.snippets:
+            return _unpack(self.snippets[key])
         return "# No code generated"
+
+    def _near_duplicate(self, canonical: str) -> str:
+        """
+        Key of the most similar indexed intent at or above the threshold, or "".
+        LSH buckets narrow the candidates; a candidate must have the same content
+        words (so "sort ascending" never serves "sort descending", nor "top 3"
+        serve "top 5") on the same side of every relation word (so "list a into
+        list b" never serves "list b into list a"), and exact shingle Jaccard
+        decides between word orders.
+        """
+        threshold = int(self.near_duplicate_pct) / 100
+        shingles = _intent_shingles(canonical)
+        if not threshold or not shingles:
+            return ""
+        roles = _intent_roles(canonical)
+        best_key, best_score = "", threshold
+        seen = set()
+        for bucket in _lsh_buckets(shingles):
+            if bucket not in self.intent_buckets:
+                continue
+            for candidate in self.intent_buckets[bucket].split():
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                stored = self.intents[candidate]
+                if _intent_roles(stored) != roles:
+                    continue
+                score = _jaccard(shingles, _intent_shingles(stored))
+                if score >= best_score:
+                    best_key, best_score = candidate, score
+        return best_key
+
+    @gl.public.view
+    def get_original(self, key: str) -> str:
+        """
+        Returns the input stored under a content key, or "" if originals are not kept.
+        """
+        if key in self.originals:
+            return self.originals[key]
+        return ""
+
+    @gl.public.view
+    def list_entries(self, start_after: str = "", limit: int = 50) -> dict[str, typing.Any]:
+        """
+        Pages through generated snippets in key order: {"entries": [[key, value], ...], "next": cursor}.
+        Pass "next" back as start_after; it is "" after the last page.
+        """
+        return _list_view(self.snippets, start_after, limit, _unpack)
+
+    @gl.public.view
+    def export_entries(self, start_after: str = "", limit: int = EXPORT_LIMIT) -> str:
+        """
+        Same pages as list_entries, as compact columnar JSON for bulk mirroring.
+        """
+        return _export_view(self.snippets, start_after, limit, _unpack)
+
+    @gl.public.view
+    def list_originals(self, start_after: str = "", limit: int = 50) -> dict[str, typing.Any]:
+        """
+        Pages through the retained original inputs, keyed like list_entries.
+        """
+        return _list_view(self.originals, start_after, limit)
+
+    def _record(self, method: str, **counters: int) -> None:
+        # Adds to the "<method>.<counter>" totals read by get_stats
+        for name, amount in counters.items():
+            if amount:
+                key = f"{method}.{name}"
+                current = int(self.stats[key]) if key in self.stats else 0
+                self.stats[key] = u256(current + amount)
+
+    @gl.public.view
+    def get_stats(self) -> dict[str, int]:
+        """
+        Returns hot-path counters keyed "<method>.<counter>".
+        """
+        return {key: int(count) for key, count in self.stats.items()}
@@ -2,30 +2,821 @@
 # { "Depends": "py-genlayer:latest" }
 
 from genlayer import *
+import base64
+import datetime
+import hashlib
 import json
+import math
+import re
 import typing
 
+
+# Repairs applied outside string literals when a reply is not strict JSON:
+# single-quoted strings, Python True/False/None, trailing commas, // comments.
+_JSON_REPAIR = re.compile(
+    r'("(?:[^"\\]|\\.)*")'
+    r"|'((?:[^'\\]|\\.)*)'"
+    r"|\b(True|False|None)\b"
+    r"|,(\s*[}\]])"
+    r"|\s//[^\n]*"
+)
+_INVALID = object()
+
+
+def _repair_token(match: re.Match) -> str:
+    quoted, single, literal, closer = match.groups()
+    if quoted:
+        return quoted
+    if single is not None:
+        return json.dumps(single.replace("\\'", "'"))
+    if literal:
+        return {"True": "true", "False": "false", "None": "null"}[literal]
+    if closer is not None:
+        return closer
+    return ""
+
+
+def _first_object(raw: str) -> str | None:
+    # First balanced {...}, ignoring braces inside quoted strings
+    start = raw.find("{")
+    while start != -1:
+        depth, quote, escaped = 0, "", False
+        for i in range(start, len(raw)):
+            ch = raw[i]
+            if quote:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == quote:
+                    quote = ""
+            elif ch in "\"'":
+                quote = ch
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return raw[start:i + 1]
+        start = raw.find("{", start + 1)
+    return None
+
+
+def _coerce(value, spec):
+    if isinstance(spec, list):
+        for option in spec:
+            if str(value).strip().lower() == str(option).lower():
+                return option
+        return _INVALID
+    for kind in spec if isinstance(spec, tuple) else (spec,):
+        if kind is type(None) and value is None:
+            return None
+        if kind is bool:
+            if isinstance(value, bool):
+                return value
+            if str(value).strip().lower() in ("true", "false"):
+                return str(value).strip().lower() == "true"
+        if kind in (int, float) and value is not None and not isinstance(value, bool):
+            if kind is int and isinstance(value, int):
+                return value
+            try:
+                number = float(str(value).strip().replace(",", ""))
+            except ValueError:
+                continue
+            if not math.isfinite(number):
+                continue
+            if kind is float:
+                return number
+            if number.is_integer():
+                return int(number)
+        if kind is str and isinstance(value, str):
+            return value
+    return _INVALID
+
+
+def _decode_llm_json(raw: str, schema: dict) -> dict | None:
+    """
+    Decodes an LLM reply into a dict that satisfies `schema`, or returns None.
+    Finds the first balanced JSON object, so fences and surrounding prose are
+    ignored, and repairs common formatting quirks before giving up.
+    Schema values are a type, a tuple of accepted types, or a list of allowed
+    literals (matched case-insensitively and returned in canonical form).
+    """
+    text = _first_object(raw) if isinstance(raw, str) else None
+    if text is None:
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        try:
+            data = json.loads(_JSON_REPAIR.sub(_repair_token, text))
+        except ValueError:
+            return None
+    if not isinstance(data, dict):
+        return None
+    for field, spec in schema.items():
+        value = _coerce(data[field], spec) if field in data else _INVALID
+        if value is _INVALID:
+            return None
+        data[field] = value
+    return data
+
+
+def _message_key(text: str) -> str:
+    """
+    Fixed-size storage key for a message: the SHA-256 hex digest of its exact
+    text. Nothing is normalized, since whitespace and Unicode form are part of
+    what a DKIM signature covers.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# Multi-label public suffixes (a subset of the Public Suffix List covering
+# the common country-code second levels and shared hosting domains). Any
+# other domain's suffix is its last label, the list's default "*" rule.
+PUBLIC_SUFFIXES = frozenset("""
+ac.uk co.uk gov.uk ltd.uk me.uk net.uk nhs.uk org.uk plc.uk sch.uk
+asn.au com.au edu.au gov.au id.au net.au org.au
+ac.nz co.nz geek.nz gen.nz govt.nz net.nz org.nz school.nz
+ac.jp co.jp ed.jp go.jp gr.jp lg.jp ne.jp or.jp
+ac.kr co.kr go.kr ne.kr or.kr re.kr
+com.br edu.br gov.br net.br org.br
+com.cn edu.cn gov.cn net.cn org.cn
+com.hk edu.hk gov.hk net.hk org.hk
+com.tw edu.tw gov.tw net.tw org.tw
+ac.in co.in edu.in firm.in gen.in gov.in ind.in net.in org.in
+ac.za co.za gov.za net.za org.za
+ac.il co.il gov.il net.il org.il
+co.id or.id web.id com.my net.my org.my com.ph net.ph org.ph
+com.sg edu.sg gov.sg net.sg org.sg com.vn net.vn org.vn
+com.ar com.co com.mx com.pe com.tr com.ua com.pl net.pl org.pl
+appspot.com blogspot.com cloudfront.net github.io gitlab.io herokuapp.com
+netlify.app pages.dev vercel.app
+""".split())
+
+ALIGNMENT_MODES = ("strict", "relaxed")
+
+# A header field name is any run of printable ASCII except the colon
+_FIELD_NAME = re.compile(r"[!-9;-~]+")
+_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+# RFC 2047 encoded word; skipped as an opaque atom so stray specials inside
+# a broken mailer's display name cannot be mistaken for address syntax
+_ENCODED_WORD = re.compile(r"=\?[^?\s]+\?[BbQq]\?[^?\s]*\?=")
+_DOMAIN = re.compile(r"[a-z0-9](?:[a-z0-9-]*[a-z0-9])?(?:\.[a-z0-9](?:[a-z0-9-]*[a-z0-9])?)*")
+
+
+def _parse_message(text: str) -> tuple[list[tuple[str, str, str]], str] | None:
+    """
+    Splits a message into header fields and body, or returns None if the
+    text does not start with a header block. Each field is (lowercased name,
+    unfolded value, raw field with its CRLF folding, as signed); the body is
+    everything after the first empty line, with CRLF line endings ("" when
+    only headers were given). An mbox "From " postmark on the first line is
+    skipped.
+    """
+    fields = []
+    lines = _LINE_BREAK.split(text)
+    for index, line in enumerate(lines):
+        if not fields and not line.strip():
+            continue
+        if not line:
+            return fields, "\r\n".join(lines[index + 1:])
+        if line[0] in " \t":
+            if not fields:
+                # A continuation with no field to continue
+                return None
+            name, value, raw = fields[-1]
+            fields[-1] = (name, f"{value} {line.strip()}", f"{raw}\r\n{line}")
+            continue
+        if not fields and line.startswith("From "):
+            continue
+        name, sep, value = line.partition(":")
+        if not sep or not _FIELD_NAME.fullmatch(name.rstrip()):
+            return None
+        fields.append((name.rstrip().lower(), value.strip(), line))
+    return (fields, "") if fields else None
+
+
+def _strip_comments(text: str) -> str | None:
+    # text without its comments (nested, with quoted-pairs; quoted strings are
+    # kept as they are), or None if a comment or quoted string is unclosed
+    out, depth, i = [], 0, 0
+    while i < len(text):
+        ch = text[i]
+        if depth:
+            if ch == "\\":
+                i += 1
+            elif ch == "(":
+                depth += 1
+            elif ch == ")":
+                depth -= 1
+        elif ch == "(":
+            depth = 1
+        elif ch == '"':
+            end = i + 1
+            while end < len(text) and text[end] != '"':
+                end += 2 if text[end] == "\\" else 1
+            if end >= len(text):
+                return None
+            out.append(text[i:end + 1])
+            i = end
+        else:
+            out.append(ch)
+        i += 1
+    return None if depth else "".join(out)
+
+
+def _mailbox_addresses(value: str) -> list[str] | None:
+    """
+    The addr-spec of each mailbox in an address-list value, or None if it is
+    malformed. Handles quoted and encoded display names, nested comments and
+    angle addresses; a bare address must be the only word of its mailbox.
+    """
+    addresses, bare, angle = [], [], None
+    depth, i = 0, 0
+    while i <= len(value):
+        ch = value[i] if i < len(value) else ","
+        if depth:
+            if ch == "\\":
+                i += 1
+            elif ch == "(":
+                depth += 1
+            elif ch == ")":
+                depth -= 1
+        elif ch == "(":
+            depth = 1
+        elif ch == '"':
+            end = i + 1
+            while end < len(value) and value[end] != '"':
+                end += 2 if value[end] == "\\" else 1
+            if end >= len(value):
+                return None
+            bare.append(value[i:end + 1])
+            i = end
+        elif ch == "<":
+            end = value.find(">", i)
+            if end == -1 or angle is not None:
+                return None
+            # Comments may sit anywhere in an angle address: <pete(his account)@silly.test>
+            angle = _strip_comments(value[i + 1:end])
+            if angle is None:
+                return None
+            angle = angle.strip()
+            i = end
+        elif ch == ",":
+            words = "".join(bare).split()
+            if angle is not None:
+                addresses.append(angle.rpartition(":")[2])
+            elif len(words) == 1:
+                addresses.append(words[0])
+            elif words:
+                return None
+            bare, angle = [], None
+        else:
+            match = _ENCODED_WORD.match(value, i)
+            if match:
+                bare.append(" ")
+                i = match.end()
+                continue
+            bare.append(ch)
+        i += 1
+    return None if depth else addresses
+
+
+def _normalize_domain(domain: str) -> str | None:
+    domain = domain.strip().rstrip(".").lower()
+    if not domain.isascii():
+        try:
+            domain = domain.encode("idna").decode("ascii")
+        except UnicodeError:
+            return None
+    return domain if _DOMAIN.fullmatch(domain) else None
+
+
+def _address_domain(address: str) -> str | None:
+    local, at, domain = address.rpartition("@")
+    return _normalize_domain(domain) if at and local else None
+
+
+def _dkim_tags(value: str) -> dict[str, str]:
+    # tag=value pairs; folding whitespace inside values (b=, bh=, h=) is removed
+    tags = {}
+    for part in value.split(";"):
+        name, sep, tag_value = part.partition("=")
+        if sep and name.strip():
+            tags.setdefault(name.strip(), "".join(tag_value.split()))
+    return tags
+
+
+def _organizational_domain(domain: str) -> str:
+    labels = domain.split(".")
+    for i in range(len(labels)):
+        if ".".join(labels[i:]) in PUBLIC_SUFFIXES:
+            return ".".join(labels[max(i - 1, 0):])
+    return ".".join(labels[-2:])
+
+
+def _domains_aligned(signing: str, author: str, mode: str) -> bool:
+    if mode == "strict":
+        return signing == author
+    return _organizational_domain(signing) == _organizational_domain(author)
+
+
+def _dkim_alignment(fields: list[tuple[str, str, str]],
+                    mode: str) -> tuple[bool | None, str, list[tuple[dict[str, str], str]]]:
+    """
+    DMARC-style DKIM alignment of parsed header fields: the verdict, the
+    From: domain ("" if there is no single one) and the (tags, raw field) of
+    every DKIM-Signature whose d= domain aligns with it under `mode`.
+    The verdict is True if any signature aligns, False if none does (or
+    there is no signature, or the From: is ambiguous), and None when the
+    From: value cannot be parsed.
+    """
+    authors = [value for name, value, _ in fields if name == "from"]
+    if len(authors) != 1:
+        return (None if not authors else False), "", []
+    addresses = _mailbox_addresses(authors[0])
+    if not addresses:
+        return None, "", []
+    domains = {_address_domain(a) for a in addresses}
+    if None in domains:
+        return None, "", []
+    if len(domains) != 1:
+        return False, "", []
+    author = domains.pop()
+    aligned = []
+    for name, value, raw in fields:
+        if name == "dkim-signature":
+            tags = _dkim_tags(value)
+            signing = _normalize_domain(tags.get("d", ""))
+            if signing and _domains_aligned(signing, author, mode):
+                aligned.append((tags, raw))
+    return bool(aligned), author, aligned
+
+
+# Key records live at <selector>._domainkey.<d=>, fetched as DNS-over-HTTPS
+# JSON (Google / Cloudflare "application/dns-json" format)
+DEFAULT_KEY_RESOLVER = "https://dns.google/resolve?name={name}&type=TXT"
+KEY_TTL = 3600
+RSA_MIN_BITS = 1024
+
+_SELECTOR = re.compile(r"[a-z0-9_](?:[a-z0-9_.-]*[a-z0-9_])?")
+_TXT_CHUNK = re.compile(r'"((?:[^"\\]|\\.)*)"')
+_B_TAG = re.compile(r"(^|;)(\s*b\s*=)[^;]*")
+_WSP = re.compile(r"[ \t]+")
+_SHA256_DIGEST_INFO = bytes.fromhex("3031300d060960864801650304020105000420")
+
+
+def _now() -> int:
+    # Transaction time in Unix seconds, identical on every node
+    stamp = gl.message_raw["datetime"].replace("Z", "+00:00")
+    return int(datetime.datetime.fromisoformat(stamp).timestamp())
+
+
+def _key_name(tags: dict[str, str]) -> str | None:
+    selector = tags.get("s", "").lower()
+    domain = _normalize_domain(tags.get("d", ""))
+    if not domain or not _SELECTOR.fullmatch(selector):
+        return None
+    return f"{selector}._domainkey.{domain}"
+
+
+def _doh_key_record(body: str) -> str:
+    """
+    The DKIM key record in a DNS-over-HTTPS JSON answer, "" if there is none.
+    Raises ValueError if the body is not such an answer.
+    """
+    data = json.loads(body)
+    if not isinstance(data, dict):
+        raise ValueError("not a DNS JSON answer")
+    for answer in data.get("Answer") or []:
+        if isinstance(answer, dict) and answer.get("type") == 16:
+            text = str(answer.get("data", ""))
+            chunks = _TXT_CHUNK.findall(text)
+            record = "".join(chunks) if chunks else text
+            if "p=" in record:
+                return record
+    return ""
+
+
+def _canon_header(raw: str, method: str) -> str:
+    if method == "simple":
+        return raw + "\r\n"
+    name, _, value = raw.partition(":")
+    value = _WSP.sub(" ", value.replace("\r\n", "")).strip(" ")
+    return name.rstrip(" \t").lower() + ":" + value + "\r\n"
+
+
+def _canon_body(body: str, method: str) -> bytes:
+    lines = body.split("\r\n")
+    if method == "relaxed":
+        lines = [_WSP.sub(" ", line).rstrip(" ") for line in lines]
+    while lines and not lines[-1]:
+        lines.pop()
+    if not lines:
+        return b"" if method == "relaxed" else b"\r\n"
+    return ("\r\n".join(lines) + "\r\n").encode("utf-8")
+
+
+def _signed_headers(tags: dict[str, str], raw_signature: str,
+                    fields: list[tuple[str, str, str]], method: str) -> bytes:
+    # h= fields, each taking the next unused instance from the bottom up,
+    # then the signature field itself with an empty b= and no final CRLF
+    remaining: dict[str, list[str]] = {}
+    for name, _, raw in fields:
+        remaining.setdefault(name, []).append(raw)
+    parts = []
+    for name in tags.get("h", "").split(":"):
+        instances = remaining.get(name.strip().lower())
+        if instances:
+            parts.append(_canon_header(instances.pop(), method))
+    name, _, value = raw_signature.partition(":")
+    unsigned = name + ":" + _B_TAG.sub(r"\1\2", value)
+    parts.append(_canon_header(unsigned, method)[:-2])
+    return "".join(parts).encode("utf-8")
+
+
+def _der_element(data: bytes, pos: int) -> tuple[int, int, int]:
+    # (tag, content start, content end) of the DER element at pos
+    tag, length = data[pos], data[pos + 1]
+    pos += 2
+    if length & 0x80:
+        size = length & 0x7F
+        length = int.from_bytes(data[pos:pos + size], "big")
+        pos += size
+    if pos + length > len(data):
+        raise ValueError("truncated DER element")
+    return tag, pos, pos + length
+
+
+def _rsa_public_key(der: bytes) -> tuple[int, int] | None:
+    """(modulus, exponent) from a SubjectPublicKeyInfo or a bare RSAPublicKey."""
+    try:
+        _, start, _ = _der_element(der, 0)
+        tag, first, end = _der_element(der, start)
+        if tag == 0x30:
+            # AlgorithmIdentifier; the RSAPublicKey is in the BIT STRING after it
+            tag, bits, bits_end = _der_element(der, end)
+            if tag != 0x03:
+                return None
+            der = der[bits + 1:bits_end]
+            _, start, _ = _der_element(der, 0)
+            tag, first, end = _der_element(der, start)
+        if tag != 0x02:
+            return None
+        _, exp_start, exp_end = _der_element(der, end)
+    except (IndexError, ValueError):
+        return None
+    return int.from_bytes(der[first:end], "big"), int.from_bytes(der[exp_start:exp_end], "big")
+
+
+def _rsa_verify(public: bytes, digest: bytes, signature: bytes) -> bool:
+    # RSASSA-PKCS1-v1_5 with SHA-256, keys of at least RSA_MIN_BITS (RFC 8301)
+    key = _rsa_public_key(public)
+    if key is None:
+        return False
+    modulus, exponent = key
+    size = (modulus.bit_length() + 7) // 8
+    if modulus.bit_length() < RSA_MIN_BITS or len(signature) != size:
+        return False
+    value = int.from_bytes(signature, "big")
+    if value >= modulus:
+        return False
+    suffix = _SHA256_DIGEST_INFO + digest
+    expected = b"\x00\x01" + b"\xff" * (size - 3 - len(suffix)) + b"\x00" + suffix
+    return pow(value, exponent, modulus).to_bytes(size, "big") == expected
+
+
+# Edwards25519 (RFC 8032), extended coordinates (X, Y, Z, T)
+_ED_P = 2**255 - 19
+_ED_L = 2**252 + 27742317777372353535851937790883648493
+_ED_D = -121665 * pow(121666, _ED_P - 2, _ED_P) % _ED_P
+_ED_SQRT_M1 = pow(2, (_ED_P - 1) // 4, _ED_P)
+
+
+def _ed_add(p: tuple, q: tuple) -> tuple:
+    a = (p[1] - p[0]) * (q[1] - q[0]) % _ED_P
+    b = (p[1] + p[0]) * (q[1] + q[0]) % _ED_P
+    c = 2 * p[3] * q[3] * _ED_D % _ED_P
+    d = 2 * p[2] * q[2] % _ED_P
+    e, f, g, h = b - a, d - c, d + c, b + a
+    return e * f % _ED_P, g * h % _ED_P, f * g % _ED_P, e * h % _ED_P
+
+
+def _ed_multiply(scalar: int, point: tuple) -> tuple:
+    result = (0, 1, 1, 0)
+    while scalar:
+        if scalar & 1:
+            result = _ed_add(result, point)
+        point = _ed_add(point, point)
+        scalar >>= 1
+    return result
+
+
+def _ed_decode(data: bytes) -> tuple | None:
+    y = int.from_bytes(data, "little")
+    sign, y = y >> 255, y & ((1 << 255) - 1)
+    if y >= _ED_P:
+        return None
+    x2 = (y * y - 1) * pow(_ED_D * y * y + 1, _ED_P - 2, _ED_P) % _ED_P
+    x = pow(x2, (_ED_P + 3) // 8, _ED_P)
+    if (x * x - x2) % _ED_P:
+        x = x * _ED_SQRT_M1 % _ED_P
+    if (x * x - x2) % _ED_P or (x == 0 and sign):
+        return None
+    if x & 1 != sign:
+        x = _ED_P - x
+    return x, y, 1, x * y % _ED_P
+
+
+_ED_BASE = _ed_decode((4 * pow(5, _ED_P - 2, _ED_P) % _ED_P).to_bytes(32, "little"))
+
+
+def _ed25519_verify(public: bytes, message: bytes, signature: bytes) -> bool:
+    if len(public) != 32 or len(signature) != 64:
+        return False
+    a, r = _ed_decode(public), _ed_decode(signature[:32])
+    s = int.from_bytes(signature[32:], "little")
+    if a is None or r is None or s >= _ED_L:
+        return False
+    h = int.from_bytes(hashlib.sha512(signature[:32] + public + message).digest(), "little") % _ED_L
+    left, right = _ed_multiply(s, _ED_BASE), _ed_add(r, _ed_multiply(h, a))
+    return ((left[0] * right[2] - right[0] * left[2]) % _ED_P == 0
+            and (left[1] * right[2] - right[1] * left[2]) % _ED_P == 0)
+
+
+def _verify_signature(tags: dict[str, str], raw_signature: str,
+                      fields: list[tuple[str, str, str]], body: str, record: str) -> bool:
+    """
+    Cryptographic check of one DKIM-Signature against its key record
+    (RFC 6376, RFC 8463): simple or relaxed canonicalization, the l= body
+    length, the bh= body hash, then the rsa-sha256 or ed25519-sha256
+    signature over the signed headers. rsa-sha1 is refused (RFC 8301), as
+    are revoked keys and signatures that do not cover From:.
+    """
+    key = _dkim_tags(record)
+    kind = key.get("k", "rsa").lower()
+    if tags.get("v") != "1" or not key.get("p") or tags.get("a", "").lower() != f"{kind}-sha256":
+        return False
+    if kind not in ("rsa", "ed25519") or "sha256" not in key.get("h", "sha256").lower().split(":"):
+        return False
+    if "from" not in [name.strip().lower() for name in tags.get("h", "").split(":")]:
+        return False
+    header_method, _, body_method = tags.get("c", "simple").lower().partition("/")
+    body_method = body_method or "simple"
+    if header_method not in ("simple", "relaxed") or body_method not in ("simple", "relaxed"):
+        return False
+    try:
+        public = base64.b64decode(key["p"], validate=True)
+        signature = base64.b64decode(tags.get("b", ""), validate=True)
+        body_hash = base64.b64decode(tags.get("bh", ""), validate=True)
+    except ValueError:
+        return False
+
+    canonical_body = _canon_body(body, body_method)
+    if "l" in tags:
+        if not tags["l"].isdigit() or int(tags["l"]) > len(canonical_body):
+            return False
+        canonical_body = canonical_body[:int(tags["l"])]
+    if hashlib.sha256(canonical_body).digest() != body_hash:
+        return False
+
+    digest = hashlib.sha256(_signed_headers(tags, raw_signature, fields, header_method)).digest()
+    if kind == "rsa":
+        return _rsa_verify(public, digest, signature)
+    return _ed25519_verify(public, digest, signature)
+
+
+def _key_names(aligned: list[tuple[dict[str, str], str]]) -> set[str]:
+    return {name for name in (_key_name(tags) for tags, _ in aligned) if name}
+
+
+def _signature_verdict(aligned: list[tuple[dict[str, str], str]], fields: list[tuple[str, str, str]],
+                       body: str, records: dict[str, str | None]) -> bool | None:
+    # DKIM passes when any aligned signature verifies against its key. None
+    # when none did but a key could not be fetched: the verdict is unknown
+    # and must not be stored, so a later call retries it.
+    unresolved = False
+    for tags, raw in aligned:
+        name = _key_name(tags)
+        record = records.get(name) if name else ""
+        if record is None:
+            unresolved = True
+        elif record and _verify_signature(tags, raw, fields, body, record):
+            return True
+    return None if unresolved else False
+
+
+def _iter_lines(text: str) -> typing.Iterator[str]:
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start)
+        if end == -1:
+            end = len(text)
+        yield text[start:end].rstrip("\r")
+        start = end + 1
+
+
+_MBOX_QUOTED = re.compile(r">+From ")
+
+
+def _iter_mbox(payload: str) -> typing.Iterator[str]:
+    """
+    Each message of an mbox payload, read line by line: the lines between
+    "From " postmarks, with mboxrd ">From " quoting undone and the blank
+    separator line dropped. A payload that does not start with a postmark
+    is read as a single message.
+    """
+    lines = []
+    for line in _iter_lines(payload):
+        if line.startswith("From "):
+            if any(lines):
+                yield "\n".join(lines[:-1] if not lines[-1] else lines)
+            lines = []
+        else:
+            lines.append(line[1:] if _MBOX_QUOTED.match(line) else line)
+    if any(lines):
+        yield "\n".join(lines[:-1] if not lines[-1] else lines)
+
+
+_BATCH_DECODER = json.JSONDecoder()
+_BATCH_SPACE = re.compile(r"\s*")
+
+
+def _iter_batch(payload: str) -> typing.Iterator[str]:
+    """
+    Elements of a JSON array of messages, decoded one at a time.
+    Raises ValueError on a malformed array; non-string elements yield "".
+    """
+    pos = _BATCH_SPACE.match(payload).end()
+    if payload[pos:pos + 1] != "[":
+        raise ValueError("batch payload must be a JSON array")
+    pos = _BATCH_SPACE.match(payload, pos + 1).end()
+    if payload[pos:pos + 1] == "]":
+        return
+    while True:
+        value, pos = _BATCH_DECODER.raw_decode(payload, pos)
+        yield value if isinstance(value, str) else ""
+        pos = _BATCH_SPACE.match(payload, pos).end()
+        separator = payload[pos:pos + 1]
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"expected ',' or ']' at offset {pos}")
+        pos = _BATCH_SPACE.match(payload, pos + 1).end()
+
+
+def _domain_summary(value: str) -> dict[str, int]:
+    # domain_counts values are "<passed>,<failed>"
+    passed, _, failed = value.partition(",")
+    return {"passed": int(passed), "failed": int(failed)}
+
+
+# Page size caps for list_entries / export_entries. Each page re-walks the
+# keys before its cursor (see _page), so mirrors should sync through
+# export_entries, whose larger pages keep a full pass to N / EXPORT_LIMIT walks.
+LIST_LIMIT = 200
+EXPORT_LIMIT = 1000
+
+
+def _page(entries: TreeMap, start_after: str, limit: int, cap: int,
+          convert: typing.Callable | None = None) -> tuple[list, str]:
+    """
+    Up to `limit` (key, value) pairs with keys strictly after `start_after`,
+    in key order, and the cursor for the next page ("" after the last one).
+    TreeMap iterates from its first key and cannot seek, so every page walks
+    the keys before its cursor: O(position + limit) key reads per page and
+    O(N^2 / limit) for a full pass. Only the returned entries' values are read.
+    """
+    limit = max(1, min(limit, cap))
+    page = []
+    for key in entries:
+        if start_after and key <= start_after:
+            continue
+        if len(page) == limit:
+            return page, page[-1][0]
+        value = entries[key]
+        page.append([key, convert(value) if convert else value])
+    return page, ""
+
+
+def _list_view(entries: TreeMap, start_after: str, limit: int,
+               convert: typing.Callable | None = None) -> dict[str, typing.Any]:
+    page, cursor = _page(entries, start_after, limit, LIST_LIMIT, convert)
+    return {"entries": page, "next": cursor}
+
+
+def _export_view(entries: TreeMap, start_after: str, limit: int,
+                 convert: typing.Callable | None = None) -> str:
+    # Columnar, whitespace-free JSON: {"k": [...], "v": [...], "n": cursor}
+    page, cursor = _page(entries, start_after, limit, EXPORT_LIMIT, convert)
+    payload = {"k": [k for k, _ in page], "v": [v for _, v in page], "n": cursor}
+    return json.dumps(payload, separators=(",", ":"))
+
+
 class EmailAuth(gl.Contract):
     """
     Verifies DKIM Alignment: Checks if the signed domain (d=) 
     matches the sender's domain (From:).
+    Headers are parsed locally and aligned signatures are verified
+    cryptographically against their published keys; the LLM is only asked
+    about header blocks the parser cannot read.
     """
     
-    # Stores: Header Hash (or snippet) -> Verified Boolean
-    # We map the full header text to a boolean result.
+    # Stores: Header Content Key -> Verified Boolean
+    # The key is a digest of the exact header block (see _message_key).
     verification_results: TreeMap[str, bool]
+
+    # Content key -> original input, kept only when deployed with keep_originals
+    originals: TreeMap[str, str]
+    keep_originals: bool
+
+    # "strict" (d= equals the From: domain) or "relaxed" (same organizational domain)
+    alignment: str
+
+    # Signature verification: DoH URL template with a {name} placeholder, and
+    # the key cache "<selector>._domainkey.<domain>" -> "<expires>|<record>"
+    # ("" record: the name publishes no key)
+    verify_signatures: bool
+    key_resolver: str
+    key_ttl: u256
+    dkim_keys: TreeMap[str, str]
+
+    # Bulk verification: From: domain -> "<passed>,<failed>" (see _domain_summary),
+    # plus archive-wide totals
+    domain_counts: TreeMap[str, str]
+    mailbox_passed: u256
+    mailbox_failed: u256
+    mailbox_unparsed: u256
+    # Content keys of archive messages the parser could not read, so a
+    # re-submitted archive does not count them as unparsed again
+    unparsed_messages: TreeMap[str, bool]
+
+    # Hot-path counters: "<method>.<counter>" -> total (see get_stats)
+    stats: TreeMap[str, u256]
     
-    def __init__(self):
-        pass
+    def __init__(self, keep_originals: bool = False, alignment: str = "strict",
+                 verify_signatures: bool = True, key_resolver: str = DEFAULT_KEY_RESOLVER,
+                 key_ttl: int = KEY_TTL):
+        if alignment not in ALIGNMENT_MODES:
+            raise gl.vm.UserError(f"alignment must be one of {', '.join(ALIGNMENT_MODES)}")
+        if "{name}" not in key_resolver:
+            raise gl.vm.UserError("key_resolver must contain a {name} placeholder")
+        self.keep_originals = keep_originals
+        self.alignment = alignment
+        self.verify_signatures = verify_signatures
+        self.key_resolver = key_resolver
+        self.key_ttl = u256(key_ttl)
 
     @gl.public.write
     def verify_dkim(self, header_text: str) -> None:
         """
-        Parses raw email headers to check DKIM domain alignment.
+        Parses raw email headers to check DKIM domain alignment, and
+        verifies the aligned signatures when the message body is included
+        (headers alone only verify if the signed body was empty).
         Returns NONE to avoid simulator serialization crashes.
         """
-        
-        def check_alignment_nondet() -> bool:
+        key = _message_key(header_text)
+        refresh = key in self.verification_results
+        mode = self.alignment
+
+        # Deterministic path: every node computes the same verdict; only key
+        # lookups that miss the cache need a consensus round
+        parsed = _parse_message(header_text)
+        local, _, aligned = _dkim_alignment(parsed[0], mode) if parsed else (None, "", [])
+        if local is not None:
+            checked = hits = fetches = 0
+            if local and self.verify_signatures:
+                records, hits, fetches = self._resolve_keys(_key_names(aligned))
+                local = _signature_verdict(aligned, parsed[0], parsed[1], records)
+                checked = 1
+            # A verdict left open by a failed key fetch is not stored
+            if local is not None:
+                self.verification_results[key] = local
+                if self.keep_originals:
+                    self.originals[key] = header_text
+            self._record(
+                "verify_dkim",
+                calls=1,
+                parsed_locally=1,
+                consensus_rounds=int(fetches > 0),
+                input_bytes=len(header_text.encode("utf-8")),
+                refreshes=int(local is not None and refresh),
+                signatures_checked=checked,
+                signature_failures=int(local is False and checked),
+                deferred=int(local is None),
+                key_cache_hits=hits,
+                key_fetches=fetches,
+            )
+            return None
+
+        if mode == "strict":
+            rule = "Return TRUE if they match exactly (ignoring case)."
+        else:
+            rule = ("Return TRUE if they share the same organizational domain "
+                    "(e.g. 'mail.example.com' and 'example.com').")
+
+        def check_alignment_nondet() -> bool | None:
             # Task: Parse headers and compare domains
             task = f"""
             Act as an Email Security Analyst.
@@ -39,7 +830,7 @@ class EmailAuth(gl.Contract):
             1. Extract the domain from the 'From:' header (e.g. 'bob@example.com' -> 'example.com').
             2. Extract the 'd=' value from the 'DKIM-Signature' header.
             3. Compare them.
-            4. Return TRUE if they match exactly (ignoring case).
+            4. {rule}
             5. Return FALSE if they differ or if DKIM is missing.
             
             Respond using ONLY JSON:
@@ -47,29 +838,256 @@ class EmailAuth(gl.Contract):
             """
 
             result_raw = gl.nondet.exec_prompt(task)
-            
-            try:
-                cleaned = result_raw.replace("```json", "").replace("```", "").strip()
-                parsed = json.loads(cleaned)
-                return bool(parsed.get("is_aligned", False))
-            except:
-                return False
+
+            # None marks an undecodable reply, distinct from a real "not aligned"
+            parsed = _decode_llm_json(result_raw, {"is_aligned": bool})
+            return None if parsed is None else parsed["is_aligned"]
 
         # Consensus: Strict Equality
         # Security checks require 100% agreement. 
         # All validators must agree the domains match.
         result = gl.eq_principle.strict_eq(check_alignment_nondet)
 
-        # Store the result
-        self.verification_results[header_text] = result
+        # Store the result (an undecodable verdict leaves state untouched)
+        if result is not None:
+            self.verification_results[key] = result
+            if self.keep_originals:
+                self.originals[key] = header_text
+
+        self._record(
+            "verify_dkim",
+            calls=1,
+            consensus_rounds=1,
+            llm_prompts=1,
+            input_bytes=len(header_text.encode("utf-8")),
+            refreshes=int(result is not None and refresh),
+            decode_failures=int(result is None),
+        )
         
         return None
 
+    @gl.public.write
+    def verify_mailbox(self, payload: str) -> None:
+        """
+        Checks DKIM for every message in an archive, either mbox text or a
+        JSON array of messages. Messages are streamed and decided by the
+        local parser only; each verdict is stored like a verify_dkim result,
+        and per-domain and archive totals are updated.
+        The archive is streamed twice: first to collect the signing keys it
+        needs, which are resolved together (cache first, one consensus round
+        for the rest), then to verify. Messages already verified are
+        skipped, so re-submitting an archive does not double count;
+        unparseable messages are counted once and get no verdict. Messages whose
+        signing key could not be fetched are deferred: neither stored nor
+        counted, so re-submitting the archive checks them again.
+        """
+        mode = self.alignment
+        verify = self.verify_signatures
+
+        def messages() -> typing.Iterator[str]:
+            if payload.lstrip().startswith("["):
+                return _iter_batch(payload)
+            return _iter_mbox(payload)
+
+        def parse(message: str) -> tuple[tuple | None, tuple[bool | None, str, list]]:
+            # One message the parser trips over is unparsed, not a failed archive
+            try:
+                parsed = _parse_message(message)
+                return parsed, _dkim_alignment(parsed[0], mode) if parsed else (None, "", [])
+            except Exception as e:
+                print(f"Unparseable message: {e}")
+                return None, (None, "", [])
+
+        def known(key: str) -> bool:
+            return key in self.verification_results or key in self.unparsed_messages
+
+        records, hits, fetches = {}, 0, 0
+        try:
+            if verify:
+                names = set()
+                for message in messages():
+                    if not known(_message_key(message)):
+                        names |= _key_names(parse(message)[1][2])
+                records, hits, fetches = self._resolve_keys(names)
+
+            tally: dict[str, list[int]] = {}
+            seen = passed = failed = unparsed = duplicates = deferred = 0
+            for message in messages():
+                seen += 1
+                key = _message_key(message)
+                if known(key):
+                    duplicates += 1
+                    continue
+                parsed, (verdict, domain, aligned) = parse(message)
+                if verdict is None:
+                    self.unparsed_messages[key] = True
+                    unparsed += 1
+                    continue
+                if verdict and verify:
+                    verdict = _signature_verdict(aligned, parsed[0], parsed[1], records)
+                    if verdict is None:
+                        deferred += 1
+                        continue
+                self.verification_results[key] = verdict
+                if self.keep_originals:
+                    self.originals[key] = message
+                passed += int(verdict)
+                failed += int(not verdict)
+                counts = tally.setdefault(domain, [0, 0])
+                counts[0 if verdict else 1] += 1
+        except ValueError as e:
+            raise gl.vm.UserError(f"malformed batch payload: {e}")
+
+        # One write per touched domain and total, however many messages it had
+        for domain, (domain_passed, domain_failed) in tally.items():
+            if domain in self.domain_counts:
+                before = _domain_summary(self.domain_counts[domain])
+                domain_passed += before["passed"]
+                domain_failed += before["failed"]
+            self.domain_counts[domain] = f"{domain_passed},{domain_failed}"
+        if passed:
+            self.mailbox_passed = u256(int(self.mailbox_passed) + passed)
+        if failed:
+            self.mailbox_failed = u256(int(self.mailbox_failed) + failed)
+        if unparsed:
+            self.mailbox_unparsed = u256(int(self.mailbox_unparsed) + unparsed)
+
+        self._record(
+            "verify_mailbox",
+            calls=1,
+            messages=seen,
+            parsed_locally=passed + failed,
+            consensus_rounds=int(fetches > 0),
+            input_bytes=len(payload.encode("utf-8")),
+            cache_hits=duplicates,
+            deferred=deferred,
+            key_cache_hits=hits,
+            key_fetches=fetches,
+        )
+        return None
+
+    def _resolve_keys(self, names: set[str]) -> tuple[dict[str, str | None], int, int]:
+        """
+        Key records for `names` ("" when a name publishes no key, None when it
+        could not be resolved): fresh cache entries are reused and the rest
+        are fetched through key_resolver in a single consensus round, then
+        cached for key_ttl seconds. Returns (records, cache hits, fetches).
+        """
+        now = _now()
+        records, missing = {}, []
+        for name in sorted(names):
+            if name in self.dkim_keys:
+                expires, _, record = self.dkim_keys[name].partition("|")
+                if int(expires) > now:
+                    records[name] = record
+                    continue
+            missing.append(name)
+        if not missing:
+            return records, len(names), 0
+
+        resolver = self.key_resolver
+
+        def fetch_keys_nondet() -> str:
+            fetched = {}
+            for name in missing:
+                try:
+                    body = gl.nondet.web.render(resolver.format(name=name), mode="text")
+                    fetched[name] = _doh_key_record(body)
+                except Exception as e:
+                    print(f"Key lookup failed for {name}: {e}")
+                    fetched[name] = None
+            return json.dumps(fetched, sort_keys=True)
+
+        # Consensus: Strict Equality on the published records
+        fetched = json.loads(gl.eq_principle.strict_eq(fetch_keys_nondet))
+        expires = now + int(self.key_ttl)
+        for name, record in fetched.items():
+            records[name] = record
+            if record is not None:
+                self.dkim_keys[name] = f"{expires}|{record}"
+        return records, len(names) - len(missing), len(missing)
+
     @gl.public.view
     def is_verified(self, header_text: str) -> bool:
         """
         Returns true if the email headers passed the alignment check.
         """
-        if header_text in self.verification_results:
-            return self.verification_results[header_text]
+        key = _message_key(header_text)
+        if key in self.verification_results:
+            return self.verification_results[key]
         return False
+
+    @gl.public.view
+    def get_original(self, key: str) -> str:
+        """
+        Returns the input stored under a content key, or "" if originals are not kept.
+        """
+        if key in self.originals:
+            return self.originals[key]
+        return ""
+
+    @gl.public.view
+    def list_entries(self, start_after: str = "", limit: int = 50) -> dict[str, typing.Any]:
+        """
+        Pages through alignment verdicts in key order: {"entries": [[key, value], ...], "next": cursor}.
+        Pass "next" back as start_after; it is "" after the last page.
+        """
+        return _list_view(self.verification_results, start_after, limit)
+
+    @gl.public.view
+    def export_entries(self, start_after: str = "", limit: int = EXPORT_LIMIT) -> str:
+        """
+        Same pages as list_entries, as compact columnar JSON for bulk mirroring.
+        """
+        return _export_view(self.verification_results, start_after, limit)
+
+    @gl.public.view
+    def get_domain_summary(self, domain: str) -> dict[str, int]:
+        """
+        Returns {"passed": n, "failed": n} for a From: domain seen by verify_mailbox.
+        """
+        domain = _normalize_domain(domain) or ""
+        if domain in self.domain_counts:
+            return _domain_summary(self.domain_counts[domain])
+        return {"passed": 0, "failed": 0}
+
+    @gl.public.view
+    def list_domains(self, start_after: str = "", limit: int = 50) -> dict[str, typing.Any]:
+        """
+        Pages through per-domain summaries in domain order, keyed like list_entries.
+        """
+        return _list_view(self.domain_counts, start_after, limit, _domain_summary)
+
+    @gl.public.view
+    def get_mailbox_summary(self) -> dict[str, int]:
+        """
+        Returns archive-wide verify_mailbox totals and the number of domains seen.
+        """
+        return {
+            "passed": int(self.mailbox_passed),
+            "failed": int(self.mailbox_failed),
+            "unparsed": int(self.mailbox_unparsed),
+            "domains": len(self.domain_counts),
+        }
+
+    @gl.public.view
+    def list_originals(self, start_after: str = "", limit: int = 50) -> dict[str, typing.Any]:
+        """
+        Pages through the retained original inputs, keyed like list_entries.
+        """
+        return _list_view(self.originals, start_after, limit)
+
+    def _record(self, method: str, **counters: int) -> None:
+        # Adds to the "<method>.<counter>" totals read by get_stats
+        for name, amount in counters.items():
+            if amount:
+                key = f"{method}.{name}"
+                current = int(self.stats[key]) if key in self.stats else 0
+                self.stats[key] = u256(current + amount)
+
+    @gl.public.view
+    def get_stats(self) -> dict[str, int]:
+        """
+        Returns hot-path counters keyed "<method>.<counter>".
+        """
+        return {key: int(count) for key, count in self.stats.items()}
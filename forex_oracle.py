@@ -2,49 +2,173 @@
 # { "Depends": "py-genlayer:latest" }
 
 from genlayer import *
+import datetime
+import decimal
 import json
+import re
 import typing
 
+FRANKFURTER_URL = "https://api.frankfurter.app/latest"
+DEFAULT_CURRENCIES = "EUR,GBP,JPY"
+CURRENCY_LIMIT = 64
+HISTORY_DAYS = 366
+HISTORY_LIMIT = 4096
+
+# Rates are 18-decimal fixed point: 1.0 is stored as SCALE
+SCALE = 10**18
+
+_CURRENCY_CODE = re.compile(r"[A-Z]{3}")
+
+
+def _parse_currencies(codes: str) -> list[str]:
+    """Upper-cased currency codes from a comma or space separated list, duplicates dropped."""
+    parsed = []
+    for code in re.split(r"[\s,]+", codes.strip().upper()):
+        if code and code not in parsed:
+            parsed.append(code)
+    return parsed
+
+
+def _to_fixed(value) -> int | None:
+    """
+    18-decimal fixed point of a JSON number decoded as Decimal, rounded half
+    to even; None unless it is a positive finite rate.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, decimal.Decimal)):
+        return None
+    value = decimal.Decimal(value)
+    if not value.is_finite():
+        return None
+    fixed = int((value * SCALE).to_integral_value(rounding=decimal.ROUND_HALF_EVEN))
+    return fixed if fixed > 0 else None
+
+
+# Min/max tree nodes pack both bounds into one u256: min << 128 | max.
+# An empty node (no rate yet) has min at the top of the range and max 0.
+_RANGE_MASK = (1 << 128) - 1
+_EMPTY_RANGE = _RANGE_MASK << 128
+
+
+def _range_leaf(rate: int) -> int:
+    return (rate << 128 | rate) if rate else _EMPTY_RANGE
+
+
+def _merge_ranges(a: int, b: int) -> int:
+    return min(a >> 128, b >> 128) << 128 | max(a & _RANGE_MASK, b & _RANGE_MASK)
+
+
+def _day(date_str: str) -> int:
+    # ISO date -> proleptic ordinal; raises ValueError on anything else
+    return datetime.date.fromisoformat(date_str).toordinal()
+
+
+def _format_fixed(raw: int) -> str:
+    # Exact decimal text of a fixed-point value: 921300000000000000 -> "0.9213"
+    whole, fraction = divmod(raw, SCALE)
+    digits = f"{fraction:018d}".rstrip("0")
+    return f"{whole}.{digits or '0'}"
+
+
+def _cross(base_raw: int, quote_raw: int) -> int:
+    """
+    Units of quote per 1 base from two base-relative fixed-point rates, as
+    fixed point rounded half to even; 0 if either rate is unknown.
+    """
+    if not base_raw or not quote_raw:
+        return 0
+    quotient, remainder = divmod(quote_raw * SCALE, base_raw)
+    if 2 * remainder > base_raw or (2 * remainder == base_raw and quotient & 1):
+        quotient += 1
+    return quotient
+
+
+def _put(array: DynArray, index: int, value: int) -> None:
+    # Ring slot write: grows the array on the first lap, overwrites after
+    if index == len(array):
+        array.append(u256(value))
+    elif int(array[index]) != value:
+        array[index] = u256(value)
+
+
 class FrankfurterOracle(gl.Contract):
     """
-    A decentralized Forex Oracle fetching official European Central Bank (ECB) 
+    A decentralized Forex Oracle fetching official European Central Bank (ECB)
     exchange rates via the open-source Frankfurter API.
+    The currency list is fixed at deployment and refreshed in a single fetch.
     """
-    
-    latest_eur: u256
-    latest_gbp: u256
-    latest_jpy: u256
+
+    # Rate table: rates[i] prices currencies[i] in units per 1 `base`, as
+    # 18-decimal fixed point (0 until first fetched); currency_index maps a
+    # code to its slot
+    base: str
+    currencies: DynArray[str]
+    currency_index: TreeMap[str, u256]
+    rates: DynArray[u256]
     last_update_date: str
 
-    def __init__(self):
-        self.latest_eur = u256(0)
-        self.latest_gbp = u256(0)
-        self.latest_jpy = u256(0)
+    # Every cross rate, rebuilt whenever a rate changes: compact JSON
+    # {"codes": [base, *currencies], "rates": [[row base -> column quote, ...], ...]}
+    cross_matrix: str
+
+    # Ring buffer of daily snapshots, history_capacity slots of which the
+    # history_count newest are live; history_head is the slot written next.
+    # Per slot p: history_days[p] is the date as a proleptic ordinal,
+    # history_rates[p * C + i] the rate of currencies[i] that day, and
+    # history_area[p * C + i] the running sum of rate x days held up to that
+    # date, so a time-weighted average is a difference of two areas.
+    history_capacity: u256
+    history_head: u256
+    history_count: u256
+    history_days: DynArray[u256]
+    history_rates: DynArray[u256]
+    history_area: DynArray[u256]
+
+    # Min/max segment tree over ring slots, one per currency slot:
+    # "<currency slot>:<node>" -> packed range (see _merge_ranges)
+    history_tree: TreeMap[str, u256]
+
+    # Hot-path counters: "<method>.<counter>" -> total (see get_stats)
+    stats: TreeMap[str, u256]
+
+    def __init__(self, currencies: str = DEFAULT_CURRENCIES, base: str = "USD",
+                 history_days: int = HISTORY_DAYS):
+        codes = _parse_currencies(currencies)
+        base = base.strip().upper()
+        if not _CURRENCY_CODE.fullmatch(base):
+            raise gl.vm.UserError(f"invalid base currency: {base!r}")
+        invalid = [code for code in codes if not _CURRENCY_CODE.fullmatch(code) or code == base]
+        if invalid or not codes or len(codes) > CURRENCY_LIMIT:
+            raise gl.vm.UserError(
+                f"currencies must be 1-{CURRENCY_LIMIT} three-letter codes other than {base}"
+            )
+        if not 1 <= history_days <= HISTORY_LIMIT:
+            raise gl.vm.UserError(f"history_days must be 1-{HISTORY_LIMIT}")
+        self.base = base
+        self.history_capacity = u256(history_days)
+        for slot, code in enumerate(codes):
+            self.currencies.append(code)
+            self.currency_index[code] = u256(slot)
+            self.rates.append(u256(0))
         self.last_update_date = "1970-01-01"
 
     @gl.public.write
     def update_rates(self) -> None:
-        url = "https://api.frankfurter.app/latest?from=USD&to=EUR,GBP,JPY"
+        codes = list(self.currencies)
+        url = f"{FRANKFURTER_URL}?from={self.base}&to={','.join(codes)}"
 
         def fetch_rates_nondet() -> str:
             try:
                 api_response = gl.nondet.web.render(url, mode="text")
-                data = json.loads(api_response)
-                
+                # Decimal keeps the published digits exactly
+                data = json.loads(api_response, parse_float=decimal.Decimal)
+
                 date_str = data.get("date", "1970-01-01")
                 rates = data.get("rates", {})
-                
-                multiplier = 10**18
-                
-                eur = int(rates.get("EUR", 0) * multiplier)
-                gbp = int(rates.get("GBP", 0) * multiplier)
-                jpy = int(rates.get("JPY", 0) * multiplier)
-                
+
+                # One fixed-point slot per configured currency, in table order
                 return json.dumps({
                     "date": date_str,
-                    "eur": eur,
-                    "gbp": gbp,
-                    "jpy": jpy,
+                    "rates": [_to_fixed(rates.get(code)) for code in codes],
                     "success": True
                 })
             except Exception as e:
@@ -54,34 +178,292 @@ class FrankfurterOracle(gl.Contract):
         consensus_result = gl.eq_principle.strict_eq(fetch_rates_nondet)
         parsed_result = json.loads(consensus_result)
 
+        updated = False
+        unchanged = False
+        missing = changed = 0
         if parsed_result.get("success"):
             fetched_date = parsed_result["date"]
-            
+
             if fetched_date != "1970-01-01":
-                self.latest_eur = u256(parsed_result["eur"])
-                self.latest_gbp = u256(parsed_result["gbp"])
-                self.latest_jpy = u256(parsed_result["jpy"])
+                # Same date as the stored snapshot: the refresh bought nothing new
+                unchanged = fetched_date == self.last_update_date
+                # Only slots whose value moved are written; a currency missing
+                # from the response keeps its last rate
+                for slot, rate in enumerate(parsed_result["rates"]):
+                    if rate is None:
+                        missing += 1
+                    elif rate != int(self.rates[slot]):
+                        self.rates[slot] = u256(rate)
+                        changed += 1
                 self.last_update_date = fetched_date
+                updated = True
+
+        snapshot = updated and self._snapshot(self.last_update_date)
+        if changed:
+            self.cross_matrix = self._build_cross_matrix()
+
+        self._record(
+            "update_rates",
+            calls=1,
+            consensus_rounds=1,
+            web_fetches=1,
+            unchanged=int(unchanged),
+            fallbacks=int(not updated),
+            missing_rates=missing,
+            snapshots=int(snapshot),
+            matrix_rebuilds=int(changed > 0),
+        )
+
+    def _build_cross_matrix(self) -> str:
+        codes = [self.base] + list(self.currencies)
+        raws = [SCALE] + [int(r) for r in self.rates]
+        rows = [[_cross(b, q) for q in raws] for b in raws]
+        return json.dumps({"codes": codes, "rates": rows}, separators=(",", ":"))
+
+    def _raw_rate(self, code: str) -> int:
+        # Base-relative raw rate of any code in the table, the base itself included
+        code = code.strip().upper()
+        if code == self.base:
+            return SCALE
+        if code not in self.currency_index:
+            raise gl.vm.UserError(f"unknown currency: {code!r}")
+        return int(self.rates[int(self.currency_index[code])])
+
+    def _snapshot(self, date_str: str) -> bool:
+        """
+        Records the current table as the snapshot for `date_str`: a new day
+        takes the next ring slot (evicting the oldest once full), a repeat of
+        the latest day is revised in place, and an older day is ignored.
+        """
+        try:
+            day = _day(date_str)
+        except ValueError:
+            return False
+        width, count = len(self.currencies), int(self.history_count)
+        rates = [int(r) for r in self.rates]
+
+        areas = [0] * width
+        if count:
+            latest = self._history_slot(count - 1)
+            latest_day = int(self.history_days[latest])
+            if day < latest_day:
+                return False
+            if day == latest_day:
+                for i, rate in enumerate(rates):
+                    if rate != int(self.history_rates[latest * width + i]):
+                        self.history_rates[latest * width + i] = u256(rate)
+                        self._tree_set(i, latest, rate)
+                return True
+            areas = [
+                int(self.history_area[latest * width + i])
+                + int(self.history_rates[latest * width + i]) * (day - latest_day)
+                for i in range(width)
+            ]
+
+        slot = int(self.history_head)
+        _put(self.history_days, slot, day)
+        for i, rate in enumerate(rates):
+            _put(self.history_rates, slot * width + i, rate)
+            _put(self.history_area, slot * width + i, areas[i])
+            self._tree_set(i, slot, rate)
+        self.history_head = u256((slot + 1) % int(self.history_capacity))
+        if count < int(self.history_capacity):
+            self.history_count = u256(count + 1)
+        return True
+
+    def _history_slot(self, index: int) -> int:
+        # Ring slot of the index-th oldest live snapshot
+        capacity = int(self.history_capacity)
+        return (int(self.history_head) - int(self.history_count) + index) % capacity
+
+    def _history_find(self, day: int) -> int:
+        """Index of the newest snapshot dated on or before `day`, -1 if none (binary search)."""
+        low, high = 0, int(self.history_count) - 1
+        found = -1
+        while low <= high:
+            middle = (low + high) // 2
+            if int(self.history_days[self._history_slot(middle)]) <= day:
+                found, low = middle, middle + 1
+            else:
+                high = middle - 1
+        return found
+
+    def _area(self, slot: int, currency: int, day: int) -> int:
+        # Rate x days accumulated from the first live snapshot's series up to `day`
+        width = len(self.currencies)
+        held = day - int(self.history_days[slot])
+        return int(self.history_area[slot * width + currency]) + int(
+            self.history_rates[slot * width + currency]) * held
+
+    def _tree_size(self) -> int:
+        return 1 << (int(self.history_capacity) - 1).bit_length()
+
+    def _tree_get(self, currency: int, node: int) -> int:
+        key = f"{currency}:{node}"
+        return int(self.history_tree[key]) if key in self.history_tree else _EMPTY_RANGE
+
+    def _tree_set(self, currency: int, slot: int, rate: int) -> None:
+        # Leaf update, then recompute ancestors until one is already correct
+        node, value = self._tree_size() + slot, _range_leaf(rate)
+        while node:
+            if self._tree_get(currency, node) == value:
+                return
+            self.history_tree[f"{currency}:{node}"] = u256(value)
+            node //= 2
+            value = _merge_ranges(self._tree_get(currency, 2 * node),
+                                  self._tree_get(currency, 2 * node + 1))
+
+    def _tree_query(self, currency: int, first: int, last: int) -> int:
+        # Packed range over ring slots first..last inclusive
+        size = self._tree_size()
+        low, high, result = first + size, last + size + 1, _EMPTY_RANGE
+        while low < high:
+            if low & 1:
+                result = _merge_ranges(result, self._tree_get(currency, low))
+                low += 1
+            if high & 1:
+                high -= 1
+                result = _merge_ranges(result, self._tree_get(currency, high))
+            low, high = low // 2, high // 2
+        return result
+
+    def _slots(self, codes: str) -> list[tuple[str, int]]:
+        # (code, table slot) for each requested code in the table; "" selects all
+        if not codes.strip():
+            return list((code, slot) for slot, code in enumerate(self.currencies))
+        return [
+            (code, int(self.currency_index[code]))
+            for code in _parse_currencies(codes) if code in self.currency_index
+        ]
+
+    def _select(self, codes: str) -> list[tuple[str, int]]:
+        # (code, raw rate) for each requested code
+        return [(code, int(self.rates[slot])) for code, slot in self._slots(codes)]
+
+    @gl.public.view
+    def get_currencies(self) -> dict[str, typing.Any]:
+        """
+        Returns the base currency and the configured currency codes in table order.
+        """
+        return {"base": self.base, "currencies": list(self.currencies)}
 
     @gl.public.view
-    def get_rates(self) -> dict[str, str]:
+    def get_rates(self, codes: str = "") -> dict[str, str]:
         """
         Returns the exact, human-readable decimal prices as safe strings.
+        `codes` selects a comma-separated subset (unknown codes are skipped);
+        empty returns every configured currency.
+        """
+        rates = {code: _format_fixed(raw) for code, raw in self._select(codes)}
+        rates["last_update"] = self.last_update_date
+        return rates
+
+    @gl.public.view
+    def get_raw_rates(self, codes: str = "") -> dict[str, int]:
+        """
+        Returns the 18-decimal fixed-point integers for on-chain math and composability.
+        `codes` selects a subset as in get_rates.
         """
+        return dict(self._select(codes))
+
+    @gl.public.view
+    def get_cross_rate(self, base: str, quote: str) -> int:
+        """
+        Returns units of `quote` per 1 `base` as 18-decimal fixed point,
+        rounded half to even (0 while either rate is unknown). Either side
+        may be the oracle's base currency.
+        """
+        return _cross(self._raw_rate(base), self._raw_rate(quote))
+
+    @gl.public.view
+    def get_cross_matrix(self) -> str:
+        """
+        Returns every cross rate as compact JSON {"codes": [...], "rates": [[...]]},
+        where rates[i][j] is get_cross_rate(codes[i], codes[j]); "" before the first update.
+        """
+        return self.cross_matrix
+
+    @gl.public.view
+    def get_history_bounds(self) -> dict[str, typing.Any]:
+        """
+        Returns the oldest and latest snapshot dates, the snapshot count and the ring capacity.
+        """
+        count = int(self.history_count)
+        bounds = {"oldest": "", "latest": "", "count": count, "capacity": int(self.history_capacity)}
+        if count:
+            for name, index in (("oldest", 0), ("latest", count - 1)):
+                ordinal = int(self.history_days[self._history_slot(index)])
+                bounds[name] = datetime.date.fromordinal(ordinal).isoformat()
+        return bounds
+
+    @gl.public.view
+    def get_rate_on(self, date: str, codes: str = "") -> dict[str, typing.Any]:
+        """
+        Returns the raw rates in effect on `date` (the newest snapshot dated
+        on or before it) under "rates", with that snapshot's date; empty when
+        the date precedes the retained history.
+        """
+        index = self._history_find(_day(date))
+        if index < 0:
+            return {"date": "", "rates": {}}
+        slot, width = self._history_slot(index), len(self.currencies)
         return {
-            "EUR": str(int(self.latest_eur) / 10**18),
-            "GBP": str(int(self.latest_gbp) / 10**18),
-            "JPY": str(int(self.latest_jpy) / 10**18),
-            "last_update": self.last_update_date
+            "date": datetime.date.fromordinal(int(self.history_days[slot])).isoformat(),
+            "rates": {code: int(self.history_rates[slot * width + i]) for code, i in self._slots(codes)},
         }
 
     @gl.public.view
-    def get_raw_rates(self) -> dict[str, int]:
+    def get_twap(self, start: str, end: str, codes: str = "") -> dict[str, int]:
         """
-        Returns the 18-decimal fixed-point integers for on-chain math and composability.
+        Returns each currency's time-weighted average raw rate over the days
+        [start, end), each snapshot weighted by the days it was in effect and
+        rounded down. The window is clipped to the retained history; empty
+        if nothing of it remains.
         """
+        first, last = _day(start), _day(end)
+        count = int(self.history_count)
+        if count:
+            first = max(first, int(self.history_days[self._history_slot(0)]))
+        if not count or last <= first:
+            return {}
+        low, high = self._history_slot(self._history_find(first)), self._history_slot(self._history_find(last))
         return {
-            "EUR": int(self.latest_eur),
-            "GBP": int(self.latest_gbp),
-            "JPY": int(self.latest_jpy)
+            code: (self._area(high, i, last) - self._area(low, i, first)) // (last - first)
+            for code, i in self._slots(codes)
         }
+
+    @gl.public.view
+    def get_range(self, start: str, end: str, codes: str = "") -> dict[str, dict[str, int]]:
+        """
+        Returns {"min": raw, "max": raw} per currency over the snapshots dated
+        start..end inclusive; currencies without rates there are left out.
+        """
+        first = self._history_find(_day(start) - 1) + 1
+        last = self._history_find(_day(end))
+        if first > last:
+            return {}
+        low, high = self._history_slot(first), self._history_slot(last)
+        spans = [(low, high)] if low <= high else [(low, int(self.history_capacity) - 1), (0, high)]
+        ranges = {}
+        for code, i in self._slots(codes):
+            packed = _EMPTY_RANGE
+            for a, b in spans:
+                packed = _merge_ranges(packed, self._tree_query(i, a, b))
+            if packed != _EMPTY_RANGE:
+                ranges[code] = {"min": packed >> 128, "max": packed & _RANGE_MASK}
+        return ranges
+
+    def _record(self, method: str, **counters: int) -> None:
+        # Adds to the "<method>.<counter>" totals read by get_stats
+        for name, amount in counters.items():
+            if amount:
+                key = f"{method}.{name}"
+                current = int(self.stats[key]) if key in self.stats else 0
+                self.stats[key] = u256(current + amount)
+
+    @gl.public.view
+    def get_stats(self) -> dict[str, int]:
+        """
+        Returns hot-path counters keyed "<method>.<counter>".
+        """
+        return {key: int(count) for key, count in self.stats.items()}
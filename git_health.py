@@ -2,20 +2,315 @@
 # { "Depends": "py-genlayer:latest" }
 
 from genlayer import *
+import datetime
 import json
+import math
+import re
 import typing
 
+
+# Repairs applied outside string literals when a reply is not strict JSON:
+# single-quoted strings, Python True/False/None, trailing commas, // comments.
+_JSON_REPAIR = re.compile(
+    r'("(?:[^"\\]|\\.)*")'
+    r"|'((?:[^'\\]|\\.)*)'"
+    r"|\b(True|False|None)\b"
+    r"|,(\s*[}\]])"
+    r"|\s//[^\n]*"
+)
+_INVALID = object()
+
+
+def _repair_token(match: re.Match) -> str:
+    quoted, single, literal, closer = match.groups()
+    if quoted:
+        return quoted
+    if single is not None:
+        return json.dumps(single.replace("\\'", "'"))
+    if literal:
+        return {"True": "true", "False": "false", "None": "null"}[literal]
+    if closer is not None:
+        return closer
+    return ""
+
+
+def _first_object(raw: str) -> str | None:
+    # First balanced {...}, ignoring braces inside quoted strings
+    start = raw.find("{")
+    while start != -1:
+        depth, quote, escaped = 0, "", False
+        for i in range(start, len(raw)):
+            ch = raw[i]
+            if quote:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == quote:
+                    quote = ""
+            elif ch in "\"'":
+                quote = ch
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return raw[start:i + 1]
+        start = raw.find("{", start + 1)
+    return None
+
+
+def _coerce(value, spec):
+    if isinstance(spec, list):
+        for option in spec:
+            if str(value).strip().lower() == str(option).lower():
+                return option
+        return _INVALID
+    for kind in spec if isinstance(spec, tuple) else (spec,):
+        if kind is type(None) and value is None:
+            return None
+        if kind is bool:
+            if isinstance(value, bool):
+                return value
+            if str(value).strip().lower() in ("true", "false"):
+                return str(value).strip().lower() == "true"
+        if kind in (int, float) and value is not None and not isinstance(value, bool):
+            if kind is int and isinstance(value, int):
+                return value
+            try:
+                number = float(str(value).strip().replace(",", ""))
+            except ValueError:
+                continue
+            if not math.isfinite(number):
+                continue
+            if kind is float:
+                return number
+            if number.is_integer():
+                return int(number)
+        if kind is str and isinstance(value, str):
+            return value
+    return _INVALID
+
+
+def _decode_llm_json(raw: str, schema: dict) -> dict | None:
+    """
+    Decodes an LLM reply into a dict that satisfies `schema`, or returns None.
+    Finds the first balanced JSON object, so fences and surrounding prose are
+    ignored, and repairs common formatting quirks before giving up.
+    Schema values are a type, a tuple of accepted types, or a list of allowed
+    literals (matched case-insensitively and returned in canonical form).
+    """
+    text = _first_object(raw) if isinstance(raw, str) else None
+    if text is None:
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        try:
+            data = json.loads(_JSON_REPAIR.sub(_repair_token, text))
+        except ValueError:
+            return None
+    if not isinstance(data, dict):
+        return None
+    for field, spec in schema.items():
+        value = _coerce(data[field], spec) if field in data else _INVALID
+        if value is _INVALID:
+            return None
+        data[field] = value
+    return data
+
+
+def _field_number(payload: str, field: str) -> float | None:
+    parsed = _decode_llm_json(payload, {field: float})
+    return None if parsed is None else parsed[field]
+
+
+def _tolerance_eq(fn: typing.Callable[[], str], field: str,
+                  abs_tol: float = 0.0, rel_tol: float = 0.0) -> str:
+    """
+    Numeric-tolerance consensus over a JSON-returning nondet function.
+    Each validator re-runs fn and accepts the leader's output when the numeric
+    `field` differs by at most abs_tol, or by at most rel_tol of the larger
+    magnitude. The check is arithmetic, so no LLM judge call is made.
+    """
+    def validator_fn(leader_result) -> bool:
+        if not isinstance(leader_result, gl.vm.Return):
+            return False
+        leader_val = _field_number(leader_result.calldata, field)
+        own_val = _field_number(fn(), field)
+        if leader_val is None or own_val is None:
+            # Both sides undecodable is agreement; the caller records the failure
+            return leader_val is None and own_val is None
+        diff = abs(leader_val - own_val)
+        return diff <= abs_tol or diff <= rel_tol * max(abs(leader_val), abs(own_val))
+
+    return gl.vm.run_nondet(fn, validator_fn)
+
+
+# Structured scoring reads the GitHub REST repository record instead of the page
+GITHUB_API = "https://api.github.com"
+SCORING_MODES = ("page", "api")
+
+# Rubric age buckets as (days since last push, deduction); the largest applies
+_AGE_DEDUCTIONS = ((365, 60), (182, 40), (30, 10))
+_ISSUE_DEDUCTION_CAP = 20
+
+# Repositories per sweep call, and per page of an org listing
+SWEEP_LIMIT = 100
+
+_OWNER = r"[A-Za-z0-9](?:[A-Za-z0-9-]*[A-Za-z0-9])?"
+_REPO_URL = re.compile(rf"https?://(?:www\.)?github\.com/({_OWNER})/([A-Za-z0-9._-]+?)(?:\.git)?/?")
+_REPO_NAME = re.compile(rf"({_OWNER})/([A-Za-z0-9._-]+?)(?:\.git)?")
+_ORG_NAME = re.compile(_OWNER)
+_COMMIT_SHA = re.compile(r"[0-9a-f]{40}")
+
+
+def _now() -> int:
+    # Transaction time in Unix seconds, identical on every node
+    stamp = gl.message_raw["datetime"].replace("Z", "+00:00")
+    return int(datetime.datetime.fromisoformat(stamp).timestamp())
+
+
+def _repo_path(repo_url: str, bare: bool = True) -> str | None:
+    # "owner/repo" from a repository URL, or from a bare "owner/repo" when `bare`
+    repo_url = repo_url.strip()
+    match = _REPO_URL.fullmatch(repo_url) or (bare and _REPO_NAME.fullmatch(repo_url))
+    return f"{match.group(1)}/{match.group(2)}" if match else None
+
+
+def _repo_key(repo_url: str) -> str:
+    # The single storage key per repository: GitHub URLs and names collapse to
+    # https://github.com/owner/repo, lowercased as GitHub names are case-insensitive
+    path = _repo_path(repo_url)
+    return f"https://github.com/{path.lower()}" if path else repo_url.strip()
+
+
+def _json_or_none(payload: str):
+    try:
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+
+def _repo_facts(record) -> dict[str, int] | None:
+    """
+    {"pushed_at": unix seconds, "open_issues": count} from a decoded
+    /repos/{owner}/{repo} record, or None when it is not one (error bodies,
+    rate limiting). GitHub's open_issues_count includes open pull requests.
+    """
+    try:
+        pushed = datetime.datetime.fromisoformat(record["pushed_at"].replace("Z", "+00:00"))
+        issues = record["open_issues_count"]
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return None
+    if pushed.tzinfo is None or not isinstance(issues, int) or isinstance(issues, bool) or issues < 0:
+        return None
+    return {"pushed_at": int(pushed.timestamp()), "open_issues": issues}
+
+
+def _branch_sha(record) -> str | None:
+    # Head commit of a decoded /repos/{owner}/{repo}/branches/{branch} record
+    try:
+        sha = record["commit"]["sha"]
+    except (TypeError, KeyError):
+        return None
+    return sha if isinstance(sha, str) and _COMMIT_SHA.fullmatch(sha) else None
+
+
+def _rank_keys(score: int, repo_url: str) -> tuple[str, str]:
+    # Index keys that sort by score ascending and descending, then by URL
+    return f"{score:03d} {repo_url}", f"{100 - score:03d} {repo_url}"
+
+
+def _health_score(pushed_at: int, open_issues: int, now: int) -> int:
+    """
+    The analyze_repo rubric in integer arithmetic: 100, minus the largest
+    age deduction whose bucket the last push falls in, minus 1 per 10 open
+    issues up to 20.
+    """
+    age_days = (now - pushed_at) // 86400
+    score = 100 - min(open_issues // 10, _ISSUE_DEDUCTION_CAP)
+    for days, deduction in _AGE_DEDUCTIONS:
+        if age_days > days:
+            return max(score - deduction, 0)
+    return score
+
+
+# Page size caps for list_entries / export_entries. Each page re-walks the
+# keys before its cursor (see _page), so mirrors should sync through
+# export_entries, whose larger pages keep a full pass to N / EXPORT_LIMIT walks.
+LIST_LIMIT = 200
+EXPORT_LIMIT = 1000
+
+
+def _page(entries: TreeMap, start_after: str, limit: int, cap: int,
+          convert: typing.Callable | None = None) -> tuple[list, str]:
+    """
+    Up to `limit` (key, value) pairs with keys strictly after `start_after`,
+    in key order, and the cursor for the next page ("" after the last one).
+    TreeMap iterates from its first key and cannot seek, so every page walks
+    the keys before its cursor: O(position + limit) key reads per page and
+    O(N^2 / limit) for a full pass. Only the returned entries' values are read.
+    """
+    limit = max(1, min(limit, cap))
+    page = []
+    for key in entries:
+        if start_after and key <= start_after:
+            continue
+        if len(page) == limit:
+            return page, page[-1][0]
+        value = entries[key]
+        page.append([key, convert(value) if convert else value])
+    return page, ""
+
+
+def _list_view(entries: TreeMap, start_after: str, limit: int,
+               convert: typing.Callable | None = None) -> dict[str, typing.Any]:
+    page, cursor = _page(entries, start_after, limit, LIST_LIMIT, convert)
+    return {"entries": page, "next": cursor}
+
+
+def _export_view(entries: TreeMap, start_after: str, limit: int,
+                 convert: typing.Callable | None = None) -> str:
+    # Columnar, whitespace-free JSON: {"k": [...], "v": [...], "n": cursor}
+    page, cursor = _page(entries, start_after, limit, EXPORT_LIMIT, convert)
+    payload = {"k": [k for k, _ in page], "v": [v for _, v in page], "n": cursor}
+    return json.dumps(payload, separators=(",", ":"))
+
+
 class GitHealth(gl.Contract):
     """
     Analyzes GitHub repositories to assign a "Health Score" (0-100) based on
-    maintenance activity visible on the main page.
+    maintenance activity visible on the main page, or, in "api" mode, on the
+    repository's REST record.
     """
 
+    # "page" (rendered page + LLM) or "api" (REST record + arithmetic)
+    scoring_mode: str
+
+    # REST API root used in "api" mode and by sweep
+    api_base: str
+
+    # Swept repository URL -> "<head sha>|<pushed_at>|<open issues>" last scored
+    repo_state: TreeMap[str, str]
+
+    # Score indexes for top_k / bottom_k: "<score:03d> <url>" and "<100-score:03d> <url>"
+    scores_ascending: TreeMap[str, u256]
+    scores_descending: TreeMap[str, u256]
+
     # Maps Repository URL (str) -> Health Score (u256)
     repo_scores: TreeMap[str, u256]
 
-    def __init__(self):
-        pass
+    # Hot-path counters: "<method>.<counter>" -> total (see get_stats)
+    stats: TreeMap[str, u256]
+
+    def __init__(self, mode: str = "page", api_base: str = GITHUB_API):
+        if mode not in SCORING_MODES:
+            raise gl.vm.UserError(f"mode must be one of {', '.join(SCORING_MODES)}")
+        if not api_base.startswith(("https://", "http://")):
+            raise gl.vm.UserError("api_base must be an http(s) URL")
+        self.scoring_mode = mode
+        self.api_base = api_base.rstrip("/")
 
     @gl.public.write
     def analyze_repo(self, repo_url: str) -> int:
@@ -23,6 +318,8 @@ class GitHealth(gl.Contract):
         Scrapes a GitHub repository, calculates a health score based on recent
         commits and open issues, and updates the state.
         """
+        if self.scoring_mode == "api":
+            return self._analyze_api(repo_url)
 
         def get_repo_health():
             # 1. Fetch the repo page
@@ -62,32 +359,253 @@ class GitHealth(gl.Contract):
 
             # 3. Execute Prompt
             result_raw = gl.nondet.exec_prompt(task)
-            cleaned = result_raw.replace("```json", "").replace("```", "").strip()
-            print(f"LLM Assessment: {cleaned}")
-            return cleaned
-
-        # 4. Comparative Consensus
-        # FIX: Passed as a positional argument (removed 'criteria=')
-        consensus_instruction = """
-        Compare the 'health_score' values in the JSON results.
-        They must be effectively equal, defined as being within a difference of 5 points.
-        (e.g. 80 and 85 are valid matches. 80 and 86 are not).
+            print(f"LLM Assessment: {result_raw}")
+            parsed = _decode_llm_json(result_raw, {"health_score": int})
+            if parsed is None:
+                return json.dumps({"error": "decode_failed"})
+            parsed["health_score"] = min(max(parsed["health_score"], 0), 100)
+            return json.dumps(parsed)
+
+        # 4. Numeric Tolerance Consensus
+        # 'health_score' values within 5 points are a match (80 vs 85 yes, 80 vs 86 no).
+        final_json_str = _tolerance_eq(get_repo_health, "health_score", abs_tol=5)
+
+        # 5. Parse and Store
+        parsed = _decode_llm_json(final_json_str, {"health_score": int})
+        score = 0 if parsed is None else parsed["health_score"]
+        fetch_failed = parsed is not None and parsed.get("reasoning") == "Fetch failed"
+        key = _repo_key(repo_url)
+
+        self._record(
+            "analyze_repo",
+            calls=1,
+            consensus_rounds=1,
+            web_fetches=1,
+            llm_prompts=int(not fetch_failed),
+            input_bytes=len(repo_url.encode("utf-8")),
+            refreshes=int(parsed is not None and key in self.repo_scores),
+            fallbacks=int(fetch_failed),
+            decode_failures=int(parsed is None),
+        )
+
+        # An undecodable assessment keeps any previous score
+        if parsed is not None:
+            self._set_score(key, score)
+        return score
+
+    def _analyze_api(self, repo_url: str) -> int:
+        # Exact scoring: validators agree on the fetched facts, then every node
+        # applies the rubric to them at the transaction's timestamp
+        path = _repo_path(repo_url, bare=False)
+        if path is None:
+            raise gl.vm.UserError(f"not a GitHub repository URL: {repo_url!r}")
+        api_url = f"{self.api_base}/repos/{path}"
+
+        def fetch_facts() -> str:
+            try:
+                payload = gl.nondet.web.render(api_url, mode="text")
+            except Exception as e:
+                print(f"Fetch failed: {e}")
+                return json.dumps({"error": "fetch_failed"})
+            facts = _repo_facts(_json_or_none(payload))
+            return json.dumps(facts if facts is not None else {"error": "invalid_record"}, sort_keys=True)
+
+        facts = json.loads(gl.eq_principle.strict_eq(fetch_facts))
+        failed = "error" in facts
+        key = _repo_key(repo_url)
+        self._record(
+            "analyze_repo",
+            calls=1,
+            consensus_rounds=1,
+            web_fetches=1,
+            input_bytes=len(repo_url.encode("utf-8")),
+            refreshes=int(not failed and key in self.repo_scores),
+            fallbacks=int(facts.get("error") == "fetch_failed"),
+            decode_failures=int(facts.get("error") == "invalid_record"),
+        )
+
+        # A failed fetch or unusable record keeps any previous score
+        if failed:
+            return 0
+        score = _health_score(facts["pushed_at"], facts["open_issues"], _now())
+        self._set_score(key, score)
+        return score
+
+    @gl.public.write
+    def sweep(self, targets: str, page: int = 1) -> dict[str, int]:
         """
+        Scores a batch from the REST API in one consensus round. `targets` is
+        an org name, whose repositories are listed SWEEP_LIMIT per `page`, or
+        up to SWEEP_LIMIT repository URLs / "owner/repo" names separated by
+        commas or whitespace. A repository whose head commit SHA and open-issue
+        count are unchanged since its last sweep is not rescored; it only
+        moves if its last push has aged into a new bucket. Returns counts and
+        "next_page" (0 when the org listing is exhausted).
+        """
+        items = [t for t in re.split(r"[\s,]+", targets) if t]
+        org = items[0] if len(items) == 1 and _ORG_NAME.fullmatch(items[0]) else None
+        if org is None:
+            names = [_repo_path(item) for item in items]
+            if not names or None in names:
+                raise gl.vm.UserError("targets must be an org name or repository URLs / owner/repo names")
+            if len(names) > SWEEP_LIMIT:
+                raise gl.vm.UserError(f"at most {SWEEP_LIMIT} repositories per sweep")
+            names = list(dict.fromkeys(names))
+        elif page < 1:
+            raise gl.vm.UserError("page must be at least 1")
+
+        def fetch_batch() -> str:
+            fetches = 0
+
+            def fetch(path: str):
+                nonlocal fetches
+                fetches += 1
+                try:
+                    return _json_or_none(gl.nondet.web.render(f"{self.api_base}{path}", mode="text"))
+                except Exception as e:
+                    print(f"Fetch failed: {e}")
+                    return None
+
+            if org is not None:
+                listing = fetch(f"/orgs/{org}/repos?per_page={SWEEP_LIMIT}&page={page}&sort=full_name")
+                if not isinstance(listing, list):
+                    return json.dumps({"error": "listing_failed"})
+                records = {r.get("full_name"): r for r in listing if isinstance(r, dict)}
+                records.pop(None, None)
+            else:
+                listing = None
+                records = {name: fetch(f"/repos/{name}") for name in names}
+
+            repos = {}
+            for name, record in records.items():
+                facts = _repo_facts(record)
+                if facts is None:
+                    repos[name] = {"error": "invalid_record"}
+                    continue
+                # A head can only move with a push, so an unchanged push time reuses the stored SHA
+                url = _repo_key(name)
+                state = self.repo_state[url].split("|") if url in self.repo_state else None
+                if state and int(state[1]) == facts["pushed_at"]:
+                    facts["sha"] = state[0]
+                else:
+                    branch = record.get("default_branch") or "main"
+                    facts["sha"] = _branch_sha(fetch(f"/repos/{name}/branches/{branch}"))
+                    if facts["sha"] is None:
+                        repos[name] = {"error": "invalid_branch"}
+                        continue
+                repos[name] = facts
+            more = listing is not None and len(listing) >= SWEEP_LIMIT
+            return json.dumps({"repos": repos, "fetches": fetches, "more": more}, sort_keys=True)
 
-        final_json_str = gl.eq_principle.prompt_comparative(
-            get_repo_health, 
-            consensus_instruction
+        # Consensus: Strict Equality on the fetched facts
+        batch = json.loads(gl.eq_principle.strict_eq(fetch_batch))
+        # A failed org listing counts as one failure
+        summary = {"checked": 0, "rescored": 0, "unchanged": 0, "failed": int("error" in batch), "next_page": 0}
+        now = _now()
+        for name, facts in sorted(batch.get("repos", {}).items()):
+            if "error" in facts:
+                summary["failed"] += 1
+                continue
+            summary["checked"] += 1
+            url = _repo_key(name)
+            previous = self.repo_state[url].split("|") if url in self.repo_state else None
+            if previous and previous[0] == facts["sha"] and int(previous[2]) == facts["open_issues"]:
+                summary["unchanged"] += 1
+                # A push that left the default branch's head in place (another branch,
+                # a tag) still moves the push time the next sweep compares against
+                if int(previous[1]) != facts["pushed_at"]:
+                    self.repo_state[url] = f"{facts['sha']}|{facts['pushed_at']}|{facts['open_issues']}"
+                self._set_score(url, _health_score(facts["pushed_at"], facts["open_issues"], now))
+                continue
+            summary["rescored"] += 1
+            self.repo_state[url] = f"{facts['sha']}|{facts['pushed_at']}|{facts['open_issues']}"
+            self._set_score(url, _health_score(facts["pushed_at"], facts["open_issues"], now))
+        if batch.get("more"):
+            summary["next_page"] = page + 1
+
+        self._record(
+            "sweep",
+            calls=1,
+            consensus_rounds=1,
+            web_fetches=batch.get("fetches", 0),
+            input_bytes=len(targets.encode("utf-8")),
+            repos_checked=summary["checked"],
+            rescored=summary["rescored"],
+            unchanged=summary["unchanged"],
+            fallbacks=summary["failed"],
         )
+        return summary
 
-        # 5. Parse and Store
-        parsed = json.loads(final_json_str)
-        score = int(parsed["health_score"])
-        
+    def _set_score(self, repo_url: str, score: int) -> None:
+        # Writes the score and moves its rank index entries; a no-op when unchanged
+        if repo_url in self.repo_scores:
+            old = int(self.repo_scores[repo_url])
+            if old == score:
+                return
+            ascending, descending = _rank_keys(old, repo_url)
+            del self.scores_ascending[ascending]
+            del self.scores_descending[descending]
         self.repo_scores[repo_url] = u256(score)
-        return score
+        ascending, descending = _rank_keys(score, repo_url)
+        self.scores_ascending[ascending] = u256(score)
+        self.scores_descending[descending] = u256(score)
+
+    def _ranked(self, index: TreeMap, k: int) -> list[list]:
+        k = max(1, min(k, LIST_LIMIT))
+        ranked = []
+        for key, score in index.items():
+            if len(ranked) == k:
+                break
+            ranked.append([key.split(" ", 1)[1], int(score)])
+        return ranked
+
+    @gl.public.view
+    def top_k(self, k: int = 10) -> list[list]:
+        """
+        Returns the k healthiest repositories as [[url, score], ...], best first.
+        """
+        return self._ranked(self.scores_descending, k)
+
+    @gl.public.view
+    def bottom_k(self, k: int = 10) -> list[list]:
+        """
+        Returns the k least healthy repositories as [[url, score], ...], worst first.
+        """
+        return self._ranked(self.scores_ascending, k)
 
     @gl.public.view
     def get_score(self, repo_url: str) -> int:
-        if repo_url in self.repo_scores:
-            return int(self.repo_scores[repo_url])
+        key = _repo_key(repo_url)
+        if key in self.repo_scores:
+            return int(self.repo_scores[key])
         return 0
+
+    @gl.public.view
+    def list_entries(self, start_after: str = "", limit: int = 50) -> dict[str, typing.Any]:
+        """
+        Pages through repository health scores in key order: {"entries": [[key, value], ...], "next": cursor}.
+        Pass "next" back as start_after; it is "" after the last page.
+        """
+        return _list_view(self.repo_scores, start_after, limit, int)
+
+    @gl.public.view
+    def export_entries(self, start_after: str = "", limit: int = EXPORT_LIMIT) -> str:
+        """
+        Same pages as list_entries, as compact columnar JSON for bulk mirroring.
+        """
+        return _export_view(self.repo_scores, start_after, limit, int)
+
+    def _record(self, method: str, **counters: int) -> None:
+        # Adds to the "<method>.<counter>" totals read by get_stats
+        for name, amount in counters.items():
+            if amount:
+                key = f"{method}.{name}"
+                current = int(self.stats[key]) if key in self.stats else 0
+                self.stats[key] = u256(current + amount)
+
+    @gl.public.view
+    def get_stats(self) -> dict[str, int]:
+        """
+        Returns hot-path counters keyed "<method>.<counter>".
+        """
+        return {key: int(count) for key, count in self.stats.items()}
@@ -2,8 +2,397 @@
 # { "Depends": "py-genlayer:latest" }
 
 from genlayer import *
+import base64
+import collections
+import hashlib
 import json
+import math
+import re
 import typing
+import unicodedata
+import zlib
+
+
+# Repairs applied outside string literals when a reply is not strict JSON:
+# single-quoted strings, Python True/False/None, trailing commas, // comments.
+_JSON_REPAIR = re.compile(
+    r'("(?:[^"\\]|\\.)*")'
+    r"|'((?:[^'\\]|\\.)*)'"
+    r"|\b(True|False|None)\b"
+    r"|,(\s*[}\]])"
+    r"|\s//[^\n]*"
+)
+_INVALID = object()
+
+
+def _repair_token(match: re.Match) -> str:
+    quoted, single, literal, closer = match.groups()
+    if quoted:
+        return quoted
+    if single is not None:
+        return json.dumps(single.replace("\\'", "'"))
+    if literal:
+        return {"True": "true", "False": "false", "None": "null"}[literal]
+    if closer is not None:
+        return closer
+    return ""
+
+
+def _first_object(raw: str) -> str | None:
+    # First balanced {...}, ignoring braces inside quoted strings
+    start = raw.find("{")
+    while start != -1:
+        depth, quote, escaped = 0, "", False
+        for i in range(start, len(raw)):
+            ch = raw[i]
+            if quote:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == quote:
+                    quote = ""
+            elif ch in "\"'":
+                quote = ch
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return raw[start:i + 1]
+        start = raw.find("{", start + 1)
+    return None
+
+
+def _coerce(value, spec):
+    if isinstance(spec, list):
+        for option in spec:
+            if str(value).strip().lower() == str(option).lower():
+                return option
+        return _INVALID
+    for kind in spec if isinstance(spec, tuple) else (spec,):
+        if kind is type(None) and value is None:
+            return None
+        if kind is bool:
+            if isinstance(value, bool):
+                return value
+            if str(value).strip().lower() in ("true", "false"):
+                return str(value).strip().lower() == "true"
+        if kind in (int, float) and value is not None and not isinstance(value, bool):
+            if kind is int and isinstance(value, int):
+                return value
+            try:
+                number = float(str(value).strip().replace(",", ""))
+            except ValueError:
+                continue
+            if not math.isfinite(number):
+                continue
+            if kind is float:
+                return number
+            if number.is_integer():
+                return int(number)
+        if kind is str and isinstance(value, str):
+            return value
+    return _INVALID
+
+
+def _decode_llm_json(raw: str, schema: dict) -> dict | None:
+    """
+    Decodes an LLM reply into a dict that satisfies `schema`, or returns None.
+    Finds the first balanced JSON object, so fences and surrounding prose are
+    ignored, and repairs common formatting quirks before giving up.
+    Schema values are a type, a tuple of accepted types, or a list of allowed
+    literals (matched case-insensitively and returned in canonical form).
+    """
+    text = _first_object(raw) if isinstance(raw, str) else None
+    if text is None:
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        try:
+            data = json.loads(_JSON_REPAIR.sub(_repair_token, text))
+        except ValueError:
+            return None
+    if not isinstance(data, dict):
+        return None
+    for field, spec in schema.items():
+        value = _coerce(data[field], spec) if field in data else _INVALID
+        if value is _INVALID:
+            return None
+        data[field] = value
+    return data
+
+
+def _content_key(*parts: str) -> str:
+    """
+    Fixed-size storage key for unbounded user text: the SHA-256 hex digest of
+    the NFC-normalized, whitespace-collapsed parts joined by a unit separator.
+    """
+    normalized = "\x1f".join(" ".join(unicodedata.normalize("NFC", p).split()) for p in parts)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+# Deterministic prefilter for semantic consensus, in thousandths: a pair whose
+# chrF and token-overlap scores both reach the high threshold is accepted, and
+# one where both fall below the low threshold is rejected, without a judge
+# prompt; only the band between reaches the LLM comparator
+SIMILARITY_HIGH = 900
+SIMILARITY_LOW = 200
+_CHRF_ORDER = 6
+# Terms a fast accept requires to match exactly: one changed digit or a
+# dropped "not" flips the meaning while barely moving the similarity
+_NUMBER = re.compile(r"[$€£¥]?\d+(?:[.,]\d+)*%?")
+_NEGATION = re.compile(
+    r"\b(?:no|not|never|none|nor|neither|nothing|nobody|nowhere|without|cannot)\b|n['’]t\b",
+    re.IGNORECASE,
+)
+
+
+def _char_ngrams(text: str, n: int) -> collections.Counter:
+    return collections.Counter(text[i:i + n] for i in range(len(text) - n + 1))
+
+
+def _f1(overlap: int, size_a: int, size_b: int) -> float:
+    return 2 * overlap / (size_a + size_b) if size_a + size_b else 1.0
+
+
+def _similarity(a: str, b: str) -> tuple[float, float]:
+    """
+    (chrF, token overlap) of two texts, each in [0, 1] and symmetric: the
+    character n-gram F-score (beta 1, n = 1..6, whitespace ignored) and the
+    F1 of their word multisets, both case-folded.
+    """
+    a = unicodedata.normalize("NFC", a).casefold()
+    b = unicodedata.normalize("NFC", b).casefold()
+    chars_a, chars_b = "".join(a.split()), "".join(b.split())
+    scores = []
+    for n in range(1, _CHRF_ORDER + 1):
+        grams_a, grams_b = _char_ngrams(chars_a, n), _char_ngrams(chars_b, n)
+        if grams_a and grams_b:
+            overlap = sum((grams_a & grams_b).values())
+            scores.append(_f1(overlap, sum(grams_a.values()), sum(grams_b.values())))
+    chrf = sum(scores) / len(scores) if scores else float(chars_a == chars_b)
+    words_a, words_b = collections.Counter(re.findall(r"\w+", a)), collections.Counter(re.findall(r"\w+", b))
+    tokens = _f1(sum((words_a & words_b).values()), sum(words_a.values()), sum(words_b.values()))
+    return chrf, tokens
+
+
+def _pinned_terms(text: str) -> list[str]:
+    # Numbers, amounts and negation words, as a sorted multiset
+    negations = [m.lower().replace("’", "'") for m in _NEGATION.findall(text)]
+    return sorted(_NUMBER.findall(text) + negations)
+
+
+def _similarity_verdict(a: list[str], b: list[str], high: float, low: float) -> bool | None:
+    # True/False when every pair is clearly alike or some pair clearly is not; None otherwise.
+    # Alike needs the same numbers, amounts and negations too ("$50" vs "$500").
+    if len(a) != len(b):
+        return False
+    pairs = [_similarity(x, y) for x, y in zip(a, b)]
+    if any(max(pair) < low for pair in pairs):
+        return False
+    if all(min(pair) >= high for pair in pairs) and all(
+            _pinned_terms(x) == _pinned_terms(y) for x, y in zip(a, b)):
+        return True
+    return None
+
+
+def _similarity_eq(fn: typing.Callable[[], str], field: str, principle: str,
+                   high: int = SIMILARITY_HIGH, low: int = SIMILARITY_LOW) -> str:
+    """
+    Semantic consensus over a JSON-returning nondet function whose `field` is
+    a string or a list of strings. Each validator re-runs fn and settles
+    clearly similar or dissimilar outputs itself (see _similarity_verdict,
+    thresholds in thousandths); only ambiguous pairs go to an LLM judge with
+    `principle`.
+    """
+    def values(payload: str) -> list[str] | None:
+        try:
+            value = json.loads(payload).get(field)
+        except (ValueError, AttributeError):
+            return None
+        if isinstance(value, str):
+            return [value]
+        if isinstance(value, list) and all(isinstance(v, str) for v in value):
+            return value
+        return None
+
+    def validator_fn(leader_result) -> bool:
+        if not isinstance(leader_result, gl.vm.Return):
+            return False
+        own_output = fn()
+        leader_values, own_values = values(leader_result.calldata), values(own_output)
+        if leader_values is None or own_values is None:
+            # Both sides undecodable is agreement; the caller records the failure
+            return leader_values is None and own_values is None
+        verdict = _similarity_verdict(leader_values, own_values, high / 1000, low / 1000)
+        if verdict is not None:
+            return verdict
+
+        # Ambiguous band: ask the LLM judge
+        task = f"""
+        Given the equivalence principle, decide whether the two outputs are equivalent.
+
+        Equivalence principle:
+        {principle}
+
+        Output A:
+        {leader_result.calldata}
+
+        Output B:
+        {own_output}
+
+        Respond using ONLY JSON: {{ "equivalent": true | false }}
+        """
+        parsed = _decode_llm_json(gl.nondet.exec_prompt(task), {"equivalent": bool})
+        return parsed is not None and parsed["equivalent"]
+
+    return gl.vm.run_nondet(fn, validator_fn)
+
+
+# A sentence runs to terminal punctuation (plus closing quotes or brackets)
+# followed by whitespace and a character that is not an ASCII lowercase
+# letter, to a CJK terminator, or to a line break; the trailing whitespace is
+# kept as its separator. Decimals and most mid-sentence abbreviations stay whole.
+_SENTENCE = re.compile(
+    r"(\S.*?(?:[.!?…]+[\"'”’)\]»]*(?=\s+[^a-z\s]|\s*$)"
+    r"|[。！？]+[」』”’）]*|(?=\n)|(?=\s*$)))(\s*)",
+    re.S,
+)
+
+
+def _segments(text: str) -> tuple[str, list[tuple[str, str]]]:
+    """
+    Leading whitespace and the (sentence, separator) pairs of `text`;
+    lead + "".join(sentence + separator) reproduces it exactly.
+    """
+    lead = text[:len(text) - len(text.lstrip())]
+    return lead, _SENTENCE.findall(text, len(lead))
+
+
+# Chunked translation: unseen sentences are grouped into chunks of at most
+# chunk_tokens estimated tokens (4 characters each), and each chunk gets its
+# own prompt and consensus round, retried once on an undecodable reply
+CHUNK_TOKENS = 1024
+CHUNK_ATTEMPTS = 2
+_CHARS_PER_TOKEN = 4
+
+
+def _chunks(items: list[tuple[str, str]], budget: int) -> list[list[int]]:
+    """
+    Groups (sentence, separator) pairs into runs of consecutive indexes of at
+    most `budget` estimated tokens. A run also closes at a paragraph break
+    once it holds half the budget; a sentence over budget is a run of its own.
+    A budget of 0 puts everything in one run.
+    """
+    if budget <= 0:
+        return [list(range(len(items)))] if items else []
+    runs, run, size = [], [], 0
+    for i, (sentence, separator) in enumerate(items):
+        tokens = -(-len(sentence) // _CHARS_PER_TOKEN)
+        if run and size + tokens > budget:
+            runs.append(run)
+            run, size = [], 0
+        run.append(i)
+        size += tokens
+        if separator.count("\n") >= 2 and 2 * size >= budget:
+            runs.append(run)
+            run, size = [], 0
+    if run:
+        runs.append(run)
+    return runs
+
+
+# Page size caps for list_entries / export_entries. Each page re-walks the
+# keys before its cursor (see _page), so mirrors should sync through
+# export_entries, whose larger pages keep a full pass to N / EXPORT_LIMIT walks.
+LIST_LIMIT = 200
+EXPORT_LIMIT = 1000
+
+
+def _page(entries: TreeMap, start_after: str, limit: int, cap: int,
+          convert: typing.Callable | None = None) -> tuple[list, str]:
+    """
+    Up to `limit` (key, value) pairs with keys strictly after `start_after`,
+    in key order, and the cursor for the next page ("" after the last one).
+    TreeMap iterates from its first key and cannot seek, so every page walks
+    the keys before its cursor: O(position + limit) key reads per page and
+    O(N^2 / limit) for a full pass. Only the returned entries' values are read.
+    """
+    limit = max(1, min(limit, cap))
+    page = []
+    for key in entries:
+        if start_after and key <= start_after:
+            continue
+        if len(page) == limit:
+            return page, page[-1][0]
+        value = entries[key]
+        page.append([key, convert(value) if convert else value])
+    return page, ""
+
+
+def _list_view(entries: TreeMap, start_after: str, limit: int,
+               convert: typing.Callable | None = None) -> dict[str, typing.Any]:
+    page, cursor = _page(entries, start_after, limit, LIST_LIMIT, convert)
+    return {"entries": page, "next": cursor}
+
+
+def _export_view(entries: TreeMap, start_after: str, limit: int,
+                 convert: typing.Callable | None = None) -> str:
+    # Columnar, whitespace-free JSON: {"k": [...], "v": [...], "n": cursor}
+    page, cursor = _page(entries, start_after, limit, EXPORT_LIMIT, convert)
+    payload = {"k": [k for k, _ in page], "v": [v for _, v in page], "n": cursor}
+    return json.dumps(payload, separators=(",", ":"))
+
+
+def _decode_llm_list(raw: str, field: str, count: int, spec) -> list | None:
+    """
+    Decodes a batched reply whose `field` is a list with one entry per item,
+    in submission order. Each entry must satisfy `spec` (see _decode_llm_json).
+    """
+    parsed = _decode_llm_json(raw, {})
+    if parsed is None or not isinstance(parsed.get(field), list) or len(parsed[field]) != count:
+        return None
+    values = [_coerce(value, spec) for value in parsed[field]]
+    if any(value is _INVALID for value in values):
+        return None
+    return values
+
+
+# Most queued items packed into one process_queue prompt
+BATCH_LIMIT = 20
+# Consecutive failed batches before the item at the head of the queue is
+# dead-lettered. Each failure halves the next batch, so an item the model
+# cannot answer for is alone after a few and then gets the rest to itself.
+BATCH_MAX_FAILURES = 7
+
+
+# Stored values at least this many UTF-8 bytes are zlib-compressed; shorter
+# ones stay raw, where the encoding overhead would outweigh the saving
+COMPRESS_MIN_BYTES = 256
+_PACKED_PREFIX = "z85:"
+
+
+def _pack(text: str) -> str:
+    """
+    Storage encoding for large text values: the zlib stream in base85 behind
+    a marker prefix. Kept raw when short or when compression does not pay,
+    unless the raw text itself starts with the marker.
+    """
+    raw = text.encode("utf-8")
+    escape = text.startswith(_PACKED_PREFIX)
+    if len(raw) < COMPRESS_MIN_BYTES and not escape:
+        return text
+    packed = _PACKED_PREFIX + base64.b85encode(zlib.compress(raw, 9)).decode("ascii")
+    return packed if escape or len(packed) < len(raw) else text
+
+
+def _unpack(value: str) -> str:
+    if value.startswith(_PACKED_PREFIX):
+        return zlib.decompress(base64.b85decode(value[len(_PACKED_PREFIX):])).decode("utf-8")
+    return value
+
 
 class GlobalText(gl.Contract):
     """
@@ -11,19 +400,144 @@ class GlobalText(gl.Contract):
     Uses Semantic Consensus to allow for valid variations in translation phrasing.
     """
     
-    # Stores: Original Text -> English Translation
+    # Stores: Original Text Content Key -> English Translation
+    # Large values are stored packed (see _pack); read them through _unpack
     translations: TreeMap[str, str]
 
-    def __init__(self):
-        pass
+    # Translation memory: content key of a source sentence -> its translation (packed)
+    memory: TreeMap[str, str]
+
+    # Content key -> original input, kept only when deployed with keep_originals
+    originals: TreeMap[str, str]
+    keep_originals: bool
+
+    # Token budget per translation chunk; 0 sends all unseen sentences at once
+    chunk_tokens: u256
+
+    # Similarity prefilter thresholds for semantic consensus, in thousandths
+    similarity_high: u256
+    similarity_low: u256
+
+    # Pending submissions live in queue[queue_head:queue_tail]; the live part is
+    # moved to the front once head passes half the array, so slots are reused
+    queue: DynArray[str]
+    queue_head: u256
+    queue_tail: u256
+    # Consecutive failed batches, and the items given up on (see BATCH_MAX_FAILURES)
+    queue_failures: u256
+    dead_letters: DynArray[str]
+
+    # Hot-path counters: "<method>.<counter>" -> total (see get_stats)
+    stats: TreeMap[str, u256]
+
+    def __init__(self, keep_originals: bool = False, chunk_tokens: int = CHUNK_TOKENS,
+                 similarity_high: int = SIMILARITY_HIGH, similarity_low: int = SIMILARITY_LOW):
+        if chunk_tokens < 0:
+            raise gl.vm.UserError("chunk_tokens must not be negative")
+        if not 0 <= similarity_low <= similarity_high <= 1000:
+            raise gl.vm.UserError("similarity thresholds must satisfy 0 <= low <= high <= 1000")
+        self.keep_originals = keep_originals
+        self.chunk_tokens = u256(chunk_tokens)
+        self.similarity_high = u256(similarity_high)
+        self.similarity_low = u256(similarity_low)
 
     @gl.public.write
     def translate_to_english(self, text: str) -> None:
         """
-        Translates text to English using LLM.
+        Translates text to English using LLM, sentence by sentence: only
+        sentences missing from the translation memory are prompted for, in
+        chunks of at most chunk_tokens. Chunks that succeed are remembered even
+        if another fails, so a retry of the call only re-sends the failed one.
         Returns NONE to avoid simulator serialization crashes.
         """
+        key = _content_key(text)
+        refresh = key in self.translations
+        results, counters = self._translate_texts([text])
+
+        # Store; an undecodable reply is not cached
+        if results is not None:
+            self.translations[key] = _pack(results[0])
+            if self.keep_originals:
+                self.originals[key] = text
+
+        self._record(
+            "translate_to_english",
+            calls=1,
+            input_bytes=len(text.encode("utf-8")),
+            refreshes=int(results is not None and refresh),
+            decode_failures=int(results is None),
+            **counters,
+        )
         
+        return None
+
+    def _translate_texts(self, texts: list[str]) -> tuple[list[str] | None, dict[str, int]]:
+        # Splits texts into sentences, prompts chunk by chunk for the unseen
+        # ones, adds them to the memory and reassembles every text around the
+        # original whitespace. Returns None for the texts if a chunk failed.
+        segmented = [_segments(text) for text in texts]
+        known: dict[str, str] = {}
+        todo: dict[str, tuple[str, str]] = {}
+        segments = 0
+        for _, pairs in segmented:
+            for sentence, separator in pairs:
+                segments += 1
+                key = _content_key(sentence)
+                if key in known or key in todo:
+                    continue
+                if key in self.memory:
+                    known[key] = _unpack(self.memory[key])
+                else:
+                    todo[key] = (sentence, separator)
+
+        keys, items = list(todo), list(todo.values())
+        runs = _chunks(items, int(self.chunk_tokens))
+        rounds = failed = disputed = 0
+        for run in runs:
+            sentences = [items[i][0] for i in run]
+            for _ in range(CHUNK_ATTEMPTS):
+                rounds += 1
+                # Validators that cannot agree on a chunk fail its round; that
+                # counts as a failed attempt rather than reverting the call, so
+                # the chunks already translated are still remembered
+                try:
+                    translated = self._translate_one(sentences[0]) if len(sentences) == 1 else \
+                        self._translate_many(sentences)
+                except Exception as e:
+                    print(f"Chunk consensus failed: {e}")
+                    disputed += 1
+                    translated = None
+                if translated is not None:
+                    break
+            if translated is None:
+                failed += 1
+                continue
+            for i, english in zip(run, translated):
+                known[keys[i]] = english
+                self.memory[keys[i]] = _pack(english)
+
+        counters = {
+            "segments": segments,
+            "segment_hits": segments - len(todo),
+            "prompt_segments": len(todo),
+            "chunks": len(runs),
+            "consensus_rounds": rounds,
+            "llm_prompts": rounds,
+            "chunk_retries": rounds - len(runs),
+            "chunk_failures": failed,
+            "consensus_failures": disputed,
+        }
+        if failed:
+            return None, counters
+
+        results = [
+            lead + "".join(known[_content_key(sentence)] + separator for sentence, separator in pairs)
+            for lead, pairs in segmented
+        ]
+        return results, counters
+
+    def _translate_one(self, text: str) -> list[str] | None:
+        # One text, one prompt and one semantic consensus round
         def translate_nondet() -> str:
             # Task: Translate and output JSON
             task = f"""
@@ -41,16 +555,14 @@ class GlobalText(gl.Contract):
             """
 
             result_raw = gl.nondet.exec_prompt(task)
-            
-            try:
-                cleaned = result_raw.replace("```json", "").replace("```", "").strip()
-                # Fast validation
-                json.loads(cleaned)
-                return cleaned
-            except:
-                return json.dumps({"translation": "Error: Translation failed"})
-
-        # Consensus: Semantic Similarity
+
+            parsed = _decode_llm_json(result_raw, {"translation": str})
+            if parsed is None:
+                return json.dumps({"error": "decode_failed"})
+            return json.dumps(parsed)
+
+        # Consensus: Semantic Similarity, with near-identical and clearly
+        # different translations settled before the judge.
         # We instruct validators to ignore minor phrasing differences.
         comparison_criteria = """
         Compare the 'translation' strings in the two JSON inputs.
@@ -63,23 +575,231 @@ class GlobalText(gl.Contract):
         """
 
         # Returns the JSON from the leader node
-        consensus_json = gl.eq_principle.prompt_comparative(
-            translate_nondet, 
-            comparison_criteria
+        consensus_json = _similarity_eq(
+            translate_nondet, "translation", comparison_criteria,
+            int(self.similarity_high), int(self.similarity_low),
         )
 
-        # Parse and Store
-        try:
-            parsed = json.loads(consensus_json)
-            english_text = parsed.get("translation", "Error")
-            self.translations[text] = english_text
-        except:
-            self.translations[text] = "Error: Storage failed"
-        
+        parsed = _decode_llm_json(consensus_json, {"translation": str})
+        return None if parsed is None else [parsed["translation"]]
+
+    def _translate_many(self, texts: list[str]) -> list[str] | None:
+        # Several texts in one combined prompt and a single consensus round
+        def translate_batch_nondet() -> str:
+            task = f"""
+            Act as a Professional Translator.
+            Translate each text in this JSON list into clear, standard English:
+            {json.dumps(texts, ensure_ascii=False)}
+
+            Instructions:
+            1. Maintain the original tone and meaning.
+            2. If a text is already English, correct any grammar/spelling.
+            3. Keep the list order: one translation per input text.
+
+            Respond using ONLY JSON:
+            {{ "translations": ["string", ...] }}
+            """
+
+            result_raw = gl.nondet.exec_prompt(task)
+
+            values = _decode_llm_list(result_raw, "translations", len(texts), str)
+            if values is None:
+                return json.dumps({"error": "decode_failed"})
+            return json.dumps({"translations": values})
+
+        comparison_criteria = """
+        Compare the 'translations' lists in the two JSON inputs position by position.
+
+        Logic:
+        1. Both lists must have the same length.
+        2. Each pair of translations must be semantically equivalent.
+        3. Ignore minor differences in punctuation or synonym choice.
+        4. If every pair preserves the meaning, treat them as EQUAL.
+        """
+
+        consensus_json = _similarity_eq(
+            translate_batch_nondet, "translations", comparison_criteria,
+            int(self.similarity_high), int(self.similarity_low),
+        )
+        return _decode_llm_list(consensus_json, "translations", len(texts), str)
+
+    @gl.public.write
+    def submit(self, text: str) -> None:
+        """
+        Queues text for the next process_queue batch.
+        Deterministic: no prompt and no consensus round. Cached inputs are skipped.
+        """
+        if _content_key(text) in self.translations:
+            self._record("submit", calls=1, cache_hits=1)
+            return None
+        self._enqueue(text)
+        self._record("submit", calls=1, input_bytes=len(text.encode("utf-8")))
+        return None
+
+    @gl.public.write
+    def process_queue(self, max_items: int = BATCH_LIMIT) -> None:
+        """
+        Translates up to max_items queued texts with one combined prompt (over
+        the sentences not yet in memory) and a single consensus round, storing
+        each result as translate_to_english does.
+        An undecodable batch stays queued and the next one is halved (see
+        BATCH_MAX_FAILURES).
+        """
+        batch = self._pending(max_items)
+        if not batch:
+            return None
+
+        # Duplicates and texts translated since submission need no prompt
+        todo = []
+        for text in batch:
+            if _content_key(text) not in self.translations and text not in todo:
+                todo.append(text)
+
+        translations, counters = self._translate_texts(todo) if todo else ([], {})
+        if translations is None:
+            self._record("process_queue", calls=1, decode_failures=1,
+                         dead_letters=self._batch_failed(batch), **counters)
+            return None
+
+        # Fan the batch back into the translation map
+        for text, english_text in zip(todo, translations):
+            key = _content_key(text)
+            self.translations[key] = _pack(english_text)
+            if self.keep_originals:
+                self.originals[key] = text
+        self._dequeue(len(batch))
+
+        self._record(
+            "process_queue",
+            calls=1,
+            batch_items=len(todo),
+            input_bytes=sum(len(text.encode("utf-8")) for text in todo),
+            cache_hits=len(batch) - len(todo),
+            **counters,
+        )
         return None
 
     @gl.public.view
     def get_translation(self, original_text: str) -> str:
-        if original_text in self.translations:
-            return self.translations[original_text]
+        key = _content_key(original_text)
+        if key in self.translations:
+            return _unpack(self.translations[key])
         return "Not found"
+
+    @gl.public.view
+    def get_original(self, key: str) -> str:
+        """
+        Returns the input stored under a content key, or "" if originals are not kept.
+        """
+        if key in self.originals:
+            return self.originals[key]
+        return ""
+
+    @gl.public.view
+    def list_entries(self, start_after: str = "", limit: int = 50) -> dict[str, typing.Any]:
+        """
+        Pages through stored translations in key order: {"entries": [[key, value], ...], "next": cursor}.
+        Pass "next" back as start_after; it is "" after the last page.
+        """
+        return _list_view(self.translations, start_after, limit, _unpack)
+
+    @gl.public.view
+    def export_entries(self, start_after: str = "", limit: int = EXPORT_LIMIT) -> str:
+        """
+        Same pages as list_entries, as compact columnar JSON for bulk mirroring.
+        """
+        return _export_view(self.translations, start_after, limit, _unpack)
+
+    @gl.public.view
+    def list_originals(self, start_after: str = "", limit: int = 50) -> dict[str, typing.Any]:
+        """
+        Pages through the retained original inputs, keyed like list_entries.
+        """
+        return _list_view(self.originals, start_after, limit)
+
+    @gl.public.view
+    def get_memory_stats(self) -> dict[str, typing.Any]:
+        """
+        Returns translation-memory totals across both write paths: sentences
+        looked up, sentences served without a prompt, and their hit ratio.
+        """
+        totals = {"segments": 0, "segment_hits": 0}
+        for key, count in self.stats.items():
+            counter = key.split(".", 1)[1]
+            if counter in totals:
+                totals[counter] += int(count)
+        segments, hits = totals["segments"], totals["segment_hits"]
+        return {"segments": segments, "hits": hits,
+                "hit_ratio": round(hits / segments, 4) if segments else 0.0}
+
+    @gl.public.view
+    def get_queue_length(self) -> int:
+        return int(self.queue_tail) - int(self.queue_head)
+
+    @gl.public.view
+    def get_dead_letters(self, start: int = 0, limit: int = 50) -> list[str]:
+        """
+        Queued inputs dropped after BATCH_MAX_FAILURES failed batches, oldest
+        first. Submit one again to retry it.
+        """
+        start = max(0, start)
+        end = min(start + max(1, min(limit, LIST_LIMIT)), len(self.dead_letters))
+        return [self.dead_letters[i] for i in range(start, end)]
+
+    def _enqueue(self, item: str) -> None:
+        tail = int(self.queue_tail)
+        if tail < len(self.queue):
+            self.queue[tail] = item
+        else:
+            self.queue.append(item)
+        self.queue_tail = u256(tail + 1)
+
+    def _pending(self, max_items: int) -> list[str]:
+        head = int(self.queue_head)
+        size = max(1, BATCH_LIMIT >> int(self.queue_failures))
+        count = max(0, min(max_items, size, int(self.queue_tail) - head))
+        return [self.queue[i] for i in range(head, head + count)]
+
+    def _dequeue(self, count: int) -> None:
+        # Progress doubles the batch size back, one step per processed batch
+        if self.queue_failures:
+            self.queue_failures = u256(int(self.queue_failures) - 1)
+        head, tail = int(self.queue_head) + count, int(self.queue_tail)
+        if head >= tail:
+            # Drained: rewind so later submissions overwrite the same slots
+            head = tail = 0
+        elif head * 2 >= len(self.queue):
+            # Compact: each move is paid for by a dequeue since the last one,
+            # and the array stays within twice the longest queue
+            for i in range(head, tail):
+                self.queue[i - head] = self.queue[i]
+            head, tail = 0, tail - head
+        self.queue_head = u256(head)
+        self.queue_tail = u256(tail)
+
+    def _batch_failed(self, batch: list[str]) -> int:
+        # Counts a batch that left the queue untouched; returns 1 when its lone
+        # item has now failed too often and was dead-lettered instead
+        failures = int(self.queue_failures) + 1
+        if len(batch) > 1 or failures < BATCH_MAX_FAILURES:
+            self.queue_failures = u256(failures)
+            return 0
+        self.dead_letters.append(batch[0])
+        self.queue_failures = u256(0)
+        self._dequeue(1)
+        return 1
+
+    def _record(self, method: str, **counters: int) -> None:
+        # Adds to the "<method>.<counter>" totals read by get_stats
+        for name, amount in counters.items():
+            if amount:
+                key = f"{method}.{name}"
+                current = int(self.stats[key]) if key in self.stats else 0
+                self.stats[key] = u256(current + amount)
+
+    @gl.public.view
+    def get_stats(self) -> dict[str, int]:
+        """
+        Returns hot-path counters keyed "<method>.<counter>".
+        """
+        return {key: int(count) for key, count in self.stats.items()}
@@ -2,8 +2,287 @@
 # { "Depends": "py-genlayer:latest" }
 
 from genlayer import *
+import base64
+import bisect
 import json
+import math
+import re
 import typing
+import zlib
+
+
+# Repairs applied outside string literals when a reply is not strict JSON:
+# single-quoted strings, Python True/False/None, trailing commas, // comments.
+_JSON_REPAIR = re.compile(
+    r'("(?:[^"\\]|\\.)*")'
+    r"|'((?:[^'\\]|\\.)*)'"
+    r"|\b(True|False|None)\b"
+    r"|,(\s*[}\]])"
+    r"|\s//[^\n]*"
+)
+_INVALID = object()
+
+
+def _repair_token(match: re.Match) -> str:
+    quoted, single, literal, closer = match.groups()
+    if quoted:
+        return quoted
+    if single is not None:
+        return json.dumps(single.replace("\\'", "'"))
+    if literal:
+        return {"True": "true", "False": "false", "None": "null"}[literal]
+    if closer is not None:
+        return closer
+    return ""
+
+
+def _first_object(raw: str) -> str | None:
+    # First balanced {...}, ignoring braces inside quoted strings
+    start = raw.find("{")
+    while start != -1:
+        depth, quote, escaped = 0, "", False
+        for i in range(start, len(raw)):
+            ch = raw[i]
+            if quote:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == quote:
+                    quote = ""
+            elif ch in "\"'":
+                quote = ch
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return raw[start:i + 1]
+        start = raw.find("{", start + 1)
+    return None
+
+
+def _coerce(value, spec):
+    if isinstance(spec, list):
+        for option in spec:
+            if str(value).strip().lower() == str(option).lower():
+                return option
+        return _INVALID
+    for kind in spec if isinstance(spec, tuple) else (spec,):
+        if kind is type(None) and value is None:
+            return None
+        if kind is bool:
+            if isinstance(value, bool):
+                return value
+            if str(value).strip().lower() in ("true", "false"):
+                return str(value).strip().lower() == "true"
+        if kind in (int, float) and value is not None and not isinstance(value, bool):
+            if kind is int and isinstance(value, int):
+                return value
+            try:
+                number = float(str(value).strip().replace(",", ""))
+            except ValueError:
+                continue
+            if not math.isfinite(number):
+                continue
+            if kind is float:
+                return number
+            if number.is_integer():
+                return int(number)
+        if kind is str and isinstance(value, str):
+            return value
+    return _INVALID
+
+
+def _decode_llm_json(raw: str, schema: dict) -> dict | None:
+    """
+    Decodes an LLM reply into a dict that satisfies `schema`, or returns None.
+    Finds the first balanced JSON object, so fences and surrounding prose are
+    ignored, and repairs common formatting quirks before giving up.
+    Schema values are a type, a tuple of accepted types, or a list of allowed
+    literals (matched case-insensitively and returned in canonical form).
+    """
+    text = _first_object(raw) if isinstance(raw, str) else None
+    if text is None:
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        try:
+            data = json.loads(_JSON_REPAIR.sub(_repair_token, text))
+        except ValueError:
+            return None
+    if not isinstance(data, dict):
+        return None
+    for field, spec in schema.items():
+        value = _coerce(data[field], spec) if field in data else _INVALID
+        if value is _INVALID:
+            return None
+        data[field] = value
+    return data
+
+
+# Page size caps for list_entries / export_entries. Each page re-walks the
+# keys before its cursor (see _page), so mirrors should sync through
+# export_entries, whose larger pages keep a full pass to N / EXPORT_LIMIT walks.
+LIST_LIMIT = 200
+EXPORT_LIMIT = 1000
+
+
+def _page(entries: TreeMap, start_after: str, limit: int, cap: int,
+          convert: typing.Callable | None = None) -> tuple[list, str]:
+    """
+    Up to `limit` (key, value) pairs with keys strictly after `start_after`,
+    in key order, and the cursor for the next page ("" after the last one).
+    TreeMap iterates from its first key and cannot seek, so every page walks
+    the keys before its cursor: O(position + limit) key reads per page and
+    O(N^2 / limit) for a full pass. Only the returned entries' values are read.
+    """
+    limit = max(1, min(limit, cap))
+    page = []
+    for key in entries:
+        if start_after and key <= start_after:
+            continue
+        if len(page) == limit:
+            return page, page[-1][0]
+        value = entries[key]
+        page.append([key, convert(value) if convert else value])
+    return page, ""
+
+
+def _list_view(entries: TreeMap, start_after: str, limit: int,
+               convert: typing.Callable | None = None) -> dict[str, typing.Any]:
+    page, cursor = _page(entries, start_after, limit, LIST_LIMIT, convert)
+    return {"entries": page, "next": cursor}
+
+
+def _export_view(entries: TreeMap, start_after: str, limit: int,
+                 convert: typing.Callable | None = None) -> str:
+    # Columnar, whitespace-free JSON: {"k": [...], "v": [...], "n": cursor}
+    page, cursor = _page(entries, start_after, limit, EXPORT_LIMIT, convert)
+    payload = {"k": [k for k, _ in page], "v": [v for _, v in page], "n": cursor}
+    return json.dumps(payload, separators=(",", ":"))
+
+
+# Stored values at least this many UTF-8 bytes are zlib-compressed; shorter
+# ones stay raw, where the encoding overhead would outweigh the saving
+COMPRESS_MIN_BYTES = 256
+_PACKED_PREFIX = "z85:"
+
+
+def _pack(text: str) -> str:
+    """
+    Storage encoding for large text values: the zlib stream in base85 behind
+    a marker prefix. Kept raw when short or when compression does not pay,
+    unless the raw text itself starts with the marker.
+    """
+    raw = text.encode("utf-8")
+    escape = text.startswith(_PACKED_PREFIX)
+    if len(raw) < COMPRESS_MIN_BYTES and not escape:
+        return text
+    packed = _PACKED_PREFIX + base64.b85encode(zlib.compress(raw, 9)).decode("ascii")
+    return packed if escape or len(packed) < len(raw) else text
+
+
+def _unpack(value: str) -> str:
+    if value.startswith(_PACKED_PREFIX):
+        return zlib.decompress(base64.b85decode(value[len(_PACKED_PREFIX):])).decode("utf-8")
+    return value
+
+
+# Keyword-windowed retrieval: the prompt gets at most WINDOW_LIMIT windows of
+# about WINDOW_CHARS around keyword matches; a document without a match falls
+# back to its first FALLBACK_CHARS characters
+WINDOW_CHARS = 1200
+WINDOW_LIMIT = 3
+FALLBACK_CHARS = 10000
+
+_HYPHENS = "\\-\u00ad\u2010\u2011"
+# Paragraph breaks and lines opening a numbered section start a new block
+_BLOCK_BREAK = re.compile(
+    r"\n(?:[ \t]*\n\s*|(?=[ \t]*(?:(?:section|article|clause)\s+)?\d+(?:\.\d+)*[.)]\s+\S))",
+    re.IGNORECASE,
+)
+_HEADING = re.compile(r"(?:(?:Section|Article|Clause)\s+)?\d+(?:\.\d+)*\.\s+[A-Z]")
+
+
+def _keyword_pattern(keyword: str) -> re.Pattern | None:
+    """
+    Pattern for lowercased `keyword` that also matches it hyphenated
+    anywhere, including across a line break ("in-\\ndemnify"), and with its
+    words joined by spaces, hyphens or nothing ("non-compete", "noncompete").
+    """
+    words = [w for w in re.split(rf"[\s{_HYPHENS}]+", keyword.strip().lower()) if w]
+    if not words:
+        return None
+    soft = rf"(?:[{_HYPHENS}]\s*)?"
+    joined = rf"[\s{_HYPHENS}]*".join(soft.join(re.escape(ch) for ch in word) for word in words)
+    return re.compile(joined)
+
+
+def _keyword_matches(text: str, pattern: re.Pattern) -> typing.Iterator[tuple[int, int]]:
+    # Case-insensitive matches that start a word, so inflections still match.
+    # The pattern runs over a lowercased copy, which keeps offsets unless
+    # lowercasing changes the length; a lookbehind would cost far more per scan.
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        lowered, pattern = text, re.compile(pattern.pattern, re.IGNORECASE)
+    for match in pattern.finditer(lowered):
+        start = match.start()
+        if start == 0 or not (text[start - 1].isalnum() or text[start - 1] == "_"):
+            yield start, match.end()
+
+
+def _windows(text: str, keyword: str, size: int = WINDOW_CHARS,
+             limit: int = WINDOW_LIMIT) -> list[tuple[int, int]]:
+    """
+    Character spans of the best keyword windows, in document order. Each
+    match opens a window over its paragraph or section, clipped to about
+    `size` characters and pulled back to a section heading when one precedes
+    the match; overlapping windows merge. Windows rank by matches, plus a
+    bonus for a definition ("X" means, quoted term) or a heading.
+    """
+    pattern = _keyword_pattern(keyword)
+    if pattern is None:
+        return []
+    starts = [0] + [m.end() for m in _BLOCK_BREAK.finditer(text)]
+    windows: list[list[int]] = []
+    for match_start, match_end in _keyword_matches(text, pattern):
+        i = bisect.bisect_right(starts, match_start) - 1
+        block_start = starts[i]
+        block_end = starts[i + 1] if i + 1 < len(starts) else len(text)
+        start, end = block_start, block_end
+        if end - start > size:
+            start = max(block_start, match_start - size // 3)
+            headings = list(_HEADING.finditer(text, start, match_start))
+            if headings:
+                start = headings[-1].start()
+            end = min(block_end, max(start + size, match_end))
+        if windows and start < windows[-1][1] and end - windows[-1][0] <= 2 * size:
+            windows[-1][1] = max(windows[-1][1], end)
+        else:
+            windows.append([max(start, windows[-1][1]) if windows else start, end, 0])
+        windows[-1][2] += 2
+    # A defined term: the keyword inside a quoted term, or directly, followed by "(shall) mean(s)"
+    definition = re.compile(
+        rf"(?:[\"“'][^\"”'\n]{{0,40}}(?:{pattern.pattern})[^\"”'\n]{{0,40}}[\"”']|(?:{pattern.pattern})\w*)"
+        r"\W{0,3}\s*(?:shall\s+)?means?\b",
+        re.IGNORECASE,
+    )
+    for window in windows:
+        excerpt = text[window[0]:window[1]]
+        if definition.search(excerpt):
+            window[2] += 3
+        if _HEADING.match(excerpt.lstrip()):
+            window[2] += 1
+    best = sorted(windows, key=lambda w: (-w[2], w[0]))[:limit]
+    return sorted((start, end) for start, end, _ in best)
+
+
+def _excerpt(text: str, windows: list[tuple[int, int]]) -> str:
+    # The windows with their offsets, for the prompt
+    return "\n\n".join(f"[chars {start}-{end}]\n{text[start:end].strip()}" for start, end in windows)
+
 
 class LegalReader(gl.Contract):
     """
@@ -12,8 +291,15 @@ class LegalReader(gl.Contract):
     """
     
     # Storage: "URL + Keyword" -> Extracted Clause Text
+    # Large values are stored packed (see _pack); read them through _unpack
     clauses: TreeMap[str, str]
 
+    # Same key -> compact JSON [[start, end], ...] of the windows the prompt saw
+    clause_windows: TreeMap[str, str]
+
+    # Hot-path counters: "<method>.<counter>" -> total (see get_stats)
+    stats: TreeMap[str, u256]
+
     def __init__(self):
         pass
 
@@ -21,11 +307,15 @@ class LegalReader(gl.Contract):
     def extract_clause(self, doc_url: str, keyword: str) -> None:
         """
         Fetches the document and extracts the paragraph containing the keyword.
+        Only the best-ranked windows around keyword matches are sent to the
+        LLM (see _windows), wherever they sit in the document; their offsets
+        are kept for get_clause_windows.
         Returns NONE to avoid simulator serialization crashes.
         """
         
         # Create a unique key for storage
         storage_key = f"{doc_url}::{keyword}"
+        refresh = storage_key in self.clauses
 
         def extract_nondet() -> str:
             print(f"Fetching document: {doc_url}")
@@ -38,6 +328,14 @@ class LegalReader(gl.Contract):
                 print(f"Fetch failed: {e}")
                 return json.dumps({"clause": "Error: Fetch failed"})
 
+            windows = _windows(doc_content, keyword)
+            if windows:
+                label = "Document excerpts around the keyword, in order (character offsets in brackets)"
+                snippet = _excerpt(doc_content, windows)
+            else:
+                label = "Document Text (snippet)"
+                snippet = doc_content[:FALLBACK_CHARS]
+
             task = f"""
             Act as a Legal Assistant.
             
@@ -46,21 +344,19 @@ class LegalReader(gl.Contract):
             3. If the keyword appears multiple times, extract the most significant/definitional instance.
             4. If not found, return "Not Found".
             
-            Document Text (snippet):
-            {doc_content[:10000]} 
+            {label}:
+            {snippet} 
 
             Respond using ONLY JSON:
             {{ "clause": "extracted text..." }}
             """
 
             result_raw = gl.nondet.exec_prompt(task)
-            
-            try:
-                cleaned = result_raw.replace("```json", "").replace("```", "").strip()
-                json.loads(cleaned)
-                return cleaned
-            except:
-                return json.dumps({"clause": "Error: Parsing failed"})
+
+            parsed = _decode_llm_json(result_raw, {"clause": str})
+            if parsed is None:
+                return json.dumps({"error": "decode_failed"})
+            return json.dumps({"clause": parsed["clause"], "windows": windows})
 
         # Consensus: Comparative (LLM-as-a-Judge)
         # We use the LLM to decide if two extracted strings are "effectively" the same.
@@ -80,12 +376,28 @@ class LegalReader(gl.Contract):
             comparison_criteria
         )
 
-        try:
-            parsed = json.loads(consensus_json)
-            clause_text = parsed.get("clause", "Error")
-            self.clauses[storage_key] = clause_text
-        except:
-            self.clauses[storage_key] = "Error: Consensus failed"
+        parsed = _decode_llm_json(consensus_json, {"clause": str})
+        windows = parsed.get("windows") if parsed is not None else None
+        if not isinstance(windows, list):
+            windows = []
+        if parsed is not None:
+            self.clauses[storage_key] = _pack(parsed["clause"])
+            self.clause_windows[storage_key] = json.dumps(windows, separators=(",", ":"))
+
+        stored = "" if parsed is None else parsed["clause"]
+        self._record(
+            "extract_clause",
+            calls=1,
+            consensus_rounds=1,
+            web_fetches=1,
+            llm_prompts=int(stored != "Error: Fetch failed"),
+            input_bytes=len(storage_key.encode("utf-8")),
+            refreshes=int(parsed is not None and refresh),
+            fallbacks=int(stored.startswith("Error")),
+            decode_failures=int(parsed is None),
+            windows=len(windows),
+            retrieval_misses=int(parsed is not None and not windows and not stored.startswith("Error")),
+        )
         
         return None
 
@@ -96,5 +408,47 @@ class LegalReader(gl.Contract):
         """
         storage_key = f"{doc_url}::{keyword}"
         if storage_key in self.clauses:
-            return self.clauses[storage_key]
+            return _unpack(self.clauses[storage_key])
         return "Not found"
+
+    @gl.public.view
+    def get_clause_windows(self, doc_url: str, keyword: str) -> list[list[int]]:
+        """
+        Returns the [start, end] character offsets, in the rendered document,
+        of the windows the stored clause was extracted from; [] when the
+        keyword never matched and the leading text was used instead.
+        """
+        storage_key = f"{doc_url}::{keyword}"
+        if storage_key in self.clause_windows:
+            return json.loads(self.clause_windows[storage_key])
+        return []
+
+    @gl.public.view
+    def list_entries(self, start_after: str = "", limit: int = 50) -> dict[str, typing.Any]:
+        """
+        Pages through extracted clauses in key order: {"entries": [[key, value], ...], "next": cursor}.
+        Pass "next" back as start_after; it is "" after the last page.
+        """
+        return _list_view(self.clauses, start_after, limit, _unpack)
+
+    @gl.public.view
+    def export_entries(self, start_after: str = "", limit: int = EXPORT_LIMIT) -> str:
+        """
+        Same pages as list_entries, as compact columnar JSON for bulk mirroring.
+        """
+        return _export_view(self.clauses, start_after, limit, _unpack)
+
+    def _record(self, method: str, **counters: int) -> None:
+        # Adds to the "<method>.<counter>" totals read by get_stats
+        for name, amount in counters.items():
+            if amount:
+                key = f"{method}.{name}"
+                current = int(self.stats[key]) if key in self.stats else 0
+                self.stats[key] = u256(current + amount)
+
+    @gl.public.view
+    def get_stats(self) -> dict[str, int]:
+        """
+        Returns hot-path counters keyed "<method>.<counter>".
+        """
+        return {key: int(count) for key, count in self.stats.items()}
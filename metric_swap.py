@@ -3,8 +3,191 @@
 
 from genlayer import *
 import json
+import math
+import re
 import typing
 
+
+# Repairs applied outside string literals when a reply is not strict JSON:
+# single-quoted strings, Python True/False/None, trailing commas, // comments.
+_JSON_REPAIR = re.compile(
+    r'("(?:[^"\\]|\\.)*")'
+    r"|'((?:[^'\\]|\\.)*)'"
+    r"|\b(True|False|None)\b"
+    r"|,(\s*[}\]])"
+    r"|\s//[^\n]*"
+)
+_INVALID = object()
+
+
+def _repair_token(match: re.Match) -> str:
+    quoted, single, literal, closer = match.groups()
+    if quoted:
+        return quoted
+    if single is not None:
+        return json.dumps(single.replace("\\'", "'"))
+    if literal:
+        return {"True": "true", "False": "false", "None": "null"}[literal]
+    if closer is not None:
+        return closer
+    return ""
+
+
+def _first_object(raw: str) -> str | None:
+    # First balanced {...}, ignoring braces inside quoted strings
+    start = raw.find("{")
+    while start != -1:
+        depth, quote, escaped = 0, "", False
+        for i in range(start, len(raw)):
+            ch = raw[i]
+            if quote:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == quote:
+                    quote = ""
+            elif ch in "\"'":
+                quote = ch
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return raw[start:i + 1]
+        start = raw.find("{", start + 1)
+    return None
+
+
+def _coerce(value, spec):
+    if isinstance(spec, list):
+        for option in spec:
+            if str(value).strip().lower() == str(option).lower():
+                return option
+        return _INVALID
+    for kind in spec if isinstance(spec, tuple) else (spec,):
+        if kind is type(None) and value is None:
+            return None
+        if kind is bool:
+            if isinstance(value, bool):
+                return value
+            if str(value).strip().lower() in ("true", "false"):
+                return str(value).strip().lower() == "true"
+        if kind in (int, float) and value is not None and not isinstance(value, bool):
+            if kind is int and isinstance(value, int):
+                return value
+            try:
+                number = float(str(value).strip().replace(",", ""))
+            except ValueError:
+                continue
+            if not math.isfinite(number):
+                continue
+            if kind is float:
+                return number
+            if number.is_integer():
+                return int(number)
+        if kind is str and isinstance(value, str):
+            return value
+    return _INVALID
+
+
+def _decode_llm_json(raw: str, schema: dict) -> dict | None:
+    """
+    Decodes an LLM reply into a dict that satisfies `schema`, or returns None.
+    Finds the first balanced JSON object, so fences and surrounding prose are
+    ignored, and repairs common formatting quirks before giving up.
+    Schema values are a type, a tuple of accepted types, or a list of allowed
+    literals (matched case-insensitively and returned in canonical form).
+    """
+    text = _first_object(raw) if isinstance(raw, str) else None
+    if text is None:
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        try:
+            data = json.loads(_JSON_REPAIR.sub(_repair_token, text))
+        except ValueError:
+            return None
+    if not isinstance(data, dict):
+        return None
+    for field, spec in schema.items():
+        value = _coerce(data[field], spec) if field in data else _INVALID
+        if value is _INVALID:
+            return None
+        data[field] = value
+    return data
+
+
+def _field_number(payload: str, field: str) -> float | None:
+    parsed = _decode_llm_json(payload, {field: float})
+    return None if parsed is None else parsed[field]
+
+
+def _tolerance_eq(fn: typing.Callable[[], str], field: str,
+                  abs_tol: float = 0.0, rel_tol: float = 0.0) -> str:
+    """
+    Numeric-tolerance consensus over a JSON-returning nondet function.
+    Each validator re-runs fn and accepts the leader's output when the numeric
+    `field` differs by at most abs_tol, or by at most rel_tol of the larger
+    magnitude. The check is arithmetic, so no LLM judge call is made.
+    """
+    def validator_fn(leader_result) -> bool:
+        if not isinstance(leader_result, gl.vm.Return):
+            return False
+        leader_val = _field_number(leader_result.calldata, field)
+        own_val = _field_number(fn(), field)
+        if leader_val is None or own_val is None:
+            # Both sides undecodable is agreement; the caller records the failure
+            return leader_val is None and own_val is None
+        diff = abs(leader_val - own_val)
+        return diff <= abs_tol or diff <= rel_tol * max(abs(leader_val), abs(own_val))
+
+    return gl.vm.run_nondet(fn, validator_fn)
+
+
+# Page size caps for list_entries / export_entries. Each page re-walks the
+# keys before its cursor (see _page), so mirrors should sync through
+# export_entries, whose larger pages keep a full pass to N / EXPORT_LIMIT walks.
+LIST_LIMIT = 200
+EXPORT_LIMIT = 1000
+
+
+def _page(entries: TreeMap, start_after: str, limit: int, cap: int,
+          convert: typing.Callable | None = None) -> tuple[list, str]:
+    """
+    Up to `limit` (key, value) pairs with keys strictly after `start_after`,
+    in key order, and the cursor for the next page ("" after the last one).
+    TreeMap iterates from its first key and cannot seek, so every page walks
+    the keys before its cursor: O(position + limit) key reads per page and
+    O(N^2 / limit) for a full pass. Only the returned entries' values are read.
+    """
+    limit = max(1, min(limit, cap))
+    page = []
+    for key in entries:
+        if start_after and key <= start_after:
+            continue
+        if len(page) == limit:
+            return page, page[-1][0]
+        value = entries[key]
+        page.append([key, convert(value) if convert else value])
+    return page, ""
+
+
+def _list_view(entries: TreeMap, start_after: str, limit: int,
+               convert: typing.Callable | None = None) -> dict[str, typing.Any]:
+    page, cursor = _page(entries, start_after, limit, LIST_LIMIT, convert)
+    return {"entries": page, "next": cursor}
+
+
+def _export_view(entries: TreeMap, start_after: str, limit: int,
+                 convert: typing.Callable | None = None) -> str:
+    # Columnar, whitespace-free JSON: {"k": [...], "v": [...], "n": cursor}
+    page, cursor = _page(entries, start_after, limit, EXPORT_LIMIT, convert)
+    payload = {"k": [k for k, _ in page], "v": [v for _, v in page], "n": cursor}
+    return json.dumps(payload, separators=(",", ":"))
+
+
 class MetricSwap(gl.Contract):
     """
     Converts Imperial units to specific Metric units.
@@ -16,6 +199,9 @@ class MetricSwap(gl.Contract):
     # Storage Value: Metric Amount * 1000
     conversions: TreeMap[str, u256]
 
+    # Hot-path counters: "<method>.<counter>" -> total (see get_stats)
+    stats: TreeMap[str, u256]
+
     def __init__(self):
         pass
 
@@ -29,6 +215,7 @@ class MetricSwap(gl.Contract):
         # Create a unique key including the target unit
         # e.g. "10_miles_km" vs "10_miles_m"
         storage_key = f"{value}_{from_unit.lower()}_{to_unit.lower()}"
+        refresh = storage_key in self.conversions
 
         def convert_nondet() -> str:
             task = f"""
@@ -46,44 +233,33 @@ class MetricSwap(gl.Contract):
             """
 
             result_raw = gl.nondet.exec_prompt(task)
-            
-            try:
-                cleaned = result_raw.replace("```json", "").replace("```", "").strip()
-                json.loads(cleaned)
-                return cleaned
-            except:
-                return json.dumps({"result": 0.0})
-
-        # Consensus: Comparative (Float Match with Tolerance)
-        # We allow a 1% difference for float rounding
-        comparison_criteria = """
-        Compare the 'result' floats.
-        
-        Logic:
-        1. Parse float val_a and val_b.
-        2. If both are 0.0, EQUAL.
-        3. If one is 0.0, DIFFERENT.
-        4. Calculate Difference: abs(val_a - val_b) / max(val_a, val_b).
-        5. If Difference <= 0.01 (1%), EQUAL.
-        6. Otherwise, DIFFERENT.
-        """
 
-        consensus_json = gl.eq_principle.prompt_comparative(
-            convert_nondet, 
-            comparison_criteria
-        )
+            parsed = _decode_llm_json(result_raw, {"result": float})
+            if parsed is None:
+                return json.dumps({"error": "decode_failed"})
+            return json.dumps(parsed)
 
-        try:
-            parsed = json.loads(consensus_json)
-            val = float(parsed.get("result", 0.0))
-            
+        # Consensus: Numeric Tolerance (1%)
+        # We allow a 1% difference for float rounding.
+        # Both 0.0 agree; a 0.0 against a non-zero value does not.
+        consensus_json = _tolerance_eq(convert_nondet, "result", rel_tol=0.01)
+
+        parsed = _decode_llm_json(consensus_json, {"result": float})
+        decoded = parsed is not None and parsed["result"] >= 0
+        if decoded:
             # Scale by 1000 (preserves 3 decimal places)
-            scaled_int = int(val * 1000)
-            
-            self.conversions[storage_key] = u256(scaled_int)
-        except Exception as e:
-            print(f"Storage Error: {e}")
-            self.conversions[storage_key] = u256(0)
+            self.conversions[storage_key] = u256(int(parsed["result"] * 1000))
+
+        self._record(
+            "convert",
+            calls=1,
+            consensus_rounds=1,
+            llm_prompts=1,
+            input_bytes=len(storage_key.encode("utf-8")),
+            refreshes=int(decoded and refresh),
+            fallbacks=int(decoded and parsed["result"] == 0),
+            decode_failures=int(not decoded),
+        )
         
         return None
 
@@ -99,3 +275,33 @@ class MetricSwap(gl.Contract):
             result_float = scaled / 1000.0
             return f"{result_float}"
         return "0.0"
+
+    @gl.public.view
+    def list_entries(self, start_after: str = "", limit: int = 50) -> dict[str, typing.Any]:
+        """
+        Pages through conversions (x1000, as stored) in key order: {"entries": [[key, value], ...], "next": cursor}.
+        Pass "next" back as start_after; it is "" after the last page.
+        """
+        return _list_view(self.conversions, start_after, limit, int)
+
+    @gl.public.view
+    def export_entries(self, start_after: str = "", limit: int = EXPORT_LIMIT) -> str:
+        """
+        Same pages as list_entries, as compact columnar JSON for bulk mirroring.
+        """
+        return _export_view(self.conversions, start_after, limit, int)
+
+    def _record(self, method: str, **counters: int) -> None:
+        # Adds to the "<method>.<counter>" totals read by get_stats
+        for name, amount in counters.items():
+            if amount:
+                key = f"{method}.{name}"
+                current = int(self.stats[key]) if key in self.stats else 0
+                self.stats[key] = u256(current + amount)
+
+    @gl.public.view
+    def get_stats(self) -> dict[str, int]:
+        """
+        Returns hot-path counters keyed "<method>.<counter>".
+        """
+        return {key: int(count) for key, count in self.stats.items()}
@@ -2,8 +2,252 @@
 # { "Depends": "py-genlayer:latest" }
 
 from genlayer import *
+import hashlib
 import json
+import math
+import re
 import typing
+import unicodedata
+
+
+# Repairs applied outside string literals when a reply is not strict JSON:
+# single-quoted strings, Python True/False/None, trailing commas, // comments.
+_JSON_REPAIR = re.compile(
+    r'("(?:[^"\\]|\\.)*")'
+    r"|'((?:[^'\\]|\\.)*)'"
+    r"|\b(True|False|None)\b"
+    r"|,(\s*[}\]])"
+    r"|\s//[^\n]*"
+)
+_INVALID = object()
+
+
+def _repair_token(match: re.Match) -> str:
+    quoted, single, literal, closer = match.groups()
+    if quoted:
+        return quoted
+    if single is not None:
+        return json.dumps(single.replace("\\'", "'"))
+    if literal:
+        return {"True": "true", "False": "false", "None": "null"}[literal]
+    if closer is not None:
+        return closer
+    return ""
+
+
+def _first_object(raw: str) -> str | None:
+    # First balanced {...}, ignoring braces inside quoted strings
+    start = raw.find("{")
+    while start != -1:
+        depth, quote, escaped = 0, "", False
+        for i in range(start, len(raw)):
+            ch = raw[i]
+            if quote:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == quote:
+                    quote = ""
+            elif ch in "\"'":
+                quote = ch
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return raw[start:i + 1]
+        start = raw.find("{", start + 1)
+    return None
+
+
+def _coerce(value, spec):
+    if isinstance(spec, list):
+        for option in spec:
+            if str(value).strip().lower() == str(option).lower():
+                return option
+        return _INVALID
+    for kind in spec if isinstance(spec, tuple) else (spec,):
+        if kind is type(None) and value is None:
+            return None
+        if kind is bool:
+            if isinstance(value, bool):
+                return value
+            if str(value).strip().lower() in ("true", "false"):
+                return str(value).strip().lower() == "true"
+        if kind in (int, float) and value is not None and not isinstance(value, bool):
+            if kind is int and isinstance(value, int):
+                return value
+            try:
+                number = float(str(value).strip().replace(",", ""))
+            except ValueError:
+                continue
+            if not math.isfinite(number):
+                continue
+            if kind is float:
+                return number
+            if number.is_integer():
+                return int(number)
+        if kind is str and isinstance(value, str):
+            return value
+    return _INVALID
+
+
+def _decode_llm_json(raw: str, schema: dict) -> dict | None:
+    """
+    Decodes an LLM reply into a dict that satisfies `schema`, or returns None.
+    Finds the first balanced JSON object, so fences and surrounding prose are
+    ignored, and repairs common formatting quirks before giving up.
+    Schema values are a type, a tuple of accepted types, or a list of allowed
+    literals (matched case-insensitively and returned in canonical form).
+    """
+    text = _first_object(raw) if isinstance(raw, str) else None
+    if text is None:
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        try:
+            data = json.loads(_JSON_REPAIR.sub(_repair_token, text))
+        except ValueError:
+            return None
+    if not isinstance(data, dict):
+        return None
+    for field, spec in schema.items():
+        value = _coerce(data[field], spec) if field in data else _INVALID
+        if value is _INVALID:
+            return None
+        data[field] = value
+    return data
+
+
+def _field_number(payload: str, field: str) -> float | None:
+    parsed = _decode_llm_json(payload, {field: float})
+    return None if parsed is None else parsed[field]
+
+
+def _tolerance_eq(fn: typing.Callable[[], str], field: str,
+                  abs_tol: float = 0.0, rel_tol: float = 0.0) -> str:
+    """
+    Numeric-tolerance consensus over a JSON-returning nondet function.
+    Each validator re-runs fn and accepts the leader's output when the numeric
+    `field` differs by at most abs_tol, or by at most rel_tol of the larger
+    magnitude. The check is arithmetic, so no LLM judge call is made.
+    """
+    def validator_fn(leader_result) -> bool:
+        if not isinstance(leader_result, gl.vm.Return):
+            return False
+        leader_val = _field_number(leader_result.calldata, field)
+        own_val = _field_number(fn(), field)
+        if leader_val is None or own_val is None:
+            # Both sides undecodable is agreement; the caller records the failure
+            return leader_val is None and own_val is None
+        diff = abs(leader_val - own_val)
+        return diff <= abs_tol or diff <= rel_tol * max(abs(leader_val), abs(own_val))
+
+    return gl.vm.run_nondet(fn, validator_fn)
+
+
+def _content_key(*parts: str) -> str:
+    """
+    Fixed-size storage key for unbounded user text: the SHA-256 hex digest of
+    the NFC-normalized, whitespace-collapsed parts joined by a unit separator.
+    """
+    normalized = "\x1f".join(" ".join(unicodedata.normalize("NFC", p).split()) for p in parts)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+# Page size caps for list_entries / export_entries. Each page re-walks the
+# keys before its cursor (see _page), so mirrors should sync through
+# export_entries, whose larger pages keep a full pass to N / EXPORT_LIMIT walks.
+LIST_LIMIT = 200
+EXPORT_LIMIT = 1000
+
+
+def _page(entries: TreeMap, start_after: str, limit: int, cap: int,
+          convert: typing.Callable | None = None) -> tuple[list, str]:
+    """
+    Up to `limit` (key, value) pairs with keys strictly after `start_after`,
+    in key order, and the cursor for the next page ("" after the last one).
+    TreeMap iterates from its first key and cannot seek, so every page walks
+    the keys before its cursor: O(position + limit) key reads per page and
+    O(N^2 / limit) for a full pass. Only the returned entries' values are read.
+    """
+    limit = max(1, min(limit, cap))
+    page = []
+    for key in entries:
+        if start_after and key <= start_after:
+            continue
+        if len(page) == limit:
+            return page, page[-1][0]
+        value = entries[key]
+        page.append([key, convert(value) if convert else value])
+    return page, ""
+
+
+def _list_view(entries: TreeMap, start_after: str, limit: int,
+               convert: typing.Callable | None = None) -> dict[str, typing.Any]:
+    page, cursor = _page(entries, start_after, limit, LIST_LIMIT, convert)
+    return {"entries": page, "next": cursor}
+
+
+def _export_view(entries: TreeMap, start_after: str, limit: int,
+                 convert: typing.Callable | None = None) -> str:
+    # Columnar, whitespace-free JSON: {"k": [...], "v": [...], "n": cursor}
+    page, cursor = _page(entries, start_after, limit, EXPORT_LIMIT, convert)
+    payload = {"k": [k for k, _ in page], "v": [v for _, v in page], "n": cursor}
+    return json.dumps(payload, separators=(",", ":"))
+
+
+def _decode_llm_list(raw: str, field: str, count: int, spec) -> list | None:
+    """
+    Decodes a batched reply whose `field` is a list with one entry per item,
+    in submission order. Each entry must satisfy `spec` (see _decode_llm_json).
+    """
+    parsed = _decode_llm_json(raw, {})
+    if parsed is None or not isinstance(parsed.get(field), list) or len(parsed[field]) != count:
+        return None
+    values = [_coerce(value, spec) for value in parsed[field]]
+    if any(value is _INVALID for value in values):
+        return None
+    return values
+
+
+def _batch_tolerance_eq(fn: typing.Callable[[], str], field: str, count: int,
+                        abs_tol: float = 0.0, rel_tol: float = 0.0) -> str:
+    """
+    _tolerance_eq for batched replies: `field` holds one number (or null) per
+    item, and every position must agree within tolerance.
+    """
+    spec = (float, type(None))
+
+    def validator_fn(leader_result) -> bool:
+        if not isinstance(leader_result, gl.vm.Return):
+            return False
+        leader_vals = _decode_llm_list(leader_result.calldata, field, count, spec)
+        own_vals = _decode_llm_list(fn(), field, count, spec)
+        if leader_vals is None or own_vals is None:
+            return leader_vals is None and own_vals is None
+        for leader_val, own_val in zip(leader_vals, own_vals):
+            if leader_val is None or own_val is None:
+                if leader_val is not own_val:
+                    return False
+                continue
+            diff = abs(leader_val - own_val)
+            if diff > abs_tol and diff > rel_tol * max(abs(leader_val), abs(own_val)):
+                return False
+        return True
+
+    return gl.vm.run_nondet(fn, validator_fn)
+
+
+# Most queued items packed into one process_queue prompt
+BATCH_LIMIT = 20
+# Consecutive failed batches before the item at the head of the queue is
+# dead-lettered. Each failure halves the next batch, so an item the model
+# cannot answer for is alone after a few and then gets the rest to itself.
+BATCH_MAX_FAILURES = 7
+
 
 class MoneyCleaner(gl.Contract):
     """
@@ -11,12 +255,28 @@ class MoneyCleaner(gl.Contract):
     Uses fuzzy consensus (±5%) to handle exchange rate fluctuations.
     """
     
-    # Stores: Raw String -> USD Cents
+    # Stores: Raw String Content Key -> USD Cents
     # Example: "£50" -> 6350 (represents $63.50)
     prices_map: TreeMap[str, u256]
 
-    def __init__(self):
-        pass
+    # Content key -> original input, kept only when deployed with keep_originals
+    originals: TreeMap[str, str]
+    keep_originals: bool
+
+    # Pending submissions live in queue[queue_head:queue_tail]; the live part is
+    # moved to the front once head passes half the array, so slots are reused
+    queue: DynArray[str]
+    queue_head: u256
+    queue_tail: u256
+    # Consecutive failed batches, and the items given up on (see BATCH_MAX_FAILURES)
+    queue_failures: u256
+    dead_letters: DynArray[str]
+
+    # Hot-path counters: "<method>.<counter>" -> total (see get_stats)
+    stats: TreeMap[str, u256]
+
+    def __init__(self, keep_originals: bool = False):
+        self.keep_originals = keep_originals
 
     @gl.public.write
     def normalize_to_usd(self, raw_price_string: str) -> None:
@@ -24,6 +284,8 @@ class MoneyCleaner(gl.Contract):
         Converts a price string to USD cents using LLM knowledge.
         Returns NONE to avoid simulator serialization crashes.
         """
+        key = _content_key(raw_price_string)
+        refresh = key in self.prices_map
         
         def convert_nondet() -> str:
             # Task: Convert and output JSON
@@ -43,56 +305,247 @@ class MoneyCleaner(gl.Contract):
             """
 
             result_raw = gl.nondet.exec_prompt(task)
-            
-            # Clean and return the JSON string for the comparator
-            try:
-                cleaned = result_raw.replace("```json", "").replace("```", "").strip()
-                # fast validation
-                parsed = json.loads(cleaned)
-                if "cents" not in parsed: 
-                    return json.dumps({"cents": 0})
-                return cleaned
-            except:
-                return json.dumps({"cents": 0})
-
-        # Consensus: Comparative (±5% Tolerance)
-        # We instruct the consensus engine to accept values if they are close.
-        comparison_criteria = """
-        Compare the 'cents' integers from the two JSON inputs.
-        
-        Logic:
-        1. Parse the integers val_a and val_b.
-        2. If both are 0, they are EQUAL.
-        3. Calculate the percentage difference: abs(val_a - val_b) / max(val_a, val_b).
-        4. If the difference is less than or equal to 0.05 (5%), they are EQUAL.
-        5. Otherwise, they are DIFFERENT.
-        """
 
+            # Canonical JSON for the comparator; undecodable replies are flagged, not zeroed
+            parsed = _decode_llm_json(result_raw, {"cents": int})
+            if parsed is None:
+                return json.dumps({"error": "decode_failed"})
+            return json.dumps(parsed)
+
+        # Consensus: Numeric Tolerance (±5%)
+        # Validators accept the leader's 'cents' if within 5% of their own.
         # Result is the JSON from the leader node
-        consensus_json = gl.eq_principle.prompt_comparative(
-            convert_nondet, 
-            comparison_criteria
-        )
+        consensus_json = _tolerance_eq(convert_nondet, "cents", rel_tol=0.05)
 
-        # Parse and Store
-        try:
-            parsed = json.loads(consensus_json)
-            cents_val = int(parsed.get("cents", 0))
-            
-            # Store as u256
-            self.prices_map[raw_price_string] = u256(cents_val)
-        except Exception as e:
-            print(f"Storage Error: {e}")
-            self.prices_map[raw_price_string] = u256(0)
+        # Parse and Store (a negative amount is as unusable as an undecodable one)
+        parsed = _decode_llm_json(consensus_json, {"cents": int})
+        decoded = parsed is not None and parsed["cents"] >= 0
+        if decoded:
+            self.prices_map[key] = u256(parsed["cents"])
+            if self.keep_originals:
+                self.originals[key] = raw_price_string
+
+        self._record(
+            "normalize_to_usd",
+            calls=1,
+            consensus_rounds=1,
+            llm_prompts=1,
+            input_bytes=len(raw_price_string.encode("utf-8")),
+            refreshes=int(decoded and refresh),
+            fallbacks=int(decoded and parsed["cents"] == 0),
+            decode_failures=int(not decoded),
+        )
         
         return None
 
+    @gl.public.write
+    def submit(self, raw_price_string: str) -> None:
+        """
+        Queues a price string for the next process_queue batch.
+        Deterministic: no prompt and no consensus round. Cached inputs are skipped.
+        """
+        if _content_key(raw_price_string) in self.prices_map:
+            self._record("submit", calls=1, cache_hits=1)
+            return None
+        self._enqueue(raw_price_string)
+        self._record("submit", calls=1, input_bytes=len(raw_price_string.encode("utf-8")))
+        return None
+
+    @gl.public.write
+    def process_queue(self, max_items: int = BATCH_LIMIT) -> None:
+        """
+        Converts up to max_items queued price strings with one combined prompt
+        and a single tolerance consensus (±5% per item), storing each result as
+        normalize_to_usd does. An undecodable batch, or one the validators
+        disagree on, stays queued and the next one is halved (see
+        BATCH_MAX_FAILURES).
+        """
+        batch = self._pending(max_items)
+        if not batch:
+            return None
+
+        # Duplicates and prices converted since submission need no prompt
+        todo = []
+        for raw in batch:
+            if _content_key(raw) not in self.prices_map and raw not in todo:
+                todo.append(raw)
+
+        amounts = []
+        if todo:
+            def convert_batch_nondet() -> str:
+                task = f"""
+                Act as a Currency Converter.
+                Input Prices (JSON list): {json.dumps(todo, ensure_ascii=False)}
+
+                Instructions:
+                1. For each price, identify the amount and currency symbol (e.g. £, EUR, ¥).
+                2. Convert the amount to USD using approximate current market rates.
+                3. Convert the final USD amount into CENTS (integer).
+                   Example: $50.00 -> 5000.
+                4. Use null for an input that is invalid.
+                5. Keep the list order: one entry per input price.
+
+                Respond using ONLY JSON:
+                {{ "cents": [int | null, ...] }}
+                """
+
+                result_raw = gl.nondet.exec_prompt(task)
+
+                values = _decode_llm_list(result_raw, "cents", len(todo), (int, type(None)))
+                if values is None:
+                    return json.dumps({"error": "decode_failed"})
+                return json.dumps({"cents": values})
+
+            # Consensus: Numeric Tolerance (±5%) at every position
+            # Validators that disagree on any one price fail the round for the
+            # whole batch. That is recorded as a failed batch rather than
+            # raised, so later batches are halved until the disputed price is
+            # alone and dead-lettered, and the rest of the queue drains.
+            try:
+                consensus_json = _batch_tolerance_eq(convert_batch_nondet, "cents", len(todo), rel_tol=0.05)
+            except Exception as e:
+                print(f"Batch consensus failed: {e}")
+                consensus_json = json.dumps({"error": "no_consensus"})
+            amounts = _decode_llm_list(consensus_json, "cents", len(todo), (int, type(None)))
+            if amounts is None:
+                disputed = consensus_json == json.dumps({"error": "no_consensus"})
+                self._record("process_queue", calls=1, consensus_rounds=1, llm_prompts=1,
+                             decode_failures=int(not disputed), consensus_failures=int(disputed),
+                             dead_letters=self._batch_failed(batch))
+                return None
+
+        # Fan the batch back into the price map; invalid inputs are dropped
+        for raw, cents in zip(todo, amounts):
+            if cents is None or cents < 0:
+                continue
+            key = _content_key(raw)
+            self.prices_map[key] = u256(cents)
+            if self.keep_originals:
+                self.originals[key] = raw
+        self._dequeue(len(batch))
+
+        self._record(
+            "process_queue",
+            calls=1,
+            consensus_rounds=int(bool(todo)),
+            llm_prompts=int(bool(todo)),
+            batch_items=len(todo),
+            input_bytes=sum(len(raw.encode("utf-8")) for raw in todo),
+            cache_hits=len(batch) - len(todo),
+            fallbacks=sum(1 for cents in amounts if cents is None or cents <= 0),
+        )
+        return None
+
     @gl.public.view
     def get_usd_cents(self, raw_price_string: str) -> int:
         """
         Returns the normalized value in USD Cents.
         Example: 6350 = $63.50
         """
-        if raw_price_string in self.prices_map:
-            return int(self.prices_map[raw_price_string])
+        key = _content_key(raw_price_string)
+        if key in self.prices_map:
+            return int(self.prices_map[key])
         return 0
+
+    @gl.public.view
+    def get_original(self, key: str) -> str:
+        """
+        Returns the input stored under a content key, or "" if originals are not kept.
+        """
+        if key in self.originals:
+            return self.originals[key]
+        return ""
+
+    @gl.public.view
+    def list_entries(self, start_after: str = "", limit: int = 50) -> dict[str, typing.Any]:
+        """
+        Pages through USD cent amounts in key order: {"entries": [[key, value], ...], "next": cursor}.
+        Pass "next" back as start_after; it is "" after the last page.
+        """
+        return _list_view(self.prices_map, start_after, limit, int)
+
+    @gl.public.view
+    def export_entries(self, start_after: str = "", limit: int = EXPORT_LIMIT) -> str:
+        """
+        Same pages as list_entries, as compact columnar JSON for bulk mirroring.
+        """
+        return _export_view(self.prices_map, start_after, limit, int)
+
+    @gl.public.view
+    def list_originals(self, start_after: str = "", limit: int = 50) -> dict[str, typing.Any]:
+        """
+        Pages through the retained original inputs, keyed like list_entries.
+        """
+        return _list_view(self.originals, start_after, limit)
+
+    @gl.public.view
+    def get_queue_length(self) -> int:
+        return int(self.queue_tail) - int(self.queue_head)
+
+    @gl.public.view
+    def get_dead_letters(self, start: int = 0, limit: int = 50) -> list[str]:
+        """
+        Queued inputs dropped after BATCH_MAX_FAILURES failed batches, oldest
+        first. Submit one again to retry it.
+        """
+        start = max(0, start)
+        end = min(start + max(1, min(limit, LIST_LIMIT)), len(self.dead_letters))
+        return [self.dead_letters[i] for i in range(start, end)]
+
+    def _enqueue(self, item: str) -> None:
+        tail = int(self.queue_tail)
+        if tail < len(self.queue):
+            self.queue[tail] = item
+        else:
+            self.queue.append(item)
+        self.queue_tail = u256(tail + 1)
+
+    def _pending(self, max_items: int) -> list[str]:
+        head = int(self.queue_head)
+        size = max(1, BATCH_LIMIT >> int(self.queue_failures))
+        count = max(0, min(max_items, size, int(self.queue_tail) - head))
+        return [self.queue[i] for i in range(head, head + count)]
+
+    def _dequeue(self, count: int) -> None:
+        # Progress doubles the batch size back, one step per processed batch
+        if self.queue_failures:
+            self.queue_failures = u256(int(self.queue_failures) - 1)
+        head, tail = int(self.queue_head) + count, int(self.queue_tail)
+        if head >= tail:
+            # Drained: rewind so later submissions overwrite the same slots
+            head = tail = 0
+        elif head * 2 >= len(self.queue):
+            # Compact: each move is paid for by a dequeue since the last one,
+            # and the array stays within twice the longest queue
+            for i in range(head, tail):
+                self.queue[i - head] = self.queue[i]
+            head, tail = 0, tail - head
+        self.queue_head = u256(head)
+        self.queue_tail = u256(tail)
+
+    def _batch_failed(self, batch: list[str]) -> int:
+        # Counts a batch that left the queue untouched; returns 1 when its lone
+        # item has now failed too often and was dead-lettered instead
+        failures = int(self.queue_failures) + 1
+        if len(batch) > 1 or failures < BATCH_MAX_FAILURES:
+            self.queue_failures = u256(failures)
+            return 0
+        self.dead_letters.append(batch[0])
+        self.queue_failures = u256(0)
+        self._dequeue(1)
+        return 1
+
+    def _record(self, method: str, **counters: int) -> None:
+        # Adds to the "<method>.<counter>" totals read by get_stats
+        for name, amount in counters.items():
+            if amount:
+                key = f"{method}.{name}"
+                current = int(self.stats[key]) if key in self.stats else 0
+                self.stats[key] = u256(current + amount)
+
+    @gl.public.view
+    def get_stats(self) -> dict[str, int]:
+        """
+        Returns hot-path counters keyed "<method>.<counter>".
+        """
+        return {key: int(count) for key, count in self.stats.items()}
@@ -2,7 +2,294 @@
 # { "Depends": "py-genlayer:latest" }
 
 from genlayer import *
+import collections
+import hashlib
 import json
+import math
+import re
+import typing
+import unicodedata
+
+
+# Repairs applied outside string literals when a reply is not strict JSON:
+# single-quoted strings, Python True/False/None, trailing commas, // comments.
+_JSON_REPAIR = re.compile(
+    r'("(?:[^"\\]|\\.)*")'
+    r"|'((?:[^'\\]|\\.)*)'"
+    r"|\b(True|False|None)\b"
+    r"|,(\s*[}\]])"
+    r"|\s//[^\n]*"
+)
+_INVALID = object()
+
+
+def _repair_token(match: re.Match) -> str:
+    quoted, single, literal, closer = match.groups()
+    if quoted:
+        return quoted
+    if single is not None:
+        return json.dumps(single.replace("\\'", "'"))
+    if literal:
+        return {"True": "true", "False": "false", "None": "null"}[literal]
+    if closer is not None:
+        return closer
+    return ""
+
+
+def _first_object(raw: str) -> str | None:
+    # First balanced {...}, ignoring braces inside quoted strings
+    start = raw.find("{")
+    while start != -1:
+        depth, quote, escaped = 0, "", False
+        for i in range(start, len(raw)):
+            ch = raw[i]
+            if quote:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == quote:
+                    quote = ""
+            elif ch in "\"'":
+                quote = ch
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return raw[start:i + 1]
+        start = raw.find("{", start + 1)
+    return None
+
+
+def _coerce(value, spec):
+    if isinstance(spec, list):
+        for option in spec:
+            if str(value).strip().lower() == str(option).lower():
+                return option
+        return _INVALID
+    for kind in spec if isinstance(spec, tuple) else (spec,):
+        if kind is type(None) and value is None:
+            return None
+        if kind is bool:
+            if isinstance(value, bool):
+                return value
+            if str(value).strip().lower() in ("true", "false"):
+                return str(value).strip().lower() == "true"
+        if kind in (int, float) and value is not None and not isinstance(value, bool):
+            if kind is int and isinstance(value, int):
+                return value
+            try:
+                number = float(str(value).strip().replace(",", ""))
+            except ValueError:
+                continue
+            if not math.isfinite(number):
+                continue
+            if kind is float:
+                return number
+            if number.is_integer():
+                return int(number)
+        if kind is str and isinstance(value, str):
+            return value
+    return _INVALID
+
+
+def _decode_llm_json(raw: str, schema: dict) -> dict | None:
+    """
+    Decodes an LLM reply into a dict that satisfies `schema`, or returns None.
+    Finds the first balanced JSON object, so fences and surrounding prose are
+    ignored, and repairs common formatting quirks before giving up.
+    Schema values are a type, a tuple of accepted types, or a list of allowed
+    literals (matched case-insensitively and returned in canonical form).
+    """
+    text = _first_object(raw) if isinstance(raw, str) else None
+    if text is None:
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        try:
+            data = json.loads(_JSON_REPAIR.sub(_repair_token, text))
+        except ValueError:
+            return None
+    if not isinstance(data, dict):
+        return None
+    for field, spec in schema.items():
+        value = _coerce(data[field], spec) if field in data else _INVALID
+        if value is _INVALID:
+            return None
+        data[field] = value
+    return data
+
+
+def _content_key(*parts: str) -> str:
+    """
+    Fixed-size storage key for unbounded user text: the SHA-256 hex digest of
+    the NFC-normalized, whitespace-collapsed parts joined by a unit separator.
+    """
+    normalized = "\x1f".join(" ".join(unicodedata.normalize("NFC", p).split()) for p in parts)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+# Deterministic prefilter for semantic consensus, in thousandths: a pair whose
+# chrF and token-overlap scores both reach the high threshold is accepted, and
+# one where both fall below the low threshold is rejected, without a judge
+# prompt; only the band between reaches the LLM comparator
+SIMILARITY_HIGH = 900
+SIMILARITY_LOW = 200
+_CHRF_ORDER = 6
+# Terms a fast accept requires to match exactly: one changed digit or a
+# dropped "not" flips the meaning while barely moving the similarity
+_NUMBER = re.compile(r"[$€£¥]?\d+(?:[.,]\d+)*%?")
+_NEGATION = re.compile(
+    r"\b(?:no|not|never|none|nor|neither|nothing|nobody|nowhere|without|cannot)\b|n['’]t\b",
+    re.IGNORECASE,
+)
+
+
+def _char_ngrams(text: str, n: int) -> collections.Counter:
+    return collections.Counter(text[i:i + n] for i in range(len(text) - n + 1))
+
+
+def _f1(overlap: int, size_a: int, size_b: int) -> float:
+    return 2 * overlap / (size_a + size_b) if size_a + size_b else 1.0
+
+
+def _similarity(a: str, b: str) -> tuple[float, float]:
+    """
+    (chrF, token overlap) of two texts, each in [0, 1] and symmetric: the
+    character n-gram F-score (beta 1, n = 1..6, whitespace ignored) and the
+    F1 of their word multisets, both case-folded.
+    """
+    a = unicodedata.normalize("NFC", a).casefold()
+    b = unicodedata.normalize("NFC", b).casefold()
+    chars_a, chars_b = "".join(a.split()), "".join(b.split())
+    scores = []
+    for n in range(1, _CHRF_ORDER + 1):
+        grams_a, grams_b = _char_ngrams(chars_a, n), _char_ngrams(chars_b, n)
+        if grams_a and grams_b:
+            overlap = sum((grams_a & grams_b).values())
+            scores.append(_f1(overlap, sum(grams_a.values()), sum(grams_b.values())))
+    chrf = sum(scores) / len(scores) if scores else float(chars_a == chars_b)
+    words_a, words_b = collections.Counter(re.findall(r"\w+", a)), collections.Counter(re.findall(r"\w+", b))
+    tokens = _f1(sum((words_a & words_b).values()), sum(words_a.values()), sum(words_b.values()))
+    return chrf, tokens
+
+
+def _pinned_terms(text: str) -> list[str]:
+    # Numbers, amounts and negation words, as a sorted multiset
+    negations = [m.lower().replace("’", "'") for m in _NEGATION.findall(text)]
+    return sorted(_NUMBER.findall(text) + negations)
+
+
+def _similarity_verdict(a: list[str], b: list[str], high: float, low: float) -> bool | None:
+    # True/False when every pair is clearly alike or some pair clearly is not; None otherwise.
+    # Alike needs the same numbers, amounts and negations too ("$50" vs "$500").
+    if len(a) != len(b):
+        return False
+    pairs = [_similarity(x, y) for x, y in zip(a, b)]
+    if any(max(pair) < low for pair in pairs):
+        return False
+    if all(min(pair) >= high for pair in pairs) and all(
+            _pinned_terms(x) == _pinned_terms(y) for x, y in zip(a, b)):
+        return True
+    return None
+
+
+def _similarity_eq(fn: typing.Callable[[], str], field: str, principle: str,
+                   high: int = SIMILARITY_HIGH, low: int = SIMILARITY_LOW) -> str:
+    """
+    Semantic consensus over a JSON-returning nondet function whose `field` is
+    a string or a list of strings. Each validator re-runs fn and settles
+    clearly similar or dissimilar outputs itself (see _similarity_verdict,
+    thresholds in thousandths); only ambiguous pairs go to an LLM judge with
+    `principle`.
+    """
+    def values(payload: str) -> list[str] | None:
+        try:
+            value = json.loads(payload).get(field)
+        except (ValueError, AttributeError):
+            return None
+        if isinstance(value, str):
+            return [value]
+        if isinstance(value, list) and all(isinstance(v, str) for v in value):
+            return value
+        return None
+
+    def validator_fn(leader_result) -> bool:
+        if not isinstance(leader_result, gl.vm.Return):
+            return False
+        own_output = fn()
+        leader_values, own_values = values(leader_result.calldata), values(own_output)
+        if leader_values is None or own_values is None:
+            # Both sides undecodable is agreement; the caller records the failure
+            return leader_values is None and own_values is None
+        verdict = _similarity_verdict(leader_values, own_values, high / 1000, low / 1000)
+        if verdict is not None:
+            return verdict
+
+        # Ambiguous band: ask the LLM judge
+        task = f"""
+        Given the equivalence principle, decide whether the two outputs are equivalent.
+
+        Equivalence principle:
+        {principle}
+
+        Output A:
+        {leader_result.calldata}
+
+        Output B:
+        {own_output}
+
+        Respond using ONLY JSON: {{ "equivalent": true | false }}
+        """
+        parsed = _decode_llm_json(gl.nondet.exec_prompt(task), {"equivalent": bool})
+        return parsed is not None and parsed["equivalent"]
+
+    return gl.vm.run_nondet(fn, validator_fn)
+
+
+# Page size caps for list_entries / export_entries. Each page re-walks the
+# keys before its cursor (see _page), so mirrors should sync through
+# export_entries, whose larger pages keep a full pass to N / EXPORT_LIMIT walks.
+LIST_LIMIT = 200
+EXPORT_LIMIT = 1000
+
+
+def _page(entries: TreeMap, start_after: str, limit: int, cap: int,
+          convert: typing.Callable | None = None) -> tuple[list, str]:
+    """
+    Up to `limit` (key, value) pairs with keys strictly after `start_after`,
+    in key order, and the cursor for the next page ("" after the last one).
+    TreeMap iterates from its first key and cannot seek, so every page walks
+    the keys before its cursor: O(position + limit) key reads per page and
+    O(N^2 / limit) for a full pass. Only the returned entries' values are read.
+    """
+    limit = max(1, min(limit, cap))
+    page = []
+    for key in entries:
+        if start_after and key <= start_after:
+            continue
+        if len(page) == limit:
+            return page, page[-1][0]
+        value = entries[key]
+        page.append([key, convert(value) if convert else value])
+    return page, ""
+
+
+def _list_view(entries: TreeMap, start_after: str, limit: int,
+               convert: typing.Callable | None = None) -> dict[str, typing.Any]:
+    page, cursor = _page(entries, start_after, limit, LIST_LIMIT, convert)
+    return {"entries": page, "next": cursor}
+
+
+def _export_view(entries: TreeMap, start_after: str, limit: int,
+                 convert: typing.Callable | None = None) -> str:
+    # Columnar, whitespace-free JSON: {"k": [...], "v": [...], "n": cursor}
+    page, cursor = _page(entries, start_after, limit, EXPORT_LIMIT, convert)
+    payload = {"k": [k for k, _ in page], "v": [v for _, v in page], "n": cursor}
+    return json.dumps(payload, separators=(",", ":"))
+
 
 class RuleExplain(gl.Contract):
     """
@@ -11,11 +298,30 @@ class RuleExplain(gl.Contract):
     ignoring differences in phrasing.
     """
     
-    # Storage: "First 60 chars of clause" -> "Simplified Explanation"
+    # Storage: Clause Content Key -> "Simplified Explanation"
     simplifications: TreeMap[str, str]
 
-    def __init__(self):
+    # Content key -> original input, kept only when deployed with keep_originals
+    originals: TreeMap[str, str]
+    keep_originals: bool
+
+    # Similarity prefilter thresholds for semantic consensus, in thousandths
+    similarity_high: u256
+    similarity_low: u256
+
+    # Hot-path counters: "<method>.<counter>" -> total (see get_stats)
+    stats: TreeMap[str, u256]
+
+    def __init__(self, keep_originals: bool = False,
+                 similarity_high: int = SIMILARITY_HIGH, similarity_low: int = SIMILARITY_LOW):
+        if not 0 <= similarity_low <= similarity_high <= 1000:
+            raise gl.vm.UserError("similarity thresholds must satisfy 0 <= low <= high <= 1000")
+        self.similarity_high = u256(similarity_high)
+        self.similarity_low = u256(similarity_low)
         self.simplifications = TreeMap()
+        self.stats = TreeMap()
+        self.originals = TreeMap()
+        self.keep_originals = keep_originals
 
     @gl.public.write
     def explain_clause(self, legal_text: str) -> None:
@@ -26,9 +332,10 @@ class RuleExplain(gl.Contract):
         if not hasattr(self, 'simplifications'):
             self.simplifications = TreeMap()
 
-        # Create a lookup key (first 60 chars)
-        # In a real app, you might use a hash, but this is readable for testing.
-        key = legal_text[:60].strip()
+        # Lookup key: digest of the whole clause, so clauses sharing a
+        # preamble no longer collide
+        key = _content_key(legal_text)
+        refresh = key in self.simplifications
 
         def simplify_nondet() -> str:
             task = f"""
@@ -49,15 +356,15 @@ class RuleExplain(gl.Contract):
             """
 
             result_raw = gl.nondet.exec_prompt(task)
-            try:
-                cleaned = result_raw.replace("```json", "").replace("```", "").strip()
-                return cleaned
-            except:
-                return json.dumps({"explanation": "Error processing text"})
+            parsed = _decode_llm_json(result_raw, {"explanation": str})
+            if parsed is None:
+                return json.dumps({"error": "decode_failed"})
+            return json.dumps(parsed)
 
         # Consensus: Semantic Similarity
         # We cannot use string equality because "Pay $50" != "$50 fee", 
-        # but they mean the same thing.
+        # but they mean the same thing. Near-identical and clearly different
+        # explanations are still settled before the judge.
         comparison_criteria = """
         Compare the 'explanation' fields.
         
@@ -69,28 +376,84 @@ class RuleExplain(gl.Contract):
         5. If they describe different rules, return DIFFERENT.
         """
 
-        consensus_json = gl.eq_principle.prompt_comparative(
-            simplify_nondet, 
-            comparison_criteria
+        consensus_json = _similarity_eq(
+            simplify_nondet, "explanation", comparison_criteria,
+            int(self.similarity_high), int(self.similarity_low),
         )
 
-        try:
-            parsed = json.loads(consensus_json)
-            explanation = parsed.get("explanation", "Consensus Failed")
-            
-            self.simplifications[key] = explanation
-            print(f"Stored explanation for '{key}...'")
-        except Exception as e:
-            print(f"Update failed: {e}")
+        parsed = _decode_llm_json(consensus_json, {"explanation": str})
+        if parsed is not None:
+            self.simplifications[key] = parsed["explanation"]
+            if self.keep_originals:
+                self.originals[key] = legal_text
+            print(f"Stored explanation for '{key}'")
+        else:
+            print("Update failed: undecodable explanation")
+
+        self._record(
+            "explain_clause",
+            calls=1,
+            consensus_rounds=1,
+            llm_prompts=1,
+            input_bytes=len(legal_text.encode("utf-8")),
+            refreshes=int(parsed is not None and refresh),
+            decode_failures=int(parsed is None),
+        )
         
         return None
 
     @gl.public.view
     def get_explanation(self, text_snippet: str) -> str:
         """
-        Retrieve the explanation using the start of the original text.
+        Retrieve the explanation using the full original text.
         """
-        key = text_snippet[:60].strip()
+        key = _content_key(text_snippet)
         if self.simplifications is not None and key in self.simplifications:
             return self.simplifications[key]
         return "Explanation not found"
+
+    @gl.public.view
+    def get_original(self, key: str) -> str:
+        """
+        Returns the input stored under a content key, or "" if originals are not kept.
+        """
+        if key in self.originals:
+            return self.originals[key]
+        return ""
+
+    @gl.public.view
+    def list_entries(self, start_after: str = "", limit: int = 50) -> dict[str, typing.Any]:
+        """
+        Pages through stored explanations in key order: {"entries": [[key, value], ...], "next": cursor}.
+        Pass "next" back as start_after; it is "" after the last page.
+        """
+        return _list_view(self.simplifications, start_after, limit)
+
+    @gl.public.view
+    def export_entries(self, start_after: str = "", limit: int = EXPORT_LIMIT) -> str:
+        """
+        Same pages as list_entries, as compact columnar JSON for bulk mirroring.
+        """
+        return _export_view(self.simplifications, start_after, limit)
+
+    @gl.public.view
+    def list_originals(self, start_after: str = "", limit: int = 50) -> dict[str, typing.Any]:
+        """
+        Pages through the retained original inputs, keyed like list_entries.
+        """
+        return _list_view(self.originals, start_after, limit)
+
+    def _record(self, method: str, **counters: int) -> None:
+        # Adds to the "<method>.<counter>" totals read by get_stats
+        for name, amount in counters.items():
+            if amount:
+                key = f"{method}.{name}"
+                current = int(self.stats[key]) if key in self.stats else 0
+                self.stats[key] = u256(current + amount)
+
+    @gl.public.view
+    def get_stats(self) -> dict[str, int]:
+        """
+        Returns hot-path counters keyed "<method>.<counter>".
+        """
+        return {key: int(count) for key, count in self.stats.items()}
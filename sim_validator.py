@@ -2,8 +2,178 @@
 # { "Depends": "py-genlayer:latest" }
 
 from genlayer import *
+import hashlib
 import json
+import math
+import re
 import typing
+import unicodedata
+
+
+# Repairs applied outside string literals when a reply is not strict JSON:
+# single-quoted strings, Python True/False/None, trailing commas, // comments.
+_JSON_REPAIR = re.compile(
+    r'("(?:[^"\\]|\\.)*")'
+    r"|'((?:[^'\\]|\\.)*)'"
+    r"|\b(True|False|None)\b"
+    r"|,(\s*[}\]])"
+    r"|\s//[^\n]*"
+)
+_INVALID = object()
+
+
+def _repair_token(match: re.Match) -> str:
+    quoted, single, literal, closer = match.groups()
+    if quoted:
+        return quoted
+    if single is not None:
+        return json.dumps(single.replace("\\'", "'"))
+    if literal:
+        return {"True": "true", "False": "false", "None": "null"}[literal]
+    if closer is not None:
+        return closer
+    return ""
+
+
+def _first_object(raw: str) -> str | None:
+    # First balanced {...}, ignoring braces inside quoted strings
+    start = raw.find("{")
+    while start != -1:
+        depth, quote, escaped = 0, "", False
+        for i in range(start, len(raw)):
+            ch = raw[i]
+            if quote:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == quote:
+                    quote = ""
+            elif ch in "\"'":
+                quote = ch
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return raw[start:i + 1]
+        start = raw.find("{", start + 1)
+    return None
+
+
+def _coerce(value, spec):
+    if isinstance(spec, list):
+        for option in spec:
+            if str(value).strip().lower() == str(option).lower():
+                return option
+        return _INVALID
+    for kind in spec if isinstance(spec, tuple) else (spec,):
+        if kind is type(None) and value is None:
+            return None
+        if kind is bool:
+            if isinstance(value, bool):
+                return value
+            if str(value).strip().lower() in ("true", "false"):
+                return str(value).strip().lower() == "true"
+        if kind in (int, float) and value is not None and not isinstance(value, bool):
+            if kind is int and isinstance(value, int):
+                return value
+            try:
+                number = float(str(value).strip().replace(",", ""))
+            except ValueError:
+                continue
+            if not math.isfinite(number):
+                continue
+            if kind is float:
+                return number
+            if number.is_integer():
+                return int(number)
+        if kind is str and isinstance(value, str):
+            return value
+    return _INVALID
+
+
+def _decode_llm_json(raw: str, schema: dict) -> dict | None:
+    """
+    Decodes an LLM reply into a dict that satisfies `schema`, or returns None.
+    Finds the first balanced JSON object, so fences and surrounding prose are
+    ignored, and repairs common formatting quirks before giving up.
+    Schema values are a type, a tuple of accepted types, or a list of allowed
+    literals (matched case-insensitively and returned in canonical form).
+    """
+    text = _first_object(raw) if isinstance(raw, str) else None
+    if text is None:
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        try:
+            data = json.loads(_JSON_REPAIR.sub(_repair_token, text))
+        except ValueError:
+            return None
+    if not isinstance(data, dict):
+        return None
+    for field, spec in schema.items():
+        value = _coerce(data[field], spec) if field in data else _INVALID
+        if value is _INVALID:
+            return None
+        data[field] = value
+    return data
+
+
+VOTE_SCHEMA = {"vote": ["Approve", "Reject"], "reason": str}
+
+
+def _content_key(*parts: str) -> str:
+    """
+    Fixed-size storage key for unbounded user text: the SHA-256 hex digest of
+    the NFC-normalized, whitespace-collapsed parts joined by a unit separator.
+    """
+    normalized = "\x1f".join(" ".join(unicodedata.normalize("NFC", p).split()) for p in parts)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+# Page size caps for list_entries / export_entries. Each page re-walks the
+# keys before its cursor (see _page), so mirrors should sync through
+# export_entries, whose larger pages keep a full pass to N / EXPORT_LIMIT walks.
+LIST_LIMIT = 200
+EXPORT_LIMIT = 1000
+
+
+def _page(entries: TreeMap, start_after: str, limit: int, cap: int,
+          convert: typing.Callable | None = None) -> tuple[list, str]:
+    """
+    Up to `limit` (key, value) pairs with keys strictly after `start_after`,
+    in key order, and the cursor for the next page ("" after the last one).
+    TreeMap iterates from its first key and cannot seek, so every page walks
+    the keys before its cursor: O(position + limit) key reads per page and
+    O(N^2 / limit) for a full pass. Only the returned entries' values are read.
+    """
+    limit = max(1, min(limit, cap))
+    page = []
+    for key in entries:
+        if start_after and key <= start_after:
+            continue
+        if len(page) == limit:
+            return page, page[-1][0]
+        value = entries[key]
+        page.append([key, convert(value) if convert else value])
+    return page, ""
+
+
+def _list_view(entries: TreeMap, start_after: str, limit: int,
+               convert: typing.Callable | None = None) -> dict[str, typing.Any]:
+    page, cursor = _page(entries, start_after, limit, LIST_LIMIT, convert)
+    return {"entries": page, "next": cursor}
+
+
+def _export_view(entries: TreeMap, start_after: str, limit: int,
+                 convert: typing.Callable | None = None) -> str:
+    # Columnar, whitespace-free JSON: {"k": [...], "v": [...], "n": cursor}
+    page, cursor = _page(entries, start_after, limit, EXPORT_LIMIT, convert)
+    payload = {"k": [k for k, _ in page], "v": [v for _, v in page], "n": cursor}
+    return json.dumps(payload, separators=(",", ":"))
+
 
 class SimValidator(gl.Contract):
     """
@@ -12,12 +182,22 @@ class SimValidator(gl.Contract):
     - 'Risky': Accepts data even if it has minor flags.
     """
     
-    # Stores: "Persona + Data Snippet" -> "Vote Result"
+    # Stores: Content Key of (Persona, Data) -> "Vote Result"
     simulation_results: TreeMap[str, str]
 
-    def __init__(self):
+    # Content key -> original input, kept only when deployed with keep_originals
+    originals: TreeMap[str, str]
+    keep_originals: bool
+
+    # Hot-path counters: "<method>.<counter>" -> total (see get_stats)
+    stats: TreeMap[str, u256]
+
+    def __init__(self, keep_originals: bool = False):
         # Initialize storage to prevent AttributeErrors
         self.simulation_results = TreeMap()
+        self.stats = TreeMap()
+        self.originals = TreeMap()
+        self.keep_originals = keep_originals
 
     @gl.public.write
     def predict_vote(self, persona_type: str, data: str) -> None:
@@ -25,8 +205,9 @@ class SimValidator(gl.Contract):
         Asks the LLM to act as a specific type of validator and vote on the data.
         """
     
-        # Create a unique key for storage (limit data length for key)
-        storage_key = f"{persona_type}::{data[:50]}"
+        # Create a unique key for storage from the full data
+        storage_key = _content_key(persona_type, data)
+        refresh = storage_key in self.simulation_results
 
         def simulate_nondet() -> str:
             # Define Persona Instructions
@@ -66,11 +247,10 @@ class SimValidator(gl.Contract):
             """
 
             result_raw = gl.nondet.exec_prompt(task)
-            try:
-                cleaned = result_raw.replace("```json", "").replace("```", "").strip()
-                return cleaned
-            except:
-                return json.dumps({"vote": "Error", "reason": "Parsing failed"})
+            parsed = _decode_llm_json(result_raw, VOTE_SCHEMA)
+            if parsed is None:
+                return json.dumps({"error": "decode_failed"})
+            return json.dumps(parsed)
 
         # Consensus: Comparative
         # We check if the *Vote Decision* is the same.
@@ -88,15 +268,22 @@ class SimValidator(gl.Contract):
             comparison_criteria
         )
 
-        try:
-            parsed = json.loads(consensus_json)
-            vote = parsed.get("vote", "Abstain")
-            reason = parsed.get("reason", "No consensus")
-            
+        parsed = _decode_llm_json(consensus_json, VOTE_SCHEMA)
+        if parsed is not None:
             # Store the result
-            self.simulation_results[storage_key] = f"{vote}: {reason}"
-        except:
-            self.simulation_results[storage_key] = "Simulation Failed"
+            self.simulation_results[storage_key] = f"{parsed['vote']}: {parsed['reason']}"
+            if self.keep_originals:
+                self.originals[storage_key] = f"{persona_type}::{data}"
+
+        self._record(
+            "predict_vote",
+            calls=1,
+            consensus_rounds=1,
+            llm_prompts=1,
+            input_bytes=len(persona_type.encode("utf-8")) + len(data.encode("utf-8")),
+            refreshes=int(parsed is not None and refresh),
+            decode_failures=int(parsed is None),
+        )
         
         return None
 
@@ -104,9 +291,55 @@ class SimValidator(gl.Contract):
     def get_prediction(self, persona_type: str, data_snippet: str) -> str:
         """
         Retrieve the result using the same key logic.
-        Note: 'data_snippet' must match the first 50 chars of the original input.
+        Note: 'data_snippet' must be the full original input (whitespace-insensitive).
         """
-        storage_key = f"{persona_type}::{data_snippet[:50]}"
+        storage_key = _content_key(persona_type, data_snippet)
         if storage_key in self.simulation_results:
             return self.simulation_results[storage_key]
         return "Not found"
+
+    @gl.public.view
+    def get_original(self, key: str) -> str:
+        """
+        Returns the input stored under a content key, or "" if originals are not kept.
+        """
+        if key in self.originals:
+            return self.originals[key]
+        return ""
+
+    @gl.public.view
+    def list_entries(self, start_after: str = "", limit: int = 50) -> dict[str, typing.Any]:
+        """
+        Pages through simulated votes in key order: {"entries": [[key, value], ...], "next": cursor}.
+        Pass "next" back as start_after; it is "" after the last page.
+        """
+        return _list_view(self.simulation_results, start_after, limit)
+
+    @gl.public.view
+    def export_entries(self, start_after: str = "", limit: int = EXPORT_LIMIT) -> str:
+        """
+        Same pages as list_entries, as compact columnar JSON for bulk mirroring.
+        """
+        return _export_view(self.simulation_results, start_after, limit)
+
+    @gl.public.view
+    def list_originals(self, start_after: str = "", limit: int = 50) -> dict[str, typing.Any]:
+        """
+        Pages through the retained original inputs, keyed like list_entries.
+        """
+        return _list_view(self.originals, start_after, limit)
+
+    def _record(self, method: str, **counters: int) -> None:
+        # Adds to the "<method>.<counter>" totals read by get_stats
+        for name, amount in counters.items():
+            if amount:
+                key = f"{method}.{name}"
+                current = int(self.stats[key]) if key in self.stats else 0
+                self.stats[key] = u256(current + amount)
+
+    @gl.public.view
+    def get_stats(self) -> dict[str, int]:
+        """
+        Returns hot-path counters keyed "<method>.<counter>".
+        """
+        return {key: int(count) for key, count in self.stats.items()}
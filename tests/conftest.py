@@ -0,0 +1,13 @@
+import functools
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from bench.emulator import load_contract  # noqa: E402
+
+
+@functools.cache
+def contract_globals(path: str) -> dict:
+    """Module globals of a contract file, to test its helpers directly."""
+    return load_contract(path).get_stats.__globals__
@@ -0,0 +1,88 @@
+"""
+Submission queues of the batching contracts: a batch the validators cannot
+agree on is recorded as a failure and shrunk until the disputed item is
+dead-lettered, and the rest of the queue still drains.
+"""
+
+import json
+import re
+
+from bench.emulator import Network
+from bench.stubs import ScriptedLLM, StaticWeb
+
+TRICKY = "tricky one"
+
+
+def _listed(prompt: str, label: str) -> list[str]:
+    # The batch prompts carry their items as a one-line JSON list after the label
+    return json.loads(re.search(re.escape(label) + r"\s*(\[.*\])", prompt).group(1))
+
+
+def _redact(prompt: str, node: int) -> str:
+    # Every node agrees, except on the tricky text, which each one rewrites differently
+    texts = _listed(prompt, "Input Texts (JSON list):")
+    return json.dumps({"redacted": [f"{text} #{node}" if text == TRICKY else text for text in texts]})
+
+
+def _check(prompt: str, node: int) -> str:
+    urls = _listed(prompt, "Target URLs (JSON list):")
+    return json.dumps({"is_safe": [node % 2 == 0 if url == TRICKY else True for url in urls]})
+
+
+def _drain(contract, limit: int = 20) -> int:
+    calls = 0
+    while contract.view("get_queue_length") and calls < limit:
+        contract.write("process_queue")
+        calls += 1
+    return calls
+
+
+def test_disputed_text_is_dead_lettered_and_the_queue_drains():
+    net = Network(StaticWeb({}), ScriptedLLM([("Input Texts", _redact)]), validators=4)
+    privacy = net.deploy("privacy_filter.py")
+    texts = ["alpha", TRICKY, "beta"]
+    for text in texts:
+        privacy.write("submit", text)
+
+    _drain(privacy)
+
+    assert privacy.view("get_queue_length") == 0
+    assert privacy.view("get_dead_letters") == [TRICKY]
+    assert privacy.view("get_redacted", "alpha") == "alpha"
+    assert privacy.view("get_redacted", "beta") == "beta"
+    stats = privacy.view("get_stats")
+    assert stats["process_queue.consensus_failures"] >= 1
+    assert stats["process_queue.dead_letters"] == 1
+    assert "process_queue.decode_failures" not in stats
+
+
+def test_disputed_url_is_dead_lettered_and_the_queue_drains():
+    net = Network(StaticWeb({}), ScriptedLLM([("Target URLs", _check)]), validators=4)
+    guard = net.deploy("phish_guard.py")
+    for url in ["https://a.example", TRICKY, "https://b.example"]:
+        guard.write("submit", url)
+
+    _drain(guard)
+
+    assert guard.view("get_queue_length") == 0
+    assert guard.view("get_dead_letters") == [TRICKY]
+    assert guard.view("get_stats")["process_queue.dead_letters"] == 1
+
+
+def test_interleaved_submit_and_process_keeps_the_queue_bounded():
+    net = Network(StaticWeb({}), ScriptedLLM([("Input Texts", _redact)]), validators=2)
+    privacy = net.deploy("privacy_filter.py")
+    submitted = []
+    # Each round adds more than one batch takes, so the queue is never drained
+    for round_ in range(30):
+        for i in range(25):
+            text = f"text {round_}-{i}"
+            submitted.append(text)
+            privacy.write("submit", text)
+        privacy.write("process_queue")
+        assert len(privacy.state()["queue"]) <= 2 * privacy.view("get_queue_length") + 25
+
+    _drain(privacy, limit=100)
+
+    assert privacy.view("get_queue_length") == 0
+    assert all(privacy.view("get_redacted", text) == text for text in submitted)
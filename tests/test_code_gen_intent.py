@@ -0,0 +1,49 @@
+"""
+CodeGen intent keys: paraphrases share a stored snippet, but intents that
+differ in direction, operands or negation never do.
+"""
+
+import pytest
+
+from bench.emulator import Network
+from bench.stubs import ScriptedLLM, StaticWeb
+from conftest import contract_globals
+
+G = contract_globals("code_gen.py")
+canonical = G["_canonical_intent"]
+
+OPPOSITES = [
+    ("convert celsius to fahrenheit", "convert to celsius from fahrenheit"),
+    ("convert celsius to fahrenheit", "convert celsius from fahrenheit"),
+    ("copy items from list a into list b", "copy items from list b into list a"),
+    ("add a to b", "add b to a"),
+    ("remove duplicates from the list", "do not remove duplicates from the list"),
+]
+
+
+@pytest.mark.parametrize("first, second", OPPOSITES)
+def test_opposite_intents_get_different_keys(first, second):
+    assert canonical(first) != canonical(second)
+
+
+def test_articles_are_dropped_but_single_letter_names_kept():
+    assert canonical("Please reverse the lists.") == canonical("reverse a list") == "reverse list"
+    assert canonical("copy items from list a into list b") == "copy item from list a into list b"
+    assert canonical("swap a b") == "swap a b"
+
+
+@pytest.mark.parametrize("first, second", OPPOSITES)
+def test_opposite_intents_are_not_near_duplicates(first, second):
+    net = Network(StaticWeb({}), ScriptedLLM([], default="print(1)"), validators=2)
+    codegen = net.deploy("code_gen.py", False, 1)
+    codegen.write("generate_python", first)
+
+    assert codegen.view("get_code", second) == "# No code generated"
+
+
+def test_paraphrase_is_still_served():
+    net = Network(StaticWeb({}), ScriptedLLM([], default="b.extend(a)"), validators=2)
+    codegen = net.deploy("code_gen.py")
+    codegen.write("generate_python", "copy items from list a into list b")
+
+    assert codegen.view("get_code", "Please copy the items from list a into list b.") == "b.extend(a)"
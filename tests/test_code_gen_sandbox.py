@@ -0,0 +1,111 @@
+"""
+CodeGen differential-execution sandbox: every budget breach and refused
+construct must end in an inconclusive fingerprint (None), quickly, so the
+pair goes to the LLM judge; ordinary snippets must still be compared.
+"""
+
+import time
+
+import pytest
+
+from conftest import contract_globals
+
+G = contract_globals("code_gen.py")
+fingerprint = G["_execution_fingerprint"]
+equivalent = G["_execution_equivalent"]
+
+
+@pytest.mark.parametrize("source", [
+    # Steps: Python-level loops and recursion
+    "while True:\n    pass",
+    "def f(n):\n    return f(n + 1)",
+    # Builtins and operators that do their work in C
+    "print(sum(range(10**8)))",
+    "print(pow(7, 3_000_000))",
+    "print(7 ** 3_000_000)",
+    "print(1 << 10**7)",
+    "print(len([0] * 10**8))",
+    "print(len('ab' * 10**8))",
+    # Format widths and precisions
+    "print(f'{1:>200000000}')",
+    "n = 200000000\nprint(f'{1:>{n}}')",
+    "print(f'{1.5:.200000000f}')",
+    "print('%200000000d' % 1)",
+    "print('%*d' % (200000000, 1))",
+    "print('{:>200000000}'.format(1))",
+    "print('{:>{}}'.format(1, 200000000))",
+    "print('x'.rjust(200000000))",
+    "print(round(1, -3 * 10**6))",
+    # Methods whose result outgrows their inputs
+    "s = 'x' * 50000\nprint(len(s.join(['y' * 50000] * 3)))",
+    "s = 'a' * 50000\nprint(len(s.replace('a', 'bbbb')))",
+    "join = ' '.join\nprint(join(['a']))",
+    "s = 'x' * 50000\nprint(len(str.join(s, ['y' * 50000] * 3)))",
+    "print(len((1).to_bytes(10**9, 'big')))",
+    "import collections\nprint(len(list(collections.Counter(a=10**9).elements())))",
+    # Modules with unbounded functions
+    "import re\nprint(re.match(r'(a+)+$', 'a' * 24 + 'b'))",
+    "import itertools\nprint(sum(1 for _ in itertools.repeat(0, 10**9)))",
+    "import math\nprint(math.factorial(10**6))",
+    "from math import comb\nprint(comb(10**6, 5 * 10**5))",
+    "from math import *\ndef f(x):\n    return factorial(300000) % 7\n",
+    "import math as m\ncall = m.prod\nprint(call(range(1, 50000)) % 7)",
+    "from collections import *\nprint(Counter)",
+    "import string\nprint(string.Formatter().format('{:>200000000}', 1))",
+    # Memory kept across many individually small steps
+    "grown = []\nchunk = [0] * 100000\nfor _ in range(50000):\n    grown.extend(chunk)\nprint(len(grown))",
+    "kept = []\nchunk = [0] * 100000\nfor _ in range(50000):\n    kept.append(chunk[:])\nprint(len(kept))",
+    # Escapes from the namespace
+    "print(().__class__.__base__.__subclasses__())",
+    "import os\nprint(os.getcwd())",
+    "def f():\n    yield 1",
+])
+def test_budget_breach_is_inconclusive(source):
+    started = time.monotonic()
+    assert fingerprint(source) is None
+    # Bounded by EXEC_MAX_SECONDS, plus one metered operation
+    assert time.monotonic() - started < G["EXEC_MAX_SECONDS"] + 1
+
+
+def test_limits_do_not_leave_tracemalloc_running():
+    import tracemalloc
+
+    fingerprint("grown = []\nchunk = [0] * 100000\nfor _ in range(50000):\n    grown.extend(chunk)")
+    assert not tracemalloc.is_tracing()
+
+
+def test_ordinary_snippets_still_compare():
+    ascending = "def order(xs):\n    return sorted(xs)"
+    manual = (
+        "def order(items):\n"
+        "    out = list(items)\n"
+        "    for i in range(len(out)):\n"
+        "        for j in range(len(out) - 1 - i):\n"
+        "            if out[j] > out[j + 1]:\n"
+        "                out[j], out[j + 1] = out[j + 1], out[j]\n"
+        "    return out"
+    )
+    descending = "def order(xs):\n    return sorted(xs, reverse=True)"
+    assert equivalent(ascending, manual) is True
+    assert equivalent(ascending, descending) is False
+
+
+def test_guarded_formatting_and_methods_keep_their_results():
+    source = (
+        "def show(n):\n"
+        "    return f'{n:>5}|{n!r:^4}' + '%3d' % n + '{:02}'.format(n) + "
+        "','.join(map(str, range(max(n, 0)))) + 'a-b'.replace('-', '+')"
+    )
+    observed = fingerprint(source)
+    assert observed["int"][1] == "ret:'    1| 1    1010a+b'|out:"
+
+
+def test_allow_listed_math_and_round_still_work():
+    observed = fingerprint("from math import sqrt, gcd\nimport math\n"
+                           "print(sqrt(16), gcd(12, 18), math.floor(2.5), round(1234, -2), round(2.567, 2))")
+    assert observed == {"script": ["out:4.0 6 2 1200 2.57\n|err:"]}
+
+
+def test_sum_and_pow_builtins_still_work_within_budget():
+    observed = fingerprint("print(sum(range(100)), sum([[1], [2]], []), pow(3, 4), pow(3, 10**20, 7))")
+    assert observed == {"script": [f"out:4950 [1, 2] 81 {pow(3, 10**20, 7)}\n|err:"]}
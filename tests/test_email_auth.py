@@ -0,0 +1,229 @@
+"""
+EmailAuth parsing, canonicalization and signature checks against vectors
+that do not come from this repository: RFC 8463 Appendix A, the RFC 6376
+canonicalization example, RFC 5322 Appendix A addresses, and a message
+signed by OpenSSL. bench/dkim.Signer is not used, as it signs through the
+contract's own canonicalization.
+"""
+
+import json
+
+import pytest
+
+from bench.emulator import Network
+from bench.stubs import ScriptedLLM, StaticWeb
+from conftest import contract_globals
+
+G = contract_globals("email_auth.py")
+
+# RFC 8463 Appendix A.3: one message signed with both example keys
+RFC8463_MESSAGE = "\r\n".join([
+    "DKIM-Signature: v=1; a=ed25519-sha256; c=relaxed/relaxed;",
+    " d=football.example.com; i=@football.example.com;",
+    " q=dns/txt; s=brisbane; t=1528637909; h=from : to :",
+    " subject : date : message-id : from : subject : date;",
+    " bh=2jUSOH9NhtVGCQWNr9BrIAPreKQjO6Sn7XIkfJVOzv8=;",
+    " b=/gCrinpcQOoIfuHNQIbq4pgh9kyIK3AQUdt9OdqQehSwhEIug4D11Bus",
+    " Fa3bT3FY5OsU7ZbnKELq+eXdp1Q1Dw==",
+    "DKIM-Signature: v=1; a=rsa-sha256; c=relaxed/relaxed;",
+    " d=football.example.com; i=@football.example.com;",
+    " q=dns/txt; s=test; t=1528637909; h=from : to : subject :",
+    " date : message-id : from : subject : date;",
+    " bh=2jUSOH9NhtVGCQWNr9BrIAPreKQjO6Sn7XIkfJVOzv8=;",
+    " b=F45dVWDfMbQDGHJFlXUNB2HKfbCeLRyhDXgFpEL8GwpsRe0IeIixNTe3",
+    " DhCVlUrSjV4BwcVcOF6+FF3Zo9Rpo1tFOeS9mPYQTnGdaSGsgeefOsk2Jz",
+    " dA+L10TeYt9BgDfQNZtKdN1WO//KgIqXP7OdEFE4LjFYNcUxZQ4FADY+8=",
+    "From: Joe SixPack <joe@football.example.com>",
+    "To: Suzie Q <suzie@shopping.example.net>",
+    "Subject: Is dinner ready?",
+    "Date: Fri, 11 Jul 2003 21:00:37 -0700 (PDT)",
+    "Message-ID: <20030712040037.46341.5F8J@football.example.com>",
+    "",
+    "Hi.",
+    "",
+    "We lost the game.  Are you hungry yet?",
+    "",
+    "Joe.",
+    "",
+])
+RFC8463_ED25519_NAME = "brisbane._domainkey.football.example.com"
+RFC8463_ED25519_RECORD = "v=DKIM1; k=ed25519; p=11qYAYKxCrfVS/7TyWQHOg7hcvPapiMlrwIaaPcHURo="
+
+# simple/simple rsa-sha256 over a folded Subject and a body with trailing
+# blank lines; signed with `openssl dgst -sha256 -sign` over a hand-built
+# canonical header block
+OPENSSL_RSA_MESSAGE = "\r\n".join([
+    "DKIM-Signature: v=1; a=rsa-sha256; c=simple/simple; d=example.org; s=oct2026;",
+    "\tt=1791192600; h=From:To:Subject:Date:Message-ID;",
+    "\tbh=TpvD/GsDQtMqevKgdq4MRiQFHPlvxSOVy24KdDDdeNo=;",
+    "\tb=lMCAtiCKqaeoXF7KSBEQbRtkTY8WqaMa4Uw/fn/QgYaa6xNTTVZKT5uZMV39BZu9",
+    "\t IOFVCslMWGMlt6YCPZruZJzyLY5TKrYGY0DUJdetYvV4LhB4z5LJO1E78K6Ln2Xi",
+    "\t JrGqVLDfjMw2MRhdmFlcAk5fyGnXADJ7BxFRJXGGm0mAy1tc1nD4XlGl7reHeIl5",
+    "\t gVAhM66G3+E2KX8WKMsCQxlso61i+aCDXtJHgrtdgTBzE8in5vINETz4YC/dJYxc",
+    "\t ht3ENTCe+0BuhzCQyBvDbXDBaZJaBSvdlGhAkzck8/L6bCIxFGikK7H1PXpZYq98",
+    "\t TmyZ7CVfLKYC8r0IEEdpvA==",
+    "From: Alice Example <alice@example.org>",
+    "To: bob@example.net",
+    "Subject: Quarterly  report",
+    "\tfor October",
+    "Date: Mon, 05 Oct 2026 09:30:00 +0000",
+    "Message-ID: <20261005093000.1@example.org>",
+    "",
+    "Hello Bob,",
+    "",
+    "The  report is attached.",
+    "",
+    "",
+    "",
+])
+OPENSSL_RSA_RECORD = (
+    "v=DKIM1; k=rsa; p=MIIBIjANBgkqhkiG9w0BAQEFAAOCAQ8AMIIBCgKCAQEApFQR244Hg/8mrBr1Lm/6l4F9Oo/0lZcN"
+    "cKYh6Uj5/x5KyXGJh36jenzr4KCYqHHrNYSNvWoTDEaJlr9yijgZKxeDG4R5ZW/GFWV1KcPugi1SoylpmE1v0iOn0RJLKFq"
+    "f4mp2CU5PxyX3ZwlEywvRyUCGwIEsRs0hn/wNRAaftSqlqt5qNCh4g8XZtJDLl1wlkwrWefpY2crq7HduZMYf3X4UEiQxk2"
+    "0TGXRGaPGVSZzlJihp1m9nCYWB0o9v9IrHcVm/tp2QoM1ENGYU5soGSHQm+OxEn8Z7vlhjc9P55V5Bs79am8Id4r9OuLdTAr"
+    "SUCSD+LQJ6SLsjsvi7/At9TwIDAQAB"
+)
+
+
+def _check(message: str, record: str, selector: str) -> bool:
+    fields, body = G["_parse_message"](message)
+    verdict, _, aligned = G["_dkim_alignment"](fields, "strict")
+    assert verdict
+    (tags, raw), = [(tags, raw) for tags, raw in aligned if tags["s"] == selector]
+    return G["_verify_signature"](tags, raw, fields, body, record)
+
+
+def test_rfc8463_ed25519_signature_verifies():
+    assert _check(RFC8463_MESSAGE, RFC8463_ED25519_RECORD, "brisbane")
+
+
+def test_rfc8463_ed25519_rejects_altered_body():
+    altered = RFC8463_MESSAGE.replace("hungry", "thirsty")
+    assert not _check(altered, RFC8463_ED25519_RECORD, "brisbane")
+
+
+def test_rfc8463_ed25519_rejects_altered_signed_header():
+    altered = RFC8463_MESSAGE.replace("Is dinner ready?", "Is lunch ready?")
+    assert not _check(altered, RFC8463_ED25519_RECORD, "brisbane")
+
+
+def test_rfc8463_relaxed_canonicalization_tolerates_whitespace():
+    rewrapped = RFC8463_MESSAGE.replace("Subject: Is dinner ready?", "Subject:  Is dinner\r\n\tready? ")
+    assert _check(rewrapped, RFC8463_ED25519_RECORD, "brisbane")
+
+
+def test_openssl_rsa_signature_verifies():
+    assert _check(OPENSSL_RSA_MESSAGE, OPENSSL_RSA_RECORD, "oct2026")
+
+
+def test_openssl_rsa_simple_canonicalization_is_exact():
+    assert not _check(OPENSSL_RSA_MESSAGE.replace("Quarterly  report", "Quarterly report"),
+                      OPENSSL_RSA_RECORD, "oct2026")
+    # Trailing empty lines are not part of a simple body
+    assert _check(OPENSSL_RSA_MESSAGE + "\r\n\r\n", OPENSSL_RSA_RECORD, "oct2026")
+
+
+def test_openssl_rsa_rejects_wrong_key_type():
+    record = OPENSSL_RSA_RECORD.replace("k=rsa", "k=ed25519")
+    assert not _check(OPENSSL_RSA_MESSAGE, record, "oct2026")
+
+
+def _doh_answer(name: str, record: str) -> str:
+    return json.dumps({"Status": 0, "Answer": [{"name": f"{name}.", "type": 16, "TTL": 300,
+                                                "data": json.dumps(record)}]})
+
+
+def test_verify_dkim_end_to_end_with_rfc8463_key():
+    resolver = "https://dns.google/resolve?name={name}&type=TXT"
+    web = StaticWeb({resolver.format(name=RFC8463_ED25519_NAME):
+                     _doh_answer(RFC8463_ED25519_NAME, RFC8463_ED25519_RECORD)},
+                    {"https://dns.google/resolve": json.dumps({"Status": 3})})
+    net = Network(web, ScriptedLLM([]), validators=2)
+    auth = net.deploy("email_auth.py")
+    auth.write("verify_dkim", RFC8463_MESSAGE)
+    assert auth.view("is_verified", RFC8463_MESSAGE)
+    # Verdicts are keyed by the exact text: a re-wrapped copy has none yet
+    assert not auth.view("is_verified", RFC8463_MESSAGE.replace("Hi.", "Hi. "))
+
+
+def test_verify_mailbox_counts_each_unparseable_message_once():
+    net = Network(StaticWeb({}), ScriptedLLM([]), validators=2)
+    auth = net.deploy("email_auth.py", False, "strict", False)
+    archive = json.dumps([
+        "From: a@example.org\nDKIM-Signature: v=1; d=example.org; s=x\n",
+        "  folded: first\nFrom: a@b.com\n",
+        "signed by example.com, sent as bob",
+        "From: c@example.net\nDKIM-Signature: v=1; d=example.org; s=x\n",
+    ])
+    auth.write("verify_mailbox", archive)
+    auth.write("verify_mailbox", archive)
+
+    assert auth.view("get_mailbox_summary") == {"passed": 1, "failed": 1, "unparsed": 2, "domains": 2}
+    assert auth.view("get_stats")["verify_mailbox.cache_hits"] == 4
+
+
+# RFC 6376 section 3.4.6
+RFC6376_HEADERS = ["A: X", "B : Y\t\r\n\tZ  "]
+RFC6376_BODY = " C \r\nD \t E\r\n\r\n\r\n"
+
+
+def test_rfc6376_relaxed_header_canonicalization():
+    assert [G["_canon_header"](h, "relaxed") for h in RFC6376_HEADERS] == ["a:X\r\n", "b:Y Z\r\n"]
+
+
+def test_rfc6376_simple_header_canonicalization():
+    assert [G["_canon_header"](h, "simple") for h in RFC6376_HEADERS] == [h + "\r\n" for h in RFC6376_HEADERS]
+
+
+def test_rfc6376_body_canonicalization():
+    assert G["_canon_body"](RFC6376_BODY, "relaxed") == b" C\r\nD E\r\n"
+    assert G["_canon_body"](RFC6376_BODY, "simple") == b" C \r\nD \t E\r\n"
+
+
+def test_rfc6376_empty_body_canonicalization():
+    assert G["_canon_body"]("", "simple") == b"\r\n"
+    assert G["_canon_body"]("\r\n\r\n", "relaxed") == b""
+
+
+def test_parse_message_unfolds_and_keeps_raw_fields():
+    fields, body = G["_parse_message"]("Subject: Quarterly\n\treport\nFrom: a@example.org\n\nline 1\nline 2\n")
+    assert fields == [
+        ("subject", "Quarterly report", "Subject: Quarterly\r\n\treport"),
+        ("from", "a@example.org", "From: a@example.org"),
+    ]
+    assert body == "line 1\r\nline 2\r\n"
+
+
+def test_parse_message_rejects_non_header_text():
+    assert G["_parse_message"]("signed by example.com, sent as bob") is None
+    assert G["_parse_message"]("  folded: first\nFrom: a@b.com\n") is None
+    assert G["_parse_message"]("From bob@example.com Sat Jan  3 01:05:34 1996\n\tfolded\n") is None
+
+
+@pytest.mark.parametrize("value, addresses", [
+    # RFC 5322 Appendix A.1.1 - A.1.3
+    ('John Doe <jdoe@machine.example>', ["jdoe@machine.example"]),
+    ('"Joe Q. Public" <john.q.public@example.com>', ["john.q.public@example.com"]),
+    ('Mary Smith <mary@x.test>, jdoe@example.org, Who? <one@y.test>',
+     ["mary@x.test", "jdoe@example.org", "one@y.test"]),
+    ('<boss@nil.test>, "Giant; \\"Big\\" Box" <sysservices@example.net>',
+     ["boss@nil.test", "sysservices@example.net"]),
+    ('A Group:Ed Jones <c@a.test>,joe@where.test,John <jdoe@one.test>;',
+     ["c@a.test", "joe@where.test", "jdoe@one.test"]),
+    # Appendix A.5, comments in and around the address
+    ('Pete(A nice \\) chap) <pete(his account)@silly.test(his host)>', ["pete@silly.test"]),
+    # RFC 2047 encoded display name
+    ('=?ISO-8859-1?Q?Andr=E9?= Pirard <PIRARD@vm1.ulg.ac.be>', ["PIRARD@vm1.ulg.ac.be"]),
+])
+def test_rfc5322_mailbox_addresses(value, addresses):
+    assert G["_mailbox_addresses"](value) == addresses
+
+
+@pytest.mark.parametrize("value", [
+    "John Doe jdoe@machine.example",
+    "Broken <a@example.org",
+    "(unclosed comment a@example.org",
+    '"unclosed quote <a@example.org>',
+])
+def test_rfc5322_malformed_mailbox_addresses(value):
+    assert G["_mailbox_addresses"](value) is None
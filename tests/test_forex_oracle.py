@@ -0,0 +1,169 @@
+"""
+FrankfurterOracle rate table and history ring buffer, checked against a
+brute-force model of the published snapshots, with the ring small enough
+to wrap around many times.
+"""
+
+import datetime
+import fractions
+import random
+
+import pytest
+
+from bench.emulator import Network
+from bench.stubs import ScriptedLLM, StaticWeb
+
+CODES = ["EUR", "GBP", "JPY"]
+SCALE = 10**18
+URL = f"https://api.frankfurter.app/latest?from=USD&to={','.join(CODES)}"
+
+
+class Feed:
+    """The Frankfurter page, serving whatever snapshot the test set last."""
+
+    def __init__(self):
+        self.date, self.rates = "1970-01-01", {}
+
+    def __call__(self, url: str, node: int) -> str:
+        # Rates are decimal literals, written out as JSON numbers digit for digit
+        rates = ", ".join(f'"{code}": {rate}' for code, rate in self.rates.items())
+        return f'{{"amount": 1.0, "base": "USD", "date": "{self.date}", "rates": {{{rates}}}}}'
+
+
+def _deploy(history_days: int) -> tuple[Feed, object]:
+    feed = Feed()
+    net = Network(StaticWeb({URL: feed}), ScriptedLLM([]), validators=2)
+    return feed, net.deploy("forex_oracle.py", ",".join(CODES), "USD", history_days)
+
+
+def _publish(oracle, feed: Feed, date: datetime.date, rates: dict[str, str]) -> None:
+    feed.date, feed.rates = date.isoformat(), rates
+    oracle.write("update_rates")
+
+
+def _fixed(rate: str) -> int:
+    whole, _, fraction = rate.partition(".")
+    return int(whole) * SCALE + int(fraction.ljust(18, "0"))
+
+
+class Model:
+    """Snapshots as the oracle should retain them: [(ordinal, {code: raw})], oldest first."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.table = {code: 0 for code in CODES}
+        self.snapshots: list[tuple[int, dict[str, int]]] = []
+
+    def publish(self, date: datetime.date, rates: dict[str, str]) -> None:
+        for code, rate in rates.items():
+            self.table[code] = _fixed(rate)
+        day = date.toordinal()
+        if self.snapshots and day < self.snapshots[-1][0]:
+            return
+        if self.snapshots and day == self.snapshots[-1][0]:
+            self.snapshots[-1] = (day, dict(self.table))
+            return
+        self.snapshots = (self.snapshots + [(day, dict(self.table))])[-self.capacity:]
+
+    def rate_on(self, day: int) -> tuple[int, dict[str, int]] | None:
+        held = [s for s in self.snapshots if s[0] <= day]
+        return held[-1] if held else None
+
+    def twap(self, first: int, last: int) -> dict[str, int]:
+        if not self.snapshots:
+            return {}
+        first = max(first, self.snapshots[0][0])
+        if last <= first:
+            return {}
+        days = [self.rate_on(day)[1] for day in range(first, last)]
+        return {code: sum(d[code] for d in days) // len(days) for code in CODES}
+
+    def range(self, first: int, last: int) -> dict[str, dict[str, int]]:
+        ranges = {}
+        for code in CODES:
+            # A currency with no rate yet has nothing to bound
+            held = [rates[code] for day, rates in self.snapshots if first <= day <= last and rates[code]]
+            if held:
+                ranges[code] = {"min": min(held), "max": max(held)}
+        return ranges
+
+
+def _iso(day: int) -> str:
+    return datetime.date.fromordinal(day).isoformat()
+
+
+def test_ring_buffer_evicts_oldest_on_wrap_around():
+    feed, oracle = _deploy(history_days=3)
+    start = datetime.date(2026, 10, 12)
+    for offset in range(5):
+        _publish(oracle, feed, start + datetime.timedelta(days=offset),
+                 {"EUR": f"0.9{offset}", "GBP": "0.8", "JPY": "150"})
+
+    assert oracle.view("get_history_bounds") == {
+        "oldest": "2026-10-14", "latest": "2026-10-16", "count": 3, "capacity": 3,
+    }
+    assert oracle.view("get_rate_on", "2026-10-13") == {"date": "", "rates": {}}
+    assert oracle.view("get_rate_on", "2026-10-14", "EUR") == {
+        "date": "2026-10-14", "rates": {"EUR": _fixed("0.92")},
+    }
+    # Slots 2, 0, 1 in age order: the min/max query spans the wrap
+    assert oracle.view("get_range", "2026-10-01", "2026-10-31", "EUR") == {
+        "EUR": {"min": _fixed("0.92"), "max": _fixed("0.94")},
+    }
+
+
+def test_same_day_revises_and_older_day_is_ignored():
+    feed, oracle = _deploy(history_days=2)
+    day = datetime.date(2026, 10, 12)
+    _publish(oracle, feed, day, {"EUR": "0.90", "GBP": "0.80", "JPY": "150"})
+    _publish(oracle, feed, day, {"EUR": "0.91", "GBP": "0.80", "JPY": "150"})
+    _publish(oracle, feed, day - datetime.timedelta(days=1), {"EUR": "0.50", "GBP": "0.80", "JPY": "150"})
+
+    assert oracle.view("get_history_bounds")["count"] == 1
+    assert oracle.view("get_rate_on", "2026-10-12", "EUR")["rates"] == {"EUR": _fixed("0.91")}
+    assert oracle.view("get_range", "2026-10-12", "2026-10-12", "EUR") == {
+        "EUR": {"min": _fixed("0.91"), "max": _fixed("0.91")},
+    }
+
+
+def test_missing_currency_keeps_its_last_rate():
+    feed, oracle = _deploy(history_days=4)
+    _publish(oracle, feed, datetime.date(2026, 10, 12), {"EUR": "0.90", "GBP": "0.80", "JPY": "150"})
+    _publish(oracle, feed, datetime.date(2026, 10, 13), {"EUR": "0.95", "JPY": "151"})
+
+    assert oracle.view("get_raw_rates") == {"EUR": _fixed("0.95"), "GBP": _fixed("0.80"), "JPY": _fixed("151")}
+    assert oracle.view("get_rate_on", "2026-10-13", "GBP")["rates"] == {"GBP": _fixed("0.80")}
+    # GBP per EUR, rounded half to even at 18 decimals
+    assert oracle.view("get_cross_rate", "EUR", "GBP") == round(fractions.Fraction("0.80") / fractions.Fraction("0.95") * SCALE)
+
+
+@pytest.mark.parametrize("capacity, seed", [(1, 0), (3, 1), (5, 2), (8, 3)])
+def test_history_views_match_brute_force_over_many_wraps(capacity, seed):
+    rng = random.Random(seed)
+    feed, oracle = _deploy(history_days=capacity)
+    model = Model(capacity)
+    date = datetime.date(2026, 1, 5)
+    for _ in range(40):
+        # Mostly new days, with gaps; sometimes a revision or a stale date
+        step = rng.choice([1, 1, 1, 2, 3, 0, -2])
+        date += datetime.timedelta(days=step)
+        rates = {code: f"{rng.randint(1, 200)}.{rng.randint(0, 9999):04d}"
+                 for code in CODES if rng.random() > 0.1}
+        _publish(oracle, feed, date, rates)
+        model.publish(date, rates)
+
+        bounds = oracle.view("get_history_bounds")
+        assert bounds["count"] == len(model.snapshots)
+        assert bounds["oldest"] == _iso(model.snapshots[0][0])
+        assert bounds["latest"] == _iso(model.snapshots[-1][0])
+
+        oldest, latest = model.snapshots[0][0], model.snapshots[-1][0]
+        for _ in range(3):
+            first = rng.randint(oldest - 3, latest + 2)
+            last = first + rng.randint(0, 8)
+            expected = model.rate_on(first)
+            assert oracle.view("get_rate_on", _iso(first)) == (
+                {"date": _iso(expected[0]), "rates": expected[1]} if expected else {"date": "", "rates": {}}
+            )
+            assert oracle.view("get_twap", _iso(first), _iso(last)) == model.twap(first, last)
+            assert oracle.view("get_range", _iso(first), _iso(last)) == model.range(first, last)
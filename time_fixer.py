@@ -2,19 +2,221 @@
 # { "Depends": "py-genlayer:latest" }
 
 from genlayer import *
+import hashlib
 import json
+import math
+import re
 import typing
+import unicodedata
+
+
+# Repairs applied outside string literals when a reply is not strict JSON:
+# single-quoted strings, Python True/False/None, trailing commas, // comments.
+_JSON_REPAIR = re.compile(
+    r'("(?:[^"\\]|\\.)*")'
+    r"|'((?:[^'\\]|\\.)*)'"
+    r"|\b(True|False|None)\b"
+    r"|,(\s*[}\]])"
+    r"|\s//[^\n]*"
+)
+_INVALID = object()
+
+
+def _repair_token(match: re.Match) -> str:
+    quoted, single, literal, closer = match.groups()
+    if quoted:
+        return quoted
+    if single is not None:
+        return json.dumps(single.replace("\\'", "'"))
+    if literal:
+        return {"True": "true", "False": "false", "None": "null"}[literal]
+    if closer is not None:
+        return closer
+    return ""
+
+
+def _first_object(raw: str) -> str | None:
+    # First balanced {...}, ignoring braces inside quoted strings
+    start = raw.find("{")
+    while start != -1:
+        depth, quote, escaped = 0, "", False
+        for i in range(start, len(raw)):
+            ch = raw[i]
+            if quote:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == quote:
+                    quote = ""
+            elif ch in "\"'":
+                quote = ch
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return raw[start:i + 1]
+        start = raw.find("{", start + 1)
+    return None
+
+
+def _coerce(value, spec):
+    if isinstance(spec, list):
+        for option in spec:
+            if str(value).strip().lower() == str(option).lower():
+                return option
+        return _INVALID
+    for kind in spec if isinstance(spec, tuple) else (spec,):
+        if kind is type(None) and value is None:
+            return None
+        if kind is bool:
+            if isinstance(value, bool):
+                return value
+            if str(value).strip().lower() in ("true", "false"):
+                return str(value).strip().lower() == "true"
+        if kind in (int, float) and value is not None and not isinstance(value, bool):
+            if kind is int and isinstance(value, int):
+                return value
+            try:
+                number = float(str(value).strip().replace(",", ""))
+            except ValueError:
+                continue
+            if not math.isfinite(number):
+                continue
+            if kind is float:
+                return number
+            if number.is_integer():
+                return int(number)
+        if kind is str and isinstance(value, str):
+            return value
+    return _INVALID
+
+
+def _decode_llm_json(raw: str, schema: dict) -> dict | None:
+    """
+    Decodes an LLM reply into a dict that satisfies `schema`, or returns None.
+    Finds the first balanced JSON object, so fences and surrounding prose are
+    ignored, and repairs common formatting quirks before giving up.
+    Schema values are a type, a tuple of accepted types, or a list of allowed
+    literals (matched case-insensitively and returned in canonical form).
+    """
+    text = _first_object(raw) if isinstance(raw, str) else None
+    if text is None:
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        try:
+            data = json.loads(_JSON_REPAIR.sub(_repair_token, text))
+        except ValueError:
+            return None
+    if not isinstance(data, dict):
+        return None
+    for field, spec in schema.items():
+        value = _coerce(data[field], spec) if field in data else _INVALID
+        if value is _INVALID:
+            return None
+        data[field] = value
+    return data
+
+
+def _field_number(payload: str, field: str) -> float | None:
+    parsed = _decode_llm_json(payload, {field: float})
+    return None if parsed is None else parsed[field]
+
+
+def _tolerance_eq(fn: typing.Callable[[], str], field: str,
+                  abs_tol: float = 0.0, rel_tol: float = 0.0) -> str:
+    """
+    Numeric-tolerance consensus over a JSON-returning nondet function.
+    Each validator re-runs fn and accepts the leader's output when the numeric
+    `field` differs by at most abs_tol, or by at most rel_tol of the larger
+    magnitude. The check is arithmetic, so no LLM judge call is made.
+    """
+    def validator_fn(leader_result) -> bool:
+        if not isinstance(leader_result, gl.vm.Return):
+            return False
+        leader_val = _field_number(leader_result.calldata, field)
+        own_val = _field_number(fn(), field)
+        if leader_val is None or own_val is None:
+            # Both sides undecodable is agreement; the caller records the failure
+            return leader_val is None and own_val is None
+        diff = abs(leader_val - own_val)
+        return diff <= abs_tol or diff <= rel_tol * max(abs(leader_val), abs(own_val))
+
+    return gl.vm.run_nondet(fn, validator_fn)
+
+
+def _content_key(*parts: str) -> str:
+    """
+    Fixed-size storage key for unbounded user text: the SHA-256 hex digest of
+    the NFC-normalized, whitespace-collapsed parts joined by a unit separator.
+    """
+    normalized = "\x1f".join(" ".join(unicodedata.normalize("NFC", p).split()) for p in parts)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+# Page size caps for list_entries / export_entries. Each page re-walks the
+# keys before its cursor (see _page), so mirrors should sync through
+# export_entries, whose larger pages keep a full pass to N / EXPORT_LIMIT walks.
+LIST_LIMIT = 200
+EXPORT_LIMIT = 1000
+
+
+def _page(entries: TreeMap, start_after: str, limit: int, cap: int,
+          convert: typing.Callable | None = None) -> tuple[list, str]:
+    """
+    Up to `limit` (key, value) pairs with keys strictly after `start_after`,
+    in key order, and the cursor for the next page ("" after the last one).
+    TreeMap iterates from its first key and cannot seek, so every page walks
+    the keys before its cursor: O(position + limit) key reads per page and
+    O(N^2 / limit) for a full pass. Only the returned entries' values are read.
+    """
+    limit = max(1, min(limit, cap))
+    page = []
+    for key in entries:
+        if start_after and key <= start_after:
+            continue
+        if len(page) == limit:
+            return page, page[-1][0]
+        value = entries[key]
+        page.append([key, convert(value) if convert else value])
+    return page, ""
+
+
+def _list_view(entries: TreeMap, start_after: str, limit: int,
+               convert: typing.Callable | None = None) -> dict[str, typing.Any]:
+    page, cursor = _page(entries, start_after, limit, LIST_LIMIT, convert)
+    return {"entries": page, "next": cursor}
+
+
+def _export_view(entries: TreeMap, start_after: str, limit: int,
+                 convert: typing.Callable | None = None) -> str:
+    # Columnar, whitespace-free JSON: {"k": [...], "v": [...], "n": cursor}
+    page, cursor = _page(entries, start_after, limit, EXPORT_LIMIT, convert)
+    payload = {"k": [k for k, _ in page], "v": [v for _, v in page], "n": cursor}
+    return json.dumps(payload, separators=(",", ":"))
+
 
 class TimeFixer(gl.Contract):
     """
     Converts natural language time into Unix Timestamp.
     """
     
+    # Stores: Input Content Key -> Unix Timestamp
     # ERROR FIX: 'int' -> 'u256' for storage
     timestamps: TreeMap[str, u256]
 
-    def __init__(self):
-        pass
+    # Content key -> original input, kept only when deployed with keep_originals
+    originals: TreeMap[str, str]
+    keep_originals: bool
+
+    # Hot-path counters: "<method>.<counter>" -> total (see get_stats)
+    stats: TreeMap[str, u256]
+
+    def __init__(self, keep_originals: bool = False):
+        self.keep_originals = keep_originals
 
     @gl.public.write
     def to_unix_timestamp(self, natural_language_time: str) -> None:
@@ -25,6 +227,8 @@ class TimeFixer(gl.Contract):
         
         # 1. Fetch current time as anchor
         time_api_url = "http://worldtimeapi.org/api/timezone/Etc/UTC"
+        key = _content_key(natural_language_time)
+        refresh = key in self.timestamps
         
         def resolve_time_nondet() -> str:
             print(f"Fetching Reference Time from: {time_api_url}")
@@ -57,37 +261,89 @@ class TimeFixer(gl.Contract):
             """
 
             result_raw = gl.nondet.exec_prompt(task)
-            
-            try:
-                cleaned = result_raw.replace("```json", "").replace("```", "").strip()
-                json.loads(cleaned)
-                return cleaned
-            except:
-                return json.dumps({"timestamp": 0})
-
-        # Consensus: Comparative (±3600 seconds)
-        comparison_criteria = """
-        Compare 'timestamp' integers.
-        Equal if abs(val_a - val_b) <= 3600.
-        """
 
-        consensus_json = gl.eq_principle.prompt_comparative(
-            resolve_time_nondet, 
-            comparison_criteria
-        )
+            parsed = _decode_llm_json(result_raw, {"timestamp": int})
+            if parsed is None:
+                return json.dumps({"error": "decode_failed"})
+            if current_time_str == "Unknown":
+                parsed["fallback"] = "no_reference_time"
+            return json.dumps(parsed)
 
-        try:
-            parsed = json.loads(consensus_json)
-            ts = int(parsed.get("timestamp", 0))
+        # Consensus: Numeric Tolerance (±3600 seconds)
+        consensus_json = _tolerance_eq(resolve_time_nondet, "timestamp", abs_tol=3600)
+
+        parsed = _decode_llm_json(consensus_json, {"timestamp": int})
+        decoded = parsed is not None and parsed["timestamp"] >= 0
+        if decoded:
             # Store as u256
-            self.timestamps[natural_language_time] = u256(ts)
-        except:
-            self.timestamps[natural_language_time] = u256(0)
+            self.timestamps[key] = u256(parsed["timestamp"])
+            if self.keep_originals:
+                self.originals[key] = natural_language_time
+
+        self._record(
+            "to_unix_timestamp",
+            calls=1,
+            consensus_rounds=1,
+            web_fetches=1,
+            llm_prompts=1,
+            input_bytes=len(natural_language_time.encode("utf-8")),
+            refreshes=int(decoded and refresh),
+            # A zero timestamp, or one resolved without the reference time
+            fallbacks=int(decoded and (parsed["timestamp"] == 0 or "fallback" in parsed)),
+            decode_failures=int(not decoded),
+        )
         
         return None
 
     @gl.public.view
     def get_timestamp(self, natural_language_time: str) -> int:
-        if natural_language_time in self.timestamps:
-            return int(self.timestamps[natural_language_time])
+        key = _content_key(natural_language_time)
+        if key in self.timestamps:
+            return int(self.timestamps[key])
         return 0
+
+    @gl.public.view
+    def get_original(self, key: str) -> str:
+        """
+        Returns the input stored under a content key, or "" if originals are not kept.
+        """
+        if key in self.originals:
+            return self.originals[key]
+        return ""
+
+    @gl.public.view
+    def list_entries(self, start_after: str = "", limit: int = 50) -> dict[str, typing.Any]:
+        """
+        Pages through resolved timestamps in key order: {"entries": [[key, value], ...], "next": cursor}.
+        Pass "next" back as start_after; it is "" after the last page.
+        """
+        return _list_view(self.timestamps, start_after, limit, int)
+
+    @gl.public.view
+    def export_entries(self, start_after: str = "", limit: int = EXPORT_LIMIT) -> str:
+        """
+        Same pages as list_entries, as compact columnar JSON for bulk mirroring.
+        """
+        return _export_view(self.timestamps, start_after, limit, int)
+
+    @gl.public.view
+    def list_originals(self, start_after: str = "", limit: int = 50) -> dict[str, typing.Any]:
+        """
+        Pages through the retained original inputs, keyed like list_entries.
+        """
+        return _list_view(self.originals, start_after, limit)
+
+    def _record(self, method: str, **counters: int) -> None:
+        # Adds to the "<method>.<counter>" totals read by get_stats
+        for name, amount in counters.items():
+            if amount:
+                key = f"{method}.{name}"
+                current = int(self.stats[key]) if key in self.stats else 0
+                self.stats[key] = u256(current + amount)
+
+    @gl.public.view
+    def get_stats(self) -> dict[str, int]:
+        """
+        Returns hot-path counters keyed "<method>.<counter>".
+        """
+        return {key: int(count) for key, count in self.stats.items()}
@@ -2,8 +2,192 @@
 # { "Depends": "py-genlayer:latest" }
 
 from genlayer import *
+import base64
 import json
+import math
+import re
 import typing
+import zlib
+
+
+# Repairs applied outside string literals when a reply is not strict JSON:
+# single-quoted strings, Python True/False/None, trailing commas, // comments.
+_JSON_REPAIR = re.compile(
+    r'("(?:[^"\\]|\\.)*")'
+    r"|'((?:[^'\\]|\\.)*)'"
+    r"|\b(True|False|None)\b"
+    r"|,(\s*[}\]])"
+    r"|\s//[^\n]*"
+)
+_INVALID = object()
+
+
+def _repair_token(match: re.Match) -> str:
+    quoted, single, literal, closer = match.groups()
+    if quoted:
+        return quoted
+    if single is not None:
+        return json.dumps(single.replace("\\'", "'"))
+    if literal:
+        return {"True": "true", "False": "false", "None": "null"}[literal]
+    if closer is not None:
+        return closer
+    return ""
+
+
+def _first_object(raw: str) -> str | None:
+    # First balanced {...}, ignoring braces inside quoted strings
+    start = raw.find("{")
+    while start != -1:
+        depth, quote, escaped = 0, "", False
+        for i in range(start, len(raw)):
+            ch = raw[i]
+            if quote:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == quote:
+                    quote = ""
+            elif ch in "\"'":
+                quote = ch
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return raw[start:i + 1]
+        start = raw.find("{", start + 1)
+    return None
+
+
+def _coerce(value, spec):
+    if isinstance(spec, list):
+        for option in spec:
+            if str(value).strip().lower() == str(option).lower():
+                return option
+        return _INVALID
+    for kind in spec if isinstance(spec, tuple) else (spec,):
+        if kind is type(None) and value is None:
+            return None
+        if kind is bool:
+            if isinstance(value, bool):
+                return value
+            if str(value).strip().lower() in ("true", "false"):
+                return str(value).strip().lower() == "true"
+        if kind in (int, float) and value is not None and not isinstance(value, bool):
+            if kind is int and isinstance(value, int):
+                return value
+            try:
+                number = float(str(value).strip().replace(",", ""))
+            except ValueError:
+                continue
+            if not math.isfinite(number):
+                continue
+            if kind is float:
+                return number
+            if number.is_integer():
+                return int(number)
+        if kind is str and isinstance(value, str):
+            return value
+    return _INVALID
+
+
+def _decode_llm_json(raw: str, schema: dict) -> dict | None:
+    """
+    Decodes an LLM reply into a dict that satisfies `schema`, or returns None.
+    Finds the first balanced JSON object, so fences and surrounding prose are
+    ignored, and repairs common formatting quirks before giving up.
+    Schema values are a type, a tuple of accepted types, or a list of allowed
+    literals (matched case-insensitively and returned in canonical form).
+    """
+    text = _first_object(raw) if isinstance(raw, str) else None
+    if text is None:
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        try:
+            data = json.loads(_JSON_REPAIR.sub(_repair_token, text))
+        except ValueError:
+            return None
+    if not isinstance(data, dict):
+        return None
+    for field, spec in schema.items():
+        value = _coerce(data[field], spec) if field in data else _INVALID
+        if value is _INVALID:
+            return None
+        data[field] = value
+    return data
+
+
+# Page size caps for list_entries / export_entries. Each page re-walks the
+# keys before its cursor (see _page), so mirrors should sync through
+# export_entries, whose larger pages keep a full pass to N / EXPORT_LIMIT walks.
+LIST_LIMIT = 200
+EXPORT_LIMIT = 1000
+
+
+def _page(entries: TreeMap, start_after: str, limit: int, cap: int,
+          convert: typing.Callable | None = None) -> tuple[list, str]:
+    """
+    Up to `limit` (key, value) pairs with keys strictly after `start_after`,
+    in key order, and the cursor for the next page ("" after the last one).
+    TreeMap iterates from its first key and cannot seek, so every page walks
+    the keys before its cursor: O(position + limit) key reads per page and
+    O(N^2 / limit) for a full pass. Only the returned entries' values are read.
+    """
+    limit = max(1, min(limit, cap))
+    page = []
+    for key in entries:
+        if start_after and key <= start_after:
+            continue
+        if len(page) == limit:
+            return page, page[-1][0]
+        value = entries[key]
+        page.append([key, convert(value) if convert else value])
+    return page, ""
+
+
+def _list_view(entries: TreeMap, start_after: str, limit: int,
+               convert: typing.Callable | None = None) -> dict[str, typing.Any]:
+    page, cursor = _page(entries, start_after, limit, LIST_LIMIT, convert)
+    return {"entries": page, "next": cursor}
+
+
+def _export_view(entries: TreeMap, start_after: str, limit: int,
+                 convert: typing.Callable | None = None) -> str:
+    # Columnar, whitespace-free JSON: {"k": [...], "v": [...], "n": cursor}
+    page, cursor = _page(entries, start_after, limit, EXPORT_LIMIT, convert)
+    payload = {"k": [k for k, _ in page], "v": [v for _, v in page], "n": cursor}
+    return json.dumps(payload, separators=(",", ":"))
+
+
+# Stored values at least this many UTF-8 bytes are zlib-compressed; shorter
+# ones stay raw, where the encoding overhead would outweigh the saving
+COMPRESS_MIN_BYTES = 256
+_PACKED_PREFIX = "z85:"
+
+
+def _pack(text: str) -> str:
+    """
+    Storage encoding for large text values: the zlib stream in base85 behind
+    a marker prefix. Kept raw when short or when compression does not pay,
+    unless the raw text itself starts with the marker.
+    """
+    raw = text.encode("utf-8")
+    escape = text.startswith(_PACKED_PREFIX)
+    if len(raw) < COMPRESS_MIN_BYTES and not escape:
+        return text
+    packed = _PACKED_PREFIX + base64.b85encode(zlib.compress(raw, 9)).decode("ascii")
+    return packed if escape or len(packed) < len(raw) else text
+
+
+def _unpack(value: str) -> str:
+    if value.startswith(_PACKED_PREFIX):
+        return zlib.decompress(base64.b85decode(value[len(_PACKED_PREFIX):])).decode("utf-8")
+    return value
+
 
 class WebParser(gl.Contract):
     """
@@ -11,8 +195,12 @@ class WebParser(gl.Contract):
     """
     
     # Stores: URL -> Extracted JSON String
+    # Large values are stored packed (see _pack); read them through _unpack
     parsed_data: TreeMap[str, str]
 
+    # Hot-path counters: "<method>.<counter>" -> total (see get_stats)
+    stats: TreeMap[str, u256]
+
     def __init__(self):
         pass
 
@@ -33,7 +221,7 @@ class WebParser(gl.Contract):
                 web_content = gl.nondet.web.render(url, mode="text")
             except Exception as e:
                 print(f"Fetch failed: {e}")
-                return "{}"
+                return json.dumps({"error": "fetch_failed"})
 
             # Task: Extract data matching the schema
             task = f"""
@@ -51,15 +239,12 @@ class WebParser(gl.Contract):
             """
 
             result_raw = gl.nondet.exec_prompt(task)
-            
-            # Clean up potential Markdown formatting
-            try:
-                cleaned = result_raw.replace("```json", "").replace("```", "").strip()
-                # Validation check
-                json.loads(cleaned)
-                return cleaned
-            except:
-                return "{}"
+
+            # The caller's schema is free-form, so only the object itself is checked
+            parsed = _decode_llm_json(result_raw, {})
+            if parsed is None:
+                return json.dumps({"error": "decode_failed"})
+            return json.dumps(parsed)
 
         # Consensus: Comparative (JSON Structural Match)
         # We ask the validator to ignore whitespace/sorting and check if the DATA is the same.
@@ -77,8 +262,26 @@ class WebParser(gl.Contract):
             comparison_criteria
         )
 
+        decode_failed = consensus_json == json.dumps({"error": "decode_failed"})
+        # An unreachable page is stored as an empty extraction, but counted apart
+        fetch_failed = consensus_json == json.dumps({"error": "fetch_failed"})
+        if fetch_failed:
+            consensus_json = "{}"
+        self._record(
+            "extract_schema",
+            calls=1,
+            consensus_rounds=1,
+            web_fetches=1,
+            llm_prompts=int(not fetch_failed),
+            input_bytes=len(url.encode("utf-8")) + len(schema_definition.encode("utf-8")),
+            refreshes=int(not decode_failed and url in self.parsed_data),
+            fallbacks=int(fetch_failed),
+            decode_failures=int(decode_failed),
+        )
+
         # Store the result
-        self.parsed_data[url] = consensus_json
+        if not decode_failed:
+            self.parsed_data[url] = _pack(consensus_json)
         
         return None
 
@@ -88,5 +291,35 @@ class WebParser(gl.Contract):
         Returns the stored JSON string for a URL.
         """
         if url in self.parsed_data:
-            return self.parsed_data[url]
+            return _unpack(self.parsed_data[url])
         return "{}"
+
+    @gl.public.view
+    def list_entries(self, start_after: str = "", limit: int = 50) -> dict[str, typing.Any]:
+        """
+        Pages through extracted JSON documents in key order: {"entries": [[key, value], ...], "next": cursor}.
+        Pass "next" back as start_after; it is "" after the last page.
+        """
+        return _list_view(self.parsed_data, start_after, limit, _unpack)
+
+    @gl.public.view
+    def export_entries(self, start_after: str = "", limit: int = EXPORT_LIMIT) -> str:
+        """
+        Same pages as list_entries, as compact columnar JSON for bulk mirroring.
+        """
+        return _export_view(self.parsed_data, start_after, limit, _unpack)
+
+    def _record(self, method: str, **counters: int) -> None:
+        # Adds to the "<method>.<counter>" totals read by get_stats
+        for name, amount in counters.items():
+            if amount:
+                key = f"{method}.{name}"
+                current = int(self.stats[key]) if key in self.stats else 0
+                self.stats[key] = u256(current + amount)
+
+    @gl.public.view
+    def get_stats(self) -> dict[str, int]:
+        """
+        Returns hot-path counters keyed "<method>.<counter>".
+        """
+        return {key: int(count) for key, count in self.stats.items()}
@@ -2,6 +2,51 @@
 # { "Depends": "py-genlayer:latest" }
 
 from genlayer import *
+import json
+import typing
+
+
+# Page size caps for list_entries / export_entries. Each page re-walks the
+# keys before its cursor (see _page), so mirrors should sync through
+# export_entries, whose larger pages keep a full pass to N / EXPORT_LIMIT walks.
+LIST_LIMIT = 200
+EXPORT_LIMIT = 1000
+
+
+def _page(entries: TreeMap, start_after: str, limit: int, cap: int,
+          convert: typing.Callable | None = None) -> tuple[list, str]:
+    """
+    Up to `limit` (key, value) pairs with keys strictly after `start_after`,
+    in key order, and the cursor for the next page ("" after the last one).
+    TreeMap iterates from its first key and cannot seek, so every page walks
+    the keys before its cursor: O(position + limit) key reads per page and
+    O(N^2 / limit) for a full pass. Only the returned entries' values are read.
+    """
+    limit = max(1, min(limit, cap))
+    page = []
+    for key in entries:
+        if start_after and key <= start_after:
+            continue
+        if len(page) == limit:
+            return page, page[-1][0]
+        value = entries[key]
+        page.append([key, convert(value) if convert else value])
+    return page, ""
+
+
+def _list_view(entries: TreeMap, start_after: str, limit: int,
+               convert: typing.Callable | None = None) -> dict[str, typing.Any]:
+    page, cursor = _page(entries, start_after, limit, LIST_LIMIT, convert)
+    return {"entries": page, "next": cursor}
+
+
+def _export_view(entries: TreeMap, start_after: str, limit: int,
+                 convert: typing.Callable | None = None) -> str:
+    # Columnar, whitespace-free JSON: {"k": [...], "v": [...], "n": cursor}
+    page, cursor = _page(entries, start_after, limit, EXPORT_LIMIT, convert)
+    payload = {"k": [k for k, _ in page], "v": [v for _, v in page], "n": cursor}
+    return json.dumps(payload, separators=(",", ":"))
+
 
 class WikiTruth(gl.Contract):
     """
@@ -11,6 +56,9 @@ class WikiTruth(gl.Contract):
 
     verified_facts: TreeMap[str, bool] = TreeMap()
 
+    # Hot-path counters: "<method>.<counter>" -> total (see get_stats)
+    stats: TreeMap[str, u256] = TreeMap()
+
     def __init__(self):
         pass
 
@@ -26,12 +74,12 @@ class WikiTruth(gl.Contract):
 
         url = f"https://en.wikipedia.org/wiki/{page_title}"
 
-        def check_wiki_nondet() -> bool:
+        def check_wiki_nondet() -> bool | None:
             try:
                 web_content = gl.nondet.web.render(url, mode="text")
             except Exception as e:
                 print(f"Fetch failed: {e}")
-                return False
+                return None
 
             text = web_content.lower()
 
@@ -39,8 +87,19 @@ class WikiTruth(gl.Contract):
             print(f"Checking page {page_title}, found={found}")
             return found
 
-        result = gl.eq_principle.strict_eq(check_wiki_nondet)
-        self.verified_facts[f"{page_title}:{expected_phrase}"] = result
+        # None is an unreachable page, stored as "not found" but counted apart
+        found = gl.eq_principle.strict_eq(check_wiki_nondet)
+        result = found is True
+        key = f"{page_title}:{expected_phrase}"
+        self._record(
+            "verify_fact",
+            calls=1,
+            consensus_rounds=1,
+            web_fetches=1,
+            refreshes=int(key in self.verified_facts),
+            fallbacks=int(found is None),
+        )
+        self.verified_facts[key] = result
 
         print(f"Stored result: {result}")
         return None
@@ -49,3 +108,33 @@ class WikiTruth(gl.Contract):
     def is_fact_true(self, page_title: str, expected_phrase: str) -> bool:
         key = f"{page_title.replace(' ', '_')}:{expected_phrase.strip().lower()}"
         return self.verified_facts.get(key, False)
+
+    @gl.public.view
+    def list_entries(self, start_after: str = "", limit: int = 50) -> dict[str, typing.Any]:
+        """
+        Pages through fact-check results in key order: {"entries": [[key, value], ...], "next": cursor}.
+        Pass "next" back as start_after; it is "" after the last page.
+        """
+        return _list_view(self.verified_facts, start_after, limit)
+
+    @gl.public.view
+    def export_entries(self, start_after: str = "", limit: int = EXPORT_LIMIT) -> str:
+        """
+        Same pages as list_entries, as compact columnar JSON for bulk mirroring.
+        """
+        return _export_view(self.verified_facts, start_after, limit)
+
+    def _record(self, method: str, **counters: int) -> None:
+        # Adds to the "<method>.<counter>" totals read by get_stats
+        for name, amount in counters.items():
+            if amount:
+                key = f"{method}.{name}"
+                current = int(self.stats[key]) if key in self.stats else 0
+                self.stats[key] = u256(current + amount)
+
+    @gl.public.view
+    def get_stats(self) -> dict[str, int]:
+        """
+        Returns hot-path counters keyed "<method>.<counter>".
+        """
+        return {key: int(count) for key, count in self.stats.items()}